@@ -0,0 +1,34 @@
+"""add_foreign_key_indexes
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7b8c9d0e1f2'
+down_revision: Union[str, None] = 'f6a7b8c9d0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Внешние ключи без индекса: удаление услуги, шаблона или банка проверяло
+    # ссылки полным проходом по contract_services, contracts и clients
+    op.create_index('ix_contract_services_service_id', 'contract_services', ['service_id'], unique=False)
+    op.create_index('ix_contracts_template_id', 'contracts', ['template_id'], unique=False)
+    op.create_index('ix_clients_bank_id', 'clients', ['bank_id'], unique=False)
+    # Период по дате договора в списке и порядок выгрузки (date, id)
+    op.create_index('ix_contracts_date_id', 'contracts', ['date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contracts_date_id', table_name='contracts')
+    op.drop_index('ix_clients_bank_id', table_name='clients')
+    op.drop_index('ix_contracts_template_id', table_name='contracts')
+    op.drop_index('ix_contract_services_service_id', table_name='contract_services')
@@ -0,0 +1,30 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: c3d4e5f6a7b8
+Revises: b2c3d4e5f6a7
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d4e5f6a7b8'
+down_revision: Union[str, None] = 'b2c3d4e5f6a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contracts_created_at_id', 'contracts', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_clients_created_at_id', 'clients', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_services_name_id', 'services', ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_services_name_id', table_name='services')
+    op.drop_index('ix_clients_created_at_id', table_name='clients')
+    op.drop_index('ix_contracts_created_at_id', table_name='contracts')
@@ -0,0 +1,47 @@
+"""add_trigram_search
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e5f6a7b8c9'
+down_revision: Union[str, None] = 'c3d4e5f6a7b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_TEXT = {
+    'banks': "lower(name || ' ' || bik)",
+    'services': "lower(name || ' ' || payment_terms)",
+    'clients': (
+        "lower(name || ' ' || coalesce(inn, '') || ' ' || last_name || ' ' || first_name"
+        " || ' ' || coalesce(phone, '') || ' ' || coalesce(email, ''))"
+    ),
+    'contracts': "lower(number)",
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, expression in SEARCH_TEXT.items():
+        op.add_column(table, sa.Column('search_text', sa.Text(), sa.Computed(expression, persisted=True), nullable=False))
+        op.create_index(
+            f'ix_{table}_search_text_trgm', table, ['search_text'], unique=False,
+            postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'},
+        )
+    op.create_index('ix_contracts_client_id', 'contracts', ['client_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contracts_client_id', table_name='contracts')
+    for table in SEARCH_TEXT:
+        op.drop_index(f'ix_{table}_search_text_trgm', table_name=table)
+        op.drop_column(table, 'search_text')
+    # Расширение pg_trgm не удаляется: им могут пользоваться другие объекты БД
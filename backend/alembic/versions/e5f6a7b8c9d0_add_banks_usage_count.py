@@ -0,0 +1,63 @@
+"""add_banks_usage_count
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f6a7b8c9d0'
+down_revision: Union[str, None] = 'd4e5f6a7b8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('banks', sa.Column('usage_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE banks SET usage_count = actual.count
+        FROM (SELECT bank_id, count(*) AS count FROM clients WHERE bank_id IS NOT NULL GROUP BY bank_id) AS actual
+        WHERE banks.id = actual.bank_id
+    """)
+    op.create_index('ix_banks_usage_count_name_id', 'banks', [sa.text('usage_count DESC'), 'name', 'id'], unique=False)
+
+    # Счётчик меняется в транзакции изменения клиента
+    op.execute("""
+        CREATE OR REPLACE FUNCTION clients_bank_usage_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.bank_id IS NOT NULL THEN
+                UPDATE banks SET usage_count = usage_count - 1 WHERE id = OLD.bank_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.bank_id IS NOT NULL THEN
+                UPDATE banks SET usage_count = usage_count + 1 WHERE id = NEW.bank_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER clients_bank_usage_insert_delete
+        AFTER INSERT OR DELETE ON clients
+        FOR EACH ROW EXECUTE FUNCTION clients_bank_usage_count()
+    """)
+    # Только при смене банка: правка остальных полей клиента не трогает banks
+    op.execute("""
+        CREATE TRIGGER clients_bank_usage_update
+        AFTER UPDATE OF bank_id ON clients
+        FOR EACH ROW WHEN (OLD.bank_id IS DISTINCT FROM NEW.bank_id)
+        EXECUTE FUNCTION clients_bank_usage_count()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS clients_bank_usage_update ON clients")
+    op.execute("DROP TRIGGER IF EXISTS clients_bank_usage_insert_delete ON clients")
+    op.execute("DROP FUNCTION IF EXISTS clients_bank_usage_count()")
+    op.drop_index('ix_banks_usage_count_name_id', table_name='banks')
+    op.drop_column('banks', 'usage_count')
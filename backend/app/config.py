@@ -8,6 +8,80 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     jwt_expire_hours: int = 24
 
+    # Кэш скомпилированных шаблонов договора
+    template_cache_max_entries: int = 64
+    template_cache_max_bytes: int = 32 * 1024 * 1024
+
+    # Режим рендеринга договора: "slots" (сериализованный шаблон) или "docx" (python-docx)
+    contract_render_mode: str = "slots"
+
+    # Режим генерации счёта: "zip" (скомпилированный xlsx) или "openpyxl"
+    invoice_render_mode: str = "zip"
+
+    # Кэш готовых документов: LRU в памяти и необязательный каталог на диске
+    render_cache_max_bytes: int = 64 * 1024 * 1024
+    render_cache_dir: str = ""
+    render_cache_disk_max_bytes: int = 1024 * 1024 * 1024
+
+    # Кэш QR-кодов оплаты (записей на строку данных)
+    qr_cache_size: int = 1024
+
+    # Массовая выгрузка: договоров в пачке загрузки и документов в работе одновременно
+    export_batch_size: int = 50
+    export_concurrency: int = 4
+
+    # Фоновые задачи: длина очереди на вид, срок хранения результата (с),
+    # каталог результатов (пусто — временный каталог), обработчиков на вид
+    jobs_queue_size: int = 100
+    jobs_ttl: int = 3600
+    jobs_dir: str = ""
+    jobs_document_concurrency: int = 4
+    jobs_export_concurrency: int = 1
+
+    # Где выполняются задачи: "memory" — в процессе API, "postgres" — очередь
+    # render_jobs в БД и отдельные процессы python -m app.worker; jobs_dir
+    # в этом режиме должен быть общим каталогом для API и обработчиков
+    jobs_backend: str = "memory"
+    # Опрос очереди и состояния задачи (с), срок захвата задачи обработчиком (с),
+    # попыток на задачу и базовая пауза перед повтором (удваивается на попытку)
+    jobs_poll_interval: float = 1.0
+    jobs_visibility_timeout: int = 300
+    jobs_max_attempts: int = 3
+    jobs_retry_backoff: float = 10.0
+
+    # Индекс справочника БИК в памяти API для /api/banks/lookup и
+    # период его перезагрузки (с) для правок, сделанных на других узлах
+    bank_index_enabled: bool = True
+    bank_index_refresh_interval: float = 600.0
+
+    # Записей справочника ЦБ в одной пачке COPY при импорте
+    cbr_import_batch_size: int = 5000
+    # Адрес архива справочника БИК ЦБ
+    cbr_newbik_url: str = "https://www.cbr.ru/s/newbik"
+    # Плановое обновление справочника из процесса API: период (с) и как часто
+    # проверять, не пора ли (с); запускает одна реплика под advisory-блокировкой
+    cbr_sync_enabled: bool = False
+    cbr_sync_interval: float = 24 * 3600
+    cbr_sync_check_interval: float = 3600
+
+    # Пул LibreOffice для PDF; 0 — запуск libreoffice на каждую конвертацию
+    office_pool_size: int = 2
+    office_max_conversions: int = 200
+    office_convert_timeout: float = 60.0
+    office_start_timeout: float = 30.0
+    office_binary: str = "libreoffice"
+    # Интерпретатор с пакетом uno (python3-uno), если в окружении приложения его нет
+    office_python: str = "/usr/bin/python3"
+    office_profile_dir: str = ""
+
+    # Очередь конвертаций в PDF: параллельные конвертации и ожидающие запросы
+    pdf_concurrency: int = 2
+    pdf_queue_size: int = 20
+    pdf_retry_after: int = 5
+
+    # Дочерние процессы для построения DOCX/XLSX; 0 — рендеринг в процессе API
+    render_workers: int = 2
+
     class Config:
         env_file = ".env"
 
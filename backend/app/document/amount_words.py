@@ -0,0 +1,111 @@
+"""
+Сумма прописью на русском языке (рубли и копейки).
+
+Числительные согласуются по роду (один рубль / одна тысяча / два миллиона),
+существительные — по числу (рубль / рубля / рублей). Цены услуг постоянно
+повторяются, поэтому результаты кэшируются.
+"""
+from decimal import Decimal
+from functools import lru_cache
+
+_ONES_MASCULINE = (
+    "", "один", "два", "три", "четыре", "пять", "шесть", "семь", "восемь", "девять",
+)
+_ONES_FEMININE = (
+    "", "одна", "две", "три", "четыре", "пять", "шесть", "семь", "восемь", "девять",
+)
+_TEENS = (
+    "десять", "одиннадцать", "двенадцать", "тринадцать", "четырнадцать",
+    "пятнадцать", "шестнадцать", "семнадцать", "восемнадцать", "девятнадцать",
+)
+_TENS = (
+    "", "", "двадцать", "тридцать", "сорок", "пятьдесят",
+    "шестьдесят", "семьдесят", "восемьдесят", "девяносто",
+)
+_HUNDREDS = (
+    "", "сто", "двести", "триста", "четыреста",
+    "пятьсот", "шестьсот", "семьсот", "восемьсот", "девятьсот",
+)
+
+# Разряды: формы (1, 2-4, 5+) и женский род числительного
+_SCALES = (
+    (("тысяча", "тысячи", "тысяч"), True),
+    (("миллион", "миллиона", "миллионов"), False),
+    (("миллиард", "миллиарда", "миллиардов"), False),
+    (("триллион", "триллиона", "триллионов"), False),
+    (("квадриллион", "квадриллиона", "квадриллионов"), False),
+)
+
+RUBLE_FORMS = ("рубль", "рубля", "рублей")
+KOPECK_FORMS = ("копейка", "копейки", "копеек")
+
+
+def plural_form(n: int, forms: tuple[str, str, str]) -> str:
+    """Выбирает форму существительного для числа: (1, 2-4, 5+)"""
+    n = abs(n)
+    if 11 <= n % 100 <= 14:
+        return forms[2]
+    if n % 10 == 1:
+        return forms[0]
+    if 2 <= n % 10 <= 4:
+        return forms[1]
+    return forms[2]
+
+
+def _triad_words(n: int, feminine: bool) -> list[str]:
+    """Слова для числа 0..999"""
+    words = []
+    hundreds, rest = divmod(n, 100)
+    if hundreds:
+        words.append(_HUNDREDS[hundreds])
+    if 10 <= rest <= 19:
+        words.append(_TEENS[rest - 10])
+    else:
+        tens, ones = divmod(rest, 10)
+        if tens:
+            words.append(_TENS[tens])
+        if ones:
+            words.append((_ONES_FEMININE if feminine else _ONES_MASCULINE)[ones])
+    return words
+
+
+@lru_cache(maxsize=4096)
+def integer_to_words_ru(n: int, feminine: bool = False) -> str:
+    """Целое число прописью: 21000 -> 'двадцать одна тысяча'"""
+    if n == 0:
+        return "ноль"
+    if n < 0:
+        return f"минус {integer_to_words_ru(-n, feminine)}"
+
+    triads = []
+    while n:
+        n, triad = divmod(n, 1000)
+        triads.append(triad)
+    if len(triads) > len(_SCALES) + 1:
+        raise ValueError("Число слишком большое для записи прописью")
+
+    words = []
+    for index in range(len(triads) - 1, -1, -1):
+        triad = triads[index]
+        if not triad:
+            continue
+        if index == 0:
+            words.extend(_triad_words(triad, feminine))
+        else:
+            forms, scale_feminine = _SCALES[index - 1]
+            words.extend(_triad_words(triad, scale_feminine))
+            words.append(plural_form(triad, forms))
+    return " ".join(words)
+
+
+@lru_cache(maxsize=4096)
+def rubles_to_words(rubles: int) -> str:
+    """Рубли прописью: 'двадцать один рубль', 'пять тысяч рублей'"""
+    return f"{integer_to_words_ru(rubles)} {plural_form(rubles, RUBLE_FORMS)}"
+
+
+def split_amount(amount: Decimal) -> tuple[int, int]:
+    """Делит сумму на рубли и копейки (копейки отбрасываются после второго знака)"""
+    rubles = int(amount)
+    kopecks = int((amount - rubles) * 100)
+    return rubles, kopecks
@@ -0,0 +1,143 @@
+"""
+Массовая выгрузка документов договоров одним zip-архивом.
+
+Договоры загружаются пачками по export_batch_size, документы рендерятся
+параллельно (render_pool и очередь PDF), и каждый готовый файл сразу уходит
+клиенту частью потокового zip. Одновременно в памяти не больше
+export_concurrency документов и одной пачки договоров, независимо от размера
+выгрузки. Ошибки отдельных документов не прерывают выгрузку: их список
+кладётся в архив файлом errors.txt.
+"""
+import asyncio
+import logging
+import re
+from typing import AsyncIterator, Callable, Iterable
+
+from app.config import settings
+from app.database import async_session
+from app.models import Contract
+from app.services.contracts import select_contracts_for_render
+
+from .rendering import (
+    FORMAT_CONTRACT_DOCX,
+    FORMAT_CONTRACT_PDF,
+    FORMAT_INVOICE_PDF,
+    FORMAT_INVOICE_XLSX,
+    render_document_queued,
+)
+from .snapshot import ContractSnapshot
+from .zip_package import ZipEntry, ZipStreamWriter
+
+logger = logging.getLogger(__name__)
+
+# Формат -> (имя файла без номера договора, расширение)
+EXPORT_FILENAMES = {
+    FORMAT_CONTRACT_DOCX: ("contract", "docx"),
+    FORMAT_CONTRACT_PDF: ("contract", "pdf"),
+    FORMAT_INVOICE_XLSX: ("invoice", "xlsx"),
+    FORMAT_INVOICE_PDF: ("invoice", "pdf"),
+}
+
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+def _safe_number(snapshot: ContractSnapshot) -> str:
+    return _UNSAFE_FILENAME_RE.sub("_", snapshot.number).strip() or str(snapshot.id)
+
+
+def document_filename(snapshot: ContractSnapshot, fmt: str) -> str:
+    """Имя файла документа: contract_<номер>.docx"""
+    prefix, extension = EXPORT_FILENAMES[fmt]
+    return f"{prefix}_{_safe_number(snapshot)}.{extension}"
+
+
+def export_filename(snapshot: ContractSnapshot, fmt: str) -> str:
+    """Путь документа в архиве: папка на договор (<номер>_<id>), номер в имени файла.
+
+    Разные номера после замены недопустимых символов могут совпасть
+    (А/1 и А_1), поэтому папку делает уникальной id договора.
+    """
+    number = _UNSAFE_FILENAME_RE.sub("_", snapshot.number).strip()
+    folder = f"{number}_{snapshot.id}" if number else str(snapshot.id)
+    return f"{folder}/{document_filename(snapshot, fmt)}"
+
+
+async def iter_contract_snapshots(ids: list[int], batch_size: int) -> AsyncIterator[ContractSnapshot]:
+    """Снимки договоров по списку идентификаторов, пачками.
+
+    Каждая пачка загружается в своей сессии: соединение с БД не удерживается,
+    пока клиент скачивает архив.
+    """
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        async with async_session() as db:
+            result = await db.execute(
+                select_contracts_for_render().where(Contract.id.in_(batch))
+            )
+            contracts = {contract.id: contract for contract in result.scalars()}
+            snapshots = [ContractSnapshot.from_model(contracts[i]) for i in batch if i in contracts]
+        for snapshot in snapshots:
+            yield snapshot
+
+
+async def iter_rendered(
+    snapshots: AsyncIterator[ContractSnapshot],
+    formats: Iterable[str],
+    concurrency: int,
+) -> AsyncIterator[tuple[str, bytes | Exception]]:
+    """(путь в архиве, документ или ошибка) в порядке готовности.
+
+    Новые документы ставятся в работу, только когда потребитель забрал
+    готовые, поэтому в памяти не больше concurrency документов.
+    """
+    formats = tuple(formats)
+    pending: dict[asyncio.Task, str] = {}
+
+    async def wait_first() -> list[tuple[str, bytes | Exception]]:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        return [(pending.pop(task), task.exception() or task.result()) for task in done]
+
+    try:
+        async for snapshot in snapshots:
+            for fmt in formats:
+                while len(pending) >= concurrency:
+                    for item in await wait_first():
+                        yield item
+                # Выгрузка не отклоняется при заполненной очереди PDF, а ждёт её
+                # и не кладёт документы в кэш: повторно их почти никогда не скачивают
+                task = asyncio.create_task(render_document_queued(snapshot, fmt, store=False))
+                pending[task] = export_filename(snapshot, fmt)
+        while pending:
+            for item in await wait_first():
+                yield item
+    finally:
+        # Клиент отключился: незавершённые рендеры не нужны
+        for task in pending:
+            task.cancel()
+
+
+async def stream_export(
+    snapshots: AsyncIterator[ContractSnapshot],
+    formats: Iterable[str],
+    concurrency: int | None = None,
+    on_file: Callable[[str], None] | None = None,
+) -> AsyncIterator[bytes]:
+    """Части zip-архива с документами договоров по мере готовности.
+
+    on_file вызывается для каждого обработанного документа (в том числе с ошибкой).
+    """
+    writer = ZipStreamWriter()
+    errors = []
+    rendered = iter_rendered(snapshots, formats, concurrency or settings.export_concurrency)
+    async for name, data in rendered:
+        if on_file is not None:
+            on_file(name)
+        if isinstance(data, Exception):
+            logger.error("Export of %s failed: %r", name, data)
+            errors.append(f"{name}: {data!r}")
+            continue
+        # docx/xlsx уже сжаты, PDF от LibreOffice тоже: кладём без повторного сжатия
+        yield writer.add(ZipEntry.store(name, data))
+    if errors:
+        yield writer.add(ZipEntry.deflate("errors.txt", "\n".join(errors).encode("utf-8")))
+    yield writer.finish()
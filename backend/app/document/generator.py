@@ -1,41 +1,52 @@
+import logging
 from io import BytesIO
 from decimal import Decimal
 from docx import Document
 
+from app.config import settings
 from app.models import Contract, CLIENT_TYPES
 
 from .constants import TEMPLATE_PATH
 from .tables import fill_services_table
-from .replacements import replace_in_paragraph, build_replacements, get_full_name, build_requisites
+from .replacements import substitute_document, build_replacements, get_full_name, build_requisites
 from .pdf_generator import generate_pdf_document
-from .template_builder import ContractTemplateBuilder
+from .pdf_limiter import pdf_limiter
+from .template_cache import template_cache
 
+logger = logging.getLogger(__name__)
 
-def generate_contract_document(contract: Contract) -> bytes:
-    # Получаем секции из шаблона контракта или используем None (будут дефолтные)
-    sections = None
-    if contract.template and contract.template.sections:
-        sections = contract.template.sections
 
-    # Создаём документ программно через builder
-    builder = ContractTemplateBuilder(sections=sections)
-    doc = builder.build()
+# Режимы рендеринга договора
+RENDER_MODE_SLOTS = "slots"  # подстановка в сериализованный document.xml
+RENDER_MODE_DOCX = "docx"  # эталонный путь через дерево python-docx
 
-    total = fill_services_table(doc, contract.services)
-    replacements = build_replacements(contract, total)
 
-    for para in doc.paragraphs:
-        replace_in_paragraph(para, replacements)
+def generate_contract_document(contract: Contract, mode: str | None = None) -> bytes:
+    # Берём собранный шаблон из кэша (по id/updated_at шаблона или встроенный)
+    compiled = template_cache.get(contract.template)
+
+    if (mode or settings.contract_render_mode) == RENDER_MODE_DOCX:
+        doc_bytes, unknown = render_docx(compiled.instantiate(), contract)
+    else:
+        doc_bytes, unknown = compiled.slot_template.render(contract)
+
+    if unknown:
+        logger.warning(
+            "Contract %s: unknown placeholders left in document: %s",
+            contract.number, ", ".join(sorted(unknown)),
+        )
+    return doc_bytes
 
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for para in cell.paragraphs:
-                    replace_in_paragraph(para, replacements)
+
+def render_docx(doc, contract: Contract) -> tuple[bytes, set[str]]:
+    """Заполняет копию шаблона через python-docx (эталонный режим)"""
+    total = fill_services_table(doc, contract.services)
+    replacements = build_replacements(contract, total)
+    unknown = substitute_document(doc, replacements)
 
     buffer = BytesIO()
     doc.save(buffer)
-    return buffer.getvalue()
+    return buffer.getvalue(), unknown
 
 
 def generate_fallback_document(contract: Contract) -> bytes:
@@ -99,4 +110,5 @@ def generate_fallback_document(contract: Contract) -> bytes:
 
 
 async def generate_contract_pdf(contract: Contract) -> bytes:
-    return generate_pdf_document(contract)
\ No newline at end of file
+    # Конвертация блокирующая: выполняется в пуле потоков с ограничением очереди
+    return await pdf_limiter.run(generate_pdf_document, contract)
\ No newline at end of file
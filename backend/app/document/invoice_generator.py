@@ -1,17 +1,38 @@
 """Генератор счетов на оплату в формате Excel"""
+import pickle
 from io import BytesIO
 from decimal import Decimal
 from copy import copy
+from functools import cache
 
 from openpyxl import load_workbook
+from openpyxl.cell.cell import Cell, MergedCell
 from openpyxl.styles import Font
 from openpyxl.drawing.image import Image as XLImage
+from openpyxl.utils.cell import coordinate_from_string
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.worksheet.merge import MergedCellRange
 
+from app.config import settings
 from app.models import Contract, CLIENT_TYPES
 from .constants import INVOICE_TEMPLATE_PATH, MONTHS_RU
-from .utils import number_to_words_ru
+from .amount_words import KOPECK_FORMS, plural_form, rubles_to_words, split_amount
 from .replacements import get_short_name
-from .qr_generator import generate_payment_qr_image
+from .qr_generator import build_payment_qr_data, generate_payment_qr_image, payment_qr_png
+from .xlsx_template import XlsxTemplate
+
+
+# Режимы генерации счёта
+INVOICE_MODE_ZIP = "zip"  # подстановка в скомпилированный xlsx-архив
+INVOICE_MODE_OPENPYXL = "openpyxl"  # эталонный путь через openpyxl
+
+# Ячейки шаблона (координаты до вставки строк услуг)
+SERVICES_ROW = 25
+HEADER_CELLS = ("B10", "F17", "F20")  # заголовок, покупатель, основание
+TOTAL_CELLS = ("AJ26", "BF26", "BC28", "BC30", "B32", "B33")
+SERVICE_COLUMNS = ("B", "D", "Y", "AJ", "AP", "AS", "BC")
+QR_ANCHOR = "BG3"
+QR_SIZE = 95  # ~2.5 см
 
 
 def build_client_invoice_line(client) -> str:
@@ -62,12 +83,19 @@ def format_price(amount: Decimal) -> str:
 
 def format_price_words(amount: Decimal) -> str:
     """Форматирует сумму прописью: 'Двадцать тысяч рублей 00 копеек'"""
-    rubles = int(amount)
-    kopecks = int((amount - rubles) * 100)
-    words = number_to_words_ru(Decimal(rubles))
+    rubles, kopecks = split_amount(amount)
+    words = rubles_to_words(rubles)
     # Capitalize first letter
     words = words[0].upper() + words[1:]
-    return f"{words} {kopecks:02d} копеек"
+    return f"{words} {kopecks:02d} {plural_form(kopecks, KOPECK_FORMS)}"
+
+
+def replace_placeholders(value: str, replacements: dict) -> str:
+    """Заменяет плейсхолдеры в строке"""
+    for key, replacement in replacements.items():
+        if key in value:
+            value = value.replace(key, str(replacement or ""))
+    return value
 
 
 def replace_in_cell(cell, replacements: dict):
@@ -75,31 +103,76 @@ def replace_in_cell(cell, replacements: dict):
     if cell.value is None:
         return
 
-    value = str(cell.value)
-    for key, replacement in replacements.items():
-        if key in value:
-            value = value.replace(key, str(replacement or ""))
+    cell.value = replace_placeholders(str(cell.value), replacements)
 
-    cell.value = value
 
+def _clone_merged_range(merged: MergedCellRange, start_cell, row: int) -> MergedCellRange:
+    """Копия объединения образца на строке row.
 
-def copy_row_style(ws, source_row: int, target_row: int, max_col: int = 70):
-    """Копирует стиль строки"""
-    for col in range(1, max_col + 1):
-        source_cell = ws.cell(row=source_row, column=col)
-        target_cell = ws.cell(row=target_row, column=col)
+    Конструктор MergedCellRange заново сливает границы угловых ячеек; у копий
+    строки-образца они уже слиты в индексе стиля, поэтому он не вызывается.
+    """
+    clone = MergedCellRange.__new__(MergedCellRange)
+    CellRange.__init__(clone, min_col=merged.min_col, min_row=row, max_col=merged.max_col, max_row=row)
+    clone.ws = merged.ws
+    clone.start_cell = start_cell
+    return clone
 
-        if source_cell.has_style:
-            target_cell.font = copy(source_cell.font)
-            target_cell.border = copy(source_cell.border)
-            target_cell.fill = copy(source_cell.fill)
-            target_cell.number_format = source_cell.number_format
-            target_cell.protection = copy(source_cell.protection)
-            target_cell.alignment = copy(source_cell.alignment)
 
+def expand_service_rows(ws, row: int, count: int):
+    """Размножает строку-образец row до count строк за один проход по листу.
 
-def fill_services_table(ws, services: list, start_row: int = 25) -> Decimal:
-    """Заполняет таблицу услуг, возвращает итоговую сумму.
+    Ячейки, высоты строк и объединения ниже образца сдвигаются один раз,
+    новые строки получают те же индексы стилей и объединения, что и образец.
+    """
+    extra = count - 1
+    if extra <= 0:
+        return
+
+    # Сдвигаем ячейки ниже образца (итоги, подписи)
+    cells = {}
+    for (r, column), cell in ws._cells.items():
+        if r > row:
+            cell.row = r + extra
+        cells[cell.row, column] = cell
+
+    # Копии строки-образца: только массив индексов стиля, без объектов стилей
+    template = [cell for (r, _), cell in ws._cells.items() if r == row]
+    for i in range(1, count):
+        for cell in template:
+            clone = MergedCell(ws, row + i, cell.column) if isinstance(cell, MergedCell) \
+                else Cell(ws, row=row + i, column=cell.column)
+            clone._style = copy(cell._style)
+            cells[row + i, cell.column] = clone
+    ws._cells = cells
+
+    # Объединения: сдвигаем нижние, повторяем объединения образца
+    merges = set()
+    for merged in ws.merged_cells.ranges:
+        if merged.min_row > row:
+            merged.shift(row_shift=extra)
+        elif merged.min_row == merged.max_row == row:
+            for i in range(1, count):
+                merges.add(_clone_merged_range(merged, cells[row + i, merged.min_col], row + i))
+        merges.add(merged)
+    ws.merged_cells.ranges = merges
+
+    # Высоты строк
+    dimensions = list(ws.row_dimensions.items())
+    ws.row_dimensions.clear()
+    for index, dimension in dimensions:
+        if index > row:
+            dimension.index = index + extra
+        ws.row_dimensions[dimension.index] = dimension
+        if index == row:
+            for i in range(1, count):
+                clone = copy(dimension)
+                clone.index = row + i
+                ws.row_dimensions[clone.index] = clone
+
+
+def service_row_values(index: int, service) -> dict:
+    """Значения строки услуги по колонкам (index — с нуля).
 
     Структура строки услуги (из шаблона):
     - B: № (номер)
@@ -110,72 +183,65 @@ def fill_services_table(ws, services: list, start_row: int = 25) -> Decimal:
     - AS: Цена
     - BC: Сумма
     """
+    return {
+        "B": index + 1,
+        "D": service.name,
+        # Код услуги генерируется из id
+        "Y": f"00-{service.id:08d}",
+        "AJ": 1,
+        "AP": "шт",
+        "AS": float(service.price),
+        "BC": float(service.price),
+    }
+
+
+def fill_services_table(ws, services: list, start_row: int = SERVICES_ROW) -> Decimal:
+    """Заполняет таблицу услуг, возвращает итоговую сумму."""
     total = Decimal("0")
 
-    # Если услуг больше одной, нужно вставить дополнительные строки
-    if len(services) > 1:
-        # Вставляем строки после start_row
-        ws.insert_rows(start_row + 1, len(services) - 1)
-        # Копируем стиль из первой строки
-        for i in range(1, len(services)):
-            copy_row_style(ws, start_row, start_row + i)
+    # Если услуг больше одной, размножаем строку-образец
+    expand_service_rows(ws, start_row, len(services))
+    if not services:
+        # Без услуг строка-образец остаётся пустой
+        for column in SERVICE_COLUMNS:
+            ws[f"{column}{start_row}"] = None
 
     for i, service in enumerate(services):
         row = start_row + i
-
-        # № (колонка B = 2)
-        ws.cell(row=row, column=2).value = i + 1
-
-        # Наименование (колонка D = 4)
-        ws.cell(row=row, column=4).value = service.name
-
-        # Код (колонка Y = 25) - генерируем код услуги
-        ws.cell(row=row, column=25).value = f"00-{service.id:08d}"
-
-        # Кол-во (колонка AJ = 36)
-        ws.cell(row=row, column=36).value = 1
-
-        # Ед. (колонка AP = 42)
-        ws.cell(row=row, column=42).value = "шт"
-
-        # Цена (колонка AS = 45)
-        ws.cell(row=row, column=45).value = float(service.price)
-
-        # Сумма (колонка BC = 55)
-        ws.cell(row=row, column=55).value = float(service.price)
-
+        for column, value in service_row_values(i, service).items():
+            ws[f"{column}{row}"] = value
         total += service.price
 
     return total
 
 
-def update_totals(ws, total: Decimal, services_count: int, services_end_row: int):
-    """Обновляет итоговые ячейки.
+def totals_values(total: Decimal, services_count: int) -> dict:
+    """Значения итоговых ячеек в координатах шаблона.
 
-    Смещение строк зависит от количества услуг:
-    - Базовые строки: 26 (итого кол-во), 28 (Итого), 29 (НДС), 30 (Всего к оплате)
+    - Строки 26 (итого кол-во и сумма), 28 (Итого), 30 (Всего к оплате)
     - Строки 32, 33 - текстовые итоги
     """
-    # Вычисляем смещение строк
-    offset = services_end_row - 25  # 25 - базовая строка услуги
+    return {
+        "AJ26": services_count,
+        "BF26": float(total),
+        "BC28": float(total),
+        "BC30": float(total),
+        "B32": f"Всего наименований {services_count}, на сумму {format_price(total)} руб.",
+        "B33": format_price_words(total),
+    }
 
-    # Кол-во итого (строка 26 -> AJ26)
-    ws.cell(row=26 + offset, column=36).value = services_count
 
-    # Сумма итого (строка 26 -> BF26)
-    ws.cell(row=26 + offset, column=58).value = float(total)
+def update_totals(ws, total: Decimal, services_count: int, services_end_row: int):
+    """Обновляет итоговые ячейки.
 
-    # Итого (строка 28 -> BC28)
-    ws.cell(row=28 + offset, column=55).value = float(total)
+    Смещение строк зависит от количества услуг.
+    """
+    # Вычисляем смещение строк
+    offset = services_end_row - SERVICES_ROW
 
-    # Всего к оплате (строка 30 -> BC30)
-    ws.cell(row=30 + offset, column=55).value = float(total)
-
-    # Текстовые итоги (строка 32, 33)
-    ws.cell(row=32 + offset, column=2).value = (
-        f"Всего наименований {services_count}, на сумму {format_price(total)} руб."
-    )
-    ws.cell(row=33 + offset, column=2).value = format_price_words(total)
+    for ref, value in totals_values(total, services_count).items():
+        column, row = coordinate_from_string(ref)
+        ws[f"{column}{row + offset}"] = value
 
 
 def insert_payment_qr(
@@ -214,31 +280,94 @@ def insert_payment_qr(
     ws.add_image(qr_image, "BG3")
 
 
-def generate_invoice(contract: Contract) -> bytes:
+@cache
+def _invoice_template_pickle() -> bytes:
+    # Разбор xlsx с картинкой занимает ~150 мс, восстановление из pickle — единицы мс
+    return pickle.dumps(load_workbook(INVOICE_TEMPLATE_PATH))
+
+
+def load_invoice_template():
+    """Возвращает независимую копию книги-шаблона счёта"""
+    if not INVOICE_TEMPLATE_PATH.exists():
+        raise FileNotFoundError(f"Шаблон счета не найден: {INVOICE_TEMPLATE_PATH}")
+    return pickle.loads(_invoice_template_pickle())
+
+
+@cache
+def get_invoice_package() -> XlsxTemplate:
+    """Скомпилированный на уровне zip шаблон счёта"""
+    if not INVOICE_TEMPLATE_PATH.exists():
+        raise FileNotFoundError(f"Шаблон счета не найден: {INVOICE_TEMPLATE_PATH}")
+    return XlsxTemplate(
+        INVOICE_TEMPLATE_PATH,
+        slot_cells=HEADER_CELLS + TOTAL_CELLS,
+        repeat_row=SERVICES_ROW,
+        repeat_columns=SERVICE_COLUMNS,
+        images={"qr": (QR_ANCHOR, QR_SIZE, QR_SIZE)},
+    )
+
+
+def warm_up_invoice_template():
+    """Компилирует шаблон счёта для текущего режима генерации"""
+    if settings.invoice_render_mode == INVOICE_MODE_OPENPYXL:
+        load_invoice_template()
+    else:
+        get_invoice_package()
+
+
+def build_invoice_replacements(contract: Contract) -> dict:
+    """Словарь замен для простых ячеек"""
+    d = contract.date
+    return {
+        "{{contract_number}}": contract.number,
+        "{{contract_date}}": d.strftime("%d.%m.%Y"),
+        "{{invoice_date}}": format_invoice_date(d),
+        "{{client_invoice_line}}": build_client_invoice_line(contract.client),
+    }
+
+
+def generate_invoice(contract: Contract, mode: str | None = None) -> bytes:
     """Генерирует счет на оплату в формате Excel.
 
     Args:
         contract: Договор с услугами и клиентом
+        mode: INVOICE_MODE_ZIP или INVOICE_MODE_OPENPYXL (по умолчанию из настроек)
 
     Returns:
         bytes: Содержимое Excel файла
     """
-    if not INVOICE_TEMPLATE_PATH.exists():
-        raise FileNotFoundError(f"Шаблон счета не найден: {INVOICE_TEMPLATE_PATH}")
+    if (mode or settings.invoice_render_mode) == INVOICE_MODE_OPENPYXL:
+        return generate_invoice_openpyxl(contract)
+    return render_invoice_package(contract)
+
+
+def render_invoice_package(contract: Contract) -> bytes:
+    """Заполняет скомпилированный шаблон: пересобирается только лист и QR-код"""
+    package = get_invoice_package()
+    replacements = build_invoice_replacements(contract)
+
+    cells = {}
+    for ref in HEADER_CELLS:
+        text = package.cell_texts[ref]
+        cells[ref] = None if text is None else replace_placeholders(text, replacements)
 
-    wb = load_workbook(INVOICE_TEMPLATE_PATH)
+    services = contract.services
+    rows = [service_row_values(i, service) for i, service in enumerate(services)]
+    total = sum((service.price for service in services), Decimal("0"))
+    cells.update(totals_values(total, len(services)))
+
+    qr_data = build_payment_qr_data(contract.number, contract.date.strftime("%d.%m.%Y"), total)
+    qr_png = payment_qr_png(qr_data, box_size=4, border=2)
+    return package.render(cells, rows, images={"qr": qr_png})
+
+
+def generate_invoice_openpyxl(contract: Contract) -> bytes:
+    """Эталонная генерация счёта через openpyxl"""
+    wb = load_invoice_template()
     ws = wb.active
 
-    client = contract.client
     d = contract.date
-
-    # Словарь замен для простых ячеек
-    replacements = {
-        "{{contract_number}}": contract.number,
-        "{{contract_date}}": d.strftime("%d.%m.%Y"),
-        "{{invoice_date}}": format_invoice_date(d),
-        "{{client_invoice_line}}": build_client_invoice_line(client),
-    }
+    replacements = build_invoice_replacements(contract)
 
     # Заменяем плейсхолдеры в заголовке и информации о клиенте
     # B10 - заголовок счета
@@ -251,7 +380,7 @@ def generate_invoice(contract: Contract) -> bytes:
     # Заполняем таблицу услуг
     total = fill_services_table(ws, contract.services)
     services_count = len(contract.services)
-    services_end_row = 25 + services_count - 1
+    services_end_row = SERVICES_ROW + max(services_count, 1) - 1
 
     # Обновляем итоги
     update_totals(ws, total, services_count, services_end_row)
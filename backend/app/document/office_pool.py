@@ -0,0 +1,258 @@
+"""
+Пул постоянно запущенных headless-экземпляров LibreOffice для конвертации в PDF.
+
+Холодный запуск `libreoffice --convert-to` на каждый PDF стоит секунды и сотни
+мегабайт памяти. Пул держит несколько soffice, принимающих UNO-соединения на
+локальном порту. У каждого экземпляра свой профиль (-env:UserInstallation),
+поэтому экземпляры не блокируют друг друга.
+
+Экземпляр перезапускается после max_conversions конвертаций, при падении
+(проверка перед выдачей из пула) и при превышении таймаута конвертации.
+"""
+import importlib.util
+import logging
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from app.config import settings
+
+from . import office_uno
+
+logger = logging.getLogger(__name__)
+
+# uno доступен в интерпретаторе приложения — конвертируем без дочернего python
+UNO_IN_PROCESS = importlib.util.find_spec("uno") is not None
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _port_open(port: int) -> bool:
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+class OfficeInstance:
+    """Один процесс soffice со своим профилем и портом"""
+
+    def __init__(self, index: int, profile_root: Path):
+        self.index = index
+        self.profile_dir = profile_root / f"{os.getpid()}-{index}"
+        self.port = 0
+        self.process: subprocess.Popen | None = None
+        self.conversions = 0
+        self.restarts = 0
+        # Итог последней проверки (запуск, healthy(), остановка) — для метрик без обращения к порту
+        self.alive = False
+
+    def start(self):
+        self.port = _free_port()
+        self.conversions = 0
+        self.process = subprocess.Popen(
+            [
+                settings.office_binary,
+                "--headless", "--invisible", "--nologo", "--nodefault",
+                "--norestore", "--nolockcheck", "--nofirststartwizard",
+                f"-env:UserInstallation={self.profile_dir.as_uri()}",
+                f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+        deadline = time.monotonic() + settings.office_start_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(
+                    f"LibreOffice instance {self.index} exited with code {self.process.returncode}"
+                )
+            if _port_open(self.port):
+                self.alive = True
+                return
+            time.sleep(0.1)
+        self.kill()
+        raise TimeoutError(f"LibreOffice instance {self.index} did not start in time")
+
+    def healthy(self) -> bool:
+        self.alive = self.process is not None and self.process.poll() is None and _port_open(self.port)
+        return self.alive
+
+    def kill(self):
+        self.alive = False
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def restart(self, reset_profile: bool = False):
+        self.kill()
+        # После падения профиль может быть повреждён — создаём заново
+        if reset_profile:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+        self.restarts += 1
+        self.start()
+
+    def stop(self):
+        self.kill()
+        self.process = None
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def convert(self, source: Path, target: Path, timeout: float):
+        """Конвертирует файл; по таймауту soffice убивается, и UNO-вызов обрывается"""
+        watchdog = threading.Timer(timeout, self.kill)
+        watchdog.start()
+        try:
+            if UNO_IN_PROCESS:
+                office_uno.convert(self.port, str(source), str(target))
+            else:
+                result = subprocess.run(
+                    [settings.office_python, office_uno.__file__, str(self.port), str(source), str(target)],
+                    capture_output=True, text=True, timeout=timeout,
+                )
+                if result.returncode != 0:
+                    raise RuntimeError(f"LibreOffice conversion failed: {result.stderr}")
+        except subprocess.TimeoutExpired:
+            raise TimeoutError(f"PDF conversion exceeded {timeout} s") from None
+        except Exception:
+            if not watchdog.is_alive():
+                raise TimeoutError(f"PDF conversion exceeded {timeout} s") from None
+            raise
+        finally:
+            watchdog.cancel()
+        self.conversions += 1
+
+
+class OfficePool:
+    """Пул экземпляров LibreOffice: свободные экземпляры лежат в очереди"""
+
+    def __init__(self, size: int, max_conversions: int, timeout: float, profile_dir: str = ""):
+        self.size = size
+        self.max_conversions = max_conversions
+        self.timeout = timeout
+        self.profile_root = Path(profile_dir or tempfile.gettempdir()) / "contracts-office"
+        self._instances: list[OfficeInstance] = []
+        self._idle: queue.Queue[OfficeInstance] = queue.Queue()
+        self._lock = threading.Lock()
+        self.conversions = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def start(self):
+        """Запускает экземпляры; ошибки запуска не фатальны — экземпляр поднимется при выдаче"""
+        with self._lock:
+            if self._instances:
+                return
+            self.profile_root.mkdir(parents=True, exist_ok=True)
+            self._instances = [OfficeInstance(i, self.profile_root) for i in range(self.size)]
+            for instance in self._instances:
+                try:
+                    instance.start()
+                except (OSError, RuntimeError, TimeoutError):
+                    logger.exception("Failed to start LibreOffice instance %s", instance.index)
+                self._idle.put(instance)
+
+    def stop(self):
+        with self._lock:
+            for instance in self._instances:
+                instance.stop()
+            self._instances = []
+            self._idle = queue.Queue()
+
+    def convert(self, data: bytes, filename: str) -> bytes:
+        """Конвертирует документ в PDF на свободном экземпляре пула"""
+        self.start()
+        try:
+            instance = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("No free LibreOffice instance") from None
+
+        try:
+            if not instance.healthy():
+                logger.warning("LibreOffice instance %s is down, restarting", instance.index)
+                try:
+                    self._restart(instance, reset_profile=True)
+                except (OSError, RuntimeError, TimeoutError) as e:
+                    # Конвертация не начиналась: это не таймаут конвертации и не повод
+                    # перезапускать экземпляр ещё раз — следующая выдача попробует снова
+                    self.failures += 1
+                    raise RuntimeError(f"LibreOffice instance {instance.index} failed to restart") from e
+
+            try:
+                with tempfile.TemporaryDirectory() as tmpdir:
+                    source = Path(tmpdir) / filename
+                    target = source.with_suffix(".pdf")
+                    source.write_bytes(data)
+                    instance.convert(source, target, self.timeout)
+                    pdf = target.read_bytes()
+            except TimeoutError:
+                self.timeouts += 1
+                self._restart(instance, reset_profile=True, suppress=True)
+                raise
+            except Exception:
+                self.failures += 1
+                if not instance.healthy():
+                    self._restart(instance, reset_profile=True, suppress=True)
+                raise
+
+            self.conversions += 1
+            if instance.conversions >= self.max_conversions:
+                self._restart(instance, suppress=True)
+            return pdf
+        finally:
+            self._idle.put(instance)
+
+    def _restart(self, instance: OfficeInstance, reset_profile: bool = False, suppress: bool = False):
+        self.restarts += 1
+        try:
+            instance.restart(reset_profile=reset_profile)
+        except (OSError, RuntimeError, TimeoutError):
+            if not suppress:
+                raise
+            logger.exception("Failed to restart LibreOffice instance %s", instance.index)
+
+    def stats(self) -> dict:
+        """Счётчики пула; не блокирует: живость — по последней проверке и poll() процесса"""
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "alive": sum(
+                1 for instance in self._instances if instance.alive and instance.process.poll() is None
+            ),
+            "uno_in_process": UNO_IN_PROCESS,
+            "conversions": self.conversions,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+        }
+
+
+office_pool = OfficePool(
+    size=settings.office_pool_size,
+    max_conversions=settings.office_max_conversions,
+    timeout=settings.office_convert_timeout,
+    profile_dir=settings.office_profile_dir,
+)
@@ -0,0 +1,61 @@
+"""
+Конвертация в PDF через UNO в уже запущенном soffice.
+
+Модуль не зависит от приложения: если интерпретатор приложения не видит
+пакет uno (python3-uno ставится для системного python), пул запускает этот
+файл системным python как скрипт:
+
+    python3 office_uno.py <port> <source> <target>
+"""
+import sys
+from pathlib import Path
+
+# Фильтры экспорта в PDF по расширению исходного файла
+PDF_FILTERS = {
+    ".docx": "writer_pdf_Export",
+    ".xlsx": "calc_pdf_Export",
+}
+
+
+def _properties(**values):
+    from com.sun.star.beans import PropertyValue
+
+    properties = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        properties.append(prop)
+    return tuple(properties)
+
+
+def convert(port: int, source: str, target: str):
+    """Открывает source в soffice на порту port и сохраняет PDF в target"""
+    import uno
+
+    local = uno.getComponentContext()
+    resolver = local.ServiceManager.createInstanceWithContext(
+        "com.sun.star.bridge.UnoUrlResolver", local,
+    )
+    context = resolver.resolve(
+        f"uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"
+    )
+    desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    document = desktop.loadComponentFromURL(
+        uno.systemPathToFileUrl(str(Path(source).resolve())), "_blank", 0,
+        _properties(Hidden=True, ReadOnly=True),
+    )
+    if document is None:
+        raise RuntimeError(f"LibreOffice could not open {source}")
+    try:
+        document.storeToURL(
+            uno.systemPathToFileUrl(str(Path(target).resolve())),
+            _properties(FilterName=PDF_FILTERS[Path(source).suffix.lower()]),
+        )
+    finally:
+        document.close(True)
+
+
+if __name__ == "__main__":
+    convert(int(sys.argv[1]), sys.argv[2], sys.argv[3])
@@ -2,41 +2,28 @@ import subprocess
 import tempfile
 from pathlib import Path
 
+from app.config import settings
 
-def generate_pdf_document(contract) -> bytes:
-    """Generate PDF by converting Word document via LibreOffice."""
-    from .generator import generate_contract_document
-
-    docx_bytes = generate_contract_document(contract)
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        docx_path = Path(tmpdir) / "contract.docx"
-        pdf_path = Path(tmpdir) / "contract.pdf"
+from .office_pool import office_pool
 
-        docx_path.write_bytes(docx_bytes)
 
-        subprocess.run([
-            "libreoffice", "--headless", "--convert-to", "pdf",
-            "--outdir", tmpdir, str(docx_path)
-        ], check=True, capture_output=True)
-
-        return pdf_path.read_bytes()
-
-
-def generate_invoice_pdf(contract) -> bytes:
-    """Generate PDF by converting Excel invoice via LibreOffice."""
-    from .invoice_generator import generate_invoice
+def convert_to_pdf(data: bytes, filename: str) -> bytes:
+    """Convert an office document (docx/xlsx) to PDF via the LibreOffice pool."""
+    if office_pool.enabled:
+        return office_pool.convert(data, filename)
+    return convert_to_pdf_cold(data, filename)
 
-    xlsx_bytes = generate_invoice(contract)
 
+def convert_to_pdf_cold(data: bytes, filename: str) -> bytes:
+    """Convert by starting a separate LibreOffice process for this document."""
     with tempfile.TemporaryDirectory() as tmpdir:
-        xlsx_path = Path(tmpdir) / "invoice.xlsx"
+        source_path = Path(tmpdir) / filename
 
-        xlsx_path.write_bytes(xlsx_bytes)
+        source_path.write_bytes(data)
 
         result = subprocess.run([
-            "libreoffice", "--headless", "--convert-to", "pdf",
-            "--outdir", tmpdir, str(xlsx_path)
+            settings.office_binary, "--headless", "--convert-to", "pdf",
+            "--outdir", tmpdir, str(source_path)
         ], capture_output=True, text=True)
 
         if result.returncode != 0:
@@ -52,3 +39,17 @@ def generate_invoice_pdf(contract) -> bytes:
             )
 
         return pdf_files[0].read_bytes()
+
+
+def generate_pdf_document(contract) -> bytes:
+    """Generate PDF by converting Word document via LibreOffice."""
+    from .generator import generate_contract_document
+
+    return convert_to_pdf(generate_contract_document(contract), "contract.docx")
+
+
+def generate_invoice_pdf(contract) -> bytes:
+    """Generate PDF by converting Excel invoice via LibreOffice."""
+    from .invoice_generator import generate_invoice
+
+    return convert_to_pdf(generate_invoice(contract), "invoice.xlsx")
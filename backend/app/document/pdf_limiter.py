@@ -0,0 +1,101 @@
+"""
+Ограничение параллельных конвертаций в PDF.
+
+Конвертация блокирующая (LibreOffice), поэтому выполняется в отдельном пуле
+потоков, а не в цикле событий. Одновременно идёт не больше concurrency
+конвертаций, остальные ждут в очереди длиной до max_waiting. Когда очередь
+заполнена, запрос сразу отклоняется (PdfQueueFull -> 503 с Retry-After).
+"""
+import asyncio
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+
+class PdfQueueFull(Exception):
+    """Очередь конвертаций заполнена"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"PDF queue is full, retry after {retry_after} s")
+        self.retry_after = retry_after
+
+
+class PdfLimiter:
+    """Семафор на число конвертаций и ограниченная очередь ожидания"""
+
+    def __init__(self, concurrency: int, max_waiting: int, retry_after: int):
+        self.concurrency = concurrency
+        self.max_waiting = max_waiting
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="pdf")
+        self.waiting = 0
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    def _retry_after(self) -> int:
+        """Оценка времени до освобождения места: средняя конвертация x длина очереди"""
+        if not self.completed:
+            return self.retry_after
+        average = self.run_seconds_total / self.completed
+        return max(1, math.ceil(average * (self.waiting + 1) / self.concurrency))
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Выполняет func(*args) в пуле потоков, дождавшись своей очереди"""
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise PdfQueueFull(self._retry_after())
+
+        self.waiting += 1
+        queued_at = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        wait = started_at - queued_at
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.active -= 1
+            self.completed += 1
+            self.run_seconds_total += time.perf_counter() - started_at
+            self._semaphore.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        started = self.completed + self.active
+        return {
+            "concurrency": self.concurrency,
+            "max_waiting": self.max_waiting,
+            "waiting": self.waiting,
+            "active": self.active,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_avg": self.wait_seconds_total / started if started else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+            "run_seconds_avg": self.run_seconds_total / self.completed if self.completed else 0.0,
+        }
+
+
+pdf_limiter = PdfLimiter(
+    concurrency=settings.pdf_concurrency,
+    max_waiting=settings.pdf_queue_size,
+    retry_after=settings.pdf_retry_after,
+)
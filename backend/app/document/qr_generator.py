@@ -1,14 +1,39 @@
 """
 Генератор QR-кодов для оплаты по ГОСТ Р 56042-2014.
+
+Реквизиты исполнителя не меняются, поэтому постоянная часть строки данных
+собирается один раз при импорте. Матрица QR-кода и готовый PNG кэшируются по
+строке данных: повторное скачивание счёта (тот же номер, дата и сумма) не
+кодирует QR-код заново. PNG пишется напрямую в формате 1 бит на пиксель,
+без построения изображения PIL.
 """
+import struct
+import zlib
+from functools import lru_cache
 from io import BytesIO
 from decimal import Decimal
 
 import qrcode
 from qrcode.constants import ERROR_CORRECT_M
 
+from app.config import settings
+
 from .constants import EXECUTOR_DATA
 
+# Постоянная часть строки данных: версия, кодировка и реквизиты получателя
+PAYEE_FIELDS = "|".join([
+    "ST00012",  # Версия 0001 + кодировка UTF-8
+    "Name=ИНДИВИДУАЛЬНЫЙ ПРЕДПРИНИМАТЕЛЬ ЗИНЗИРОВ ДМИТРИЙ БОРИСОВИЧ",
+    f"PersonalAcc={EXECUTOR_DATA['settlement_account']}",
+    f"BankName={EXECUTOR_DATA['bank_name']}",
+    f"BIC={EXECUTOR_DATA['bank_bik']}",
+    f"CorrespAcc={EXECUTOR_DATA['bank_corr']}",
+    f"PayeeINN={EXECUTOR_DATA['inn']}",
+    "KPP=0",  # 0 для ИП
+])
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
 
 def build_payment_qr_data(
     invoice_number: str,
@@ -32,21 +57,55 @@ def build_payment_qr_data(
     # Формируем назначение платежа
     purpose = f"Оплата по счету №{invoice_number} от {invoice_date}"
 
-    # Собираем данные в формате ГОСТ
-    fields = [
-        "ST00012",  # Версия 0001 + кодировка UTF-8
-        f"Name=ИНДИВИДУАЛЬНЫЙ ПРЕДПРИНИМАТЕЛЬ ЗИНЗИРОВ ДМИТРИЙ БОРИСОВИЧ",
-        f"PersonalAcc={EXECUTOR_DATA['settlement_account']}",
-        f"BankName={EXECUTOR_DATA['bank_name']}",
-        f"BIC={EXECUTOR_DATA['bank_bik']}",
-        f"CorrespAcc={EXECUTOR_DATA['bank_corr']}",
-        f"PayeeINN={EXECUTOR_DATA['inn']}",
-        "KPP=0",  # 0 для ИП
-        f"Purpose={purpose}",
-        f"Sum={amount_kopecks}",
-    ]
+    return f"{PAYEE_FIELDS}|Purpose={purpose}|Sum={amount_kopecks}"
+
+
+@lru_cache(maxsize=settings.qr_cache_size)
+def qr_matrix(data: str) -> tuple[tuple[bool, ...], ...]:
+    """Матрица модулей QR-кода без рамки (True - тёмный модуль)"""
+    qr = qrcode.QRCode(
+        version=None,  # Автоматический выбор версии
+        error_correction=ERROR_CORRECT_M,  # 15% коррекция ошибок
+        border=0,
+    )
+    # Передаём строку напрямую - qrcode автоматически закодирует в UTF-8
+    qr.add_data(data)
+    qr.make(fit=True)
+    return tuple(tuple(row) for row in qr.get_matrix())
+
+
+def _png_chunk(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
 
-    return "|".join(fields)
+
+def encode_qr_png(matrix: tuple[tuple[bool, ...], ...], box_size: int, border: int) -> bytes:
+    """Кодирует матрицу в PNG: оттенки серого, 1 бит на пиксель (0 - чёрный)"""
+    modules = len(matrix) + 2 * border
+    size = modules * box_size
+    padding = -size % 8
+    quiet = "1" * (border * box_size)
+
+    blank = b"\x00" + int("1" * size + "0" * padding, 2).to_bytes((size + padding) // 8, "big")
+    lines = [blank] * (border * box_size)
+    for row in matrix:
+        bits = "".join("0" * box_size if dark else "1" * box_size for dark in row)
+        line = b"\x00" + int(quiet + bits + quiet + "0" * padding, 2).to_bytes((size + padding) // 8, "big")
+        lines.extend([line] * box_size)
+    lines.extend([blank] * (border * box_size))
+
+    header = struct.pack(">IIBBBBB", size, size, 1, 0, 0, 0, 0)
+    return b"".join([
+        _PNG_SIGNATURE,
+        _png_chunk(b"IHDR", header),
+        _png_chunk(b"IDAT", zlib.compress(b"".join(lines), 9)),
+        _png_chunk(b"IEND", b""),
+    ])
+
+
+@lru_cache(maxsize=settings.qr_cache_size)
+def payment_qr_png(data: str, box_size: int = 4, border: int = 2) -> bytes:
+    """PNG QR-кода для строки данных (кэшируется)"""
+    return encode_qr_png(qr_matrix(data), box_size, border)
 
 
 def generate_payment_qr_image(
@@ -69,26 +128,13 @@ def generate_payment_qr_image(
     Returns:
         BytesIO с PNG изображением QR-кода
     """
-    # Формируем данные
-    qr_data = build_payment_qr_data(invoice_number, invoice_date, amount)
-
-    # Создаем QR-код
-    qr = qrcode.QRCode(
-        version=None,  # Автоматический выбор версии
-        error_correction=ERROR_CORRECT_M,  # 15% коррекция ошибок
-        box_size=box_size,
-        border=border,
-    )
-    # Передаём строку напрямую - qrcode автоматически закодирует в UTF-8
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-
-    # Генерируем изображение
-    img = qr.make_image(fill_color="black", back_color="white")
+    data = build_payment_qr_data(invoice_number, invoice_date, amount)
+    return BytesIO(payment_qr_png(data, box_size, border))
 
-    # Сохраняем в BytesIO
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
 
-    return buffer
+def qr_cache_stats() -> dict:
+    matrix, png = qr_matrix.cache_info(), payment_qr_png.cache_info()
+    return {
+        "matrix": {"hits": matrix.hits, "misses": matrix.misses, "entries": matrix.currsize},
+        "png": {"hits": png.hits, "misses": png.misses, "entries": png.currsize},
+    }
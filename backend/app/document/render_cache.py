@@ -0,0 +1,190 @@
+"""
+Кэш готовых документов (DOCX/PDF договора, XLSX/PDF счёта).
+
+Ключ — SHA-256 снимка договора (поля договора, клиента, банка, услуги по
+порядку, секции шаблона), версии генератора, формата и режима рендеринга
+(slots/docx для договора, zip/openpyxl для счёта). Любое изменение данных
+даёт новый ключ, поэтому инвалидация не нужна: старые записи вытесняются LRU.
+
+Два уровня: LRU в памяти с бюджетом по байтам и необязательный каталог на диске
+(переживает перезапуск и общий для нескольких воркеров uvicorn).
+"""
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+
+from app.config import settings
+
+from .snapshot import ContractSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Увеличивать при любом изменении генераторов, влияющем на результат
+GENERATOR_VERSION = "4"
+
+
+def render_mode(fmt: str) -> str:
+    """Активный режим рендеринга для формата: разные режимы дают разные байты"""
+    if fmt.startswith("contract-"):
+        return settings.contract_render_mode
+    return settings.invoice_render_mode
+
+
+def render_cache_key(snapshot: ContractSnapshot, fmt: str) -> str:
+    """Ключ кэша: digest снимка договора, версии генератора, формата и режима"""
+    return snapshot.digest(GENERATOR_VERSION, fmt, render_mode(fmt))
+
+
+class DiskTier:
+    """Файлы <dir>/<ab>/<key> с ограничением общего размера (вытесняются самые старые)"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.bytes = sum(path.stat().st_size for path in self._files())
+        self.evictions = 0
+        self._lock = Lock()
+
+    def _files(self) -> list[Path]:
+        return [path for path in self.directory.glob("*/*") if not path.name.startswith(".")]
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def read(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            # mtime служит меткой последнего обращения для вытеснения
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def write(self, key: str, data: bytes):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Атомарная запись: читатели из других процессов не видят недописанный файл
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self.bytes += len(data)
+            if self.max_bytes and self.bytes > self.max_bytes:
+                self._trim()
+
+    def _trim(self):
+        entries = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        self.bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self.bytes <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self.bytes -= size
+            self.evictions += 1
+
+
+class RenderCache:
+    """LRU готовых документов в памяти с необязательным дисковым уровнем"""
+
+    def __init__(self, max_bytes: int, disk_dir: str = "", disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk = DiskTier(disk_dir, disk_max_bytes) if disk_dir else None
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+
+        if self.disk is not None:
+            data = self.disk.read(key)
+            if data is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(key, data)
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            self._store(key, data)
+        if self.disk is not None:
+            try:
+                self.disk.write(key, data)
+            except OSError:
+                logger.exception("Render cache: failed to write %s to disk", key)
+
+    def _store(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = data
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+        if self.disk is not None:
+            stats["disk"] = {
+                "directory": str(self.disk.directory),
+                "bytes": self.disk.bytes,
+                "max_bytes": self.disk.max_bytes,
+                "evictions": self.disk.evictions,
+            }
+        return stats
+
+
+render_cache = RenderCache(
+    max_bytes=settings.render_cache_max_bytes,
+    disk_dir=settings.render_cache_dir,
+    disk_max_bytes=settings.render_cache_disk_max_bytes,
+)
@@ -0,0 +1,170 @@
+"""
+Пул дочерних процессов для CPU-ёмкого рендеринга (python-docx, openpyxl).
+
+Обработчики запросов не должны строить документы в потоке цикла событий, а
+потоки не помогают из-за GIL. Задачи получают ContractSnapshot (pickle) и
+возвращают байты документа. Каждый дочерний процесс при запуске прогревает
+кэш шаблона договора и книгу-шаблон счёта.
+
+Кэши шаблонов и QR-кодов живут в дочерних процессах, поэтому каждый результат
+задачи возвращается вместе со счётчиками кэшей процесса; cache_stats()
+суммирует последние счётчики всех процессов.
+
+При render_workers = 0 рендеринг выполняется в текущем процессе.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Callable, TypeVar
+
+from app.config import settings
+
+from .invoice_generator import warm_up_invoice_template
+from .qr_generator import qr_cache_stats
+from .template_cache import template_cache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def warm_up_worker():
+    """Инициализатор дочернего процесса: компилирует встроенный шаблон и книгу счёта"""
+    template_cache.get(None)
+    warm_up_invoice_template()
+
+
+def _ping() -> bool:
+    return True
+
+
+def worker_stats() -> dict:
+    """Счётчики кэшей рендеринга текущего процесса"""
+    return {"template_cache": template_cache.stats(), "qr_cache": qr_cache_stats()}
+
+
+def _call(func: Callable[..., T], *args) -> tuple[int, dict, T]:
+    """Выполняет задачу в дочернем процессе и прикладывает счётчики его кэшей"""
+    result = func(*args)
+    return os.getpid(), worker_stats(), result
+
+
+def _sum_stats(items: list[dict]) -> dict:
+    """Поэлементно складывает вложенные словари счётчиков.
+
+    Лимиты (max_*) у каждого процесса свои и одинаковые, они не суммируются.
+    """
+    total: dict = {}
+    for item in items:
+        for name, value in item.items():
+            if isinstance(value, dict):
+                total[name] = _sum_stats([total.get(name, {}), value])
+            elif name.startswith("max_"):
+                total[name] = value
+            else:
+                total[name] = total.get(name, 0) + value
+    return total
+
+
+class RenderPool:
+    """ProcessPoolExecutor с прогревом дочерних процессов и пересозданием после сбоя"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = Lock()
+        self._worker_stats: dict[int, dict] = {}
+        self.tasks = 0
+        self.restarts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        """Запускает дочерние процессы и ждёт окончания их прогрева"""
+        with self._lock:
+            if self.workers <= 0 or self._executor is not None:
+                return
+            # spawn: родитель многопоточный (пулы PDF/LibreOffice), fork небезопасен
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_up_worker,
+            )
+            executor = self._executor
+        for future in [executor.submit(_call, _ping) for _ in range(self.workers)]:
+            self._unwrap(future.result())
+
+    def stop(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._worker_stats.clear()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self._worker_stats.clear()
+            self.restarts += 1
+        logger.error("Render pool is broken, restarting worker processes")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def _unwrap(self, reply: tuple[int, dict, T]) -> T:
+        pid, stats, result = reply
+        with self._lock:
+            self._worker_stats[pid] = stats
+        return result
+
+    def run(self, func: Callable[..., T], *args) -> T:
+        """Выполняет func(*args) в дочернем процессе (блокирует вызывающий поток)"""
+        executor = self._executor
+        if executor is None:
+            return func(*args)
+        self.tasks += 1
+        try:
+            return self._unwrap(executor.submit(_call, func, *args).result())
+        except BrokenProcessPool:
+            # Задача, уронившая процесс, не повторяется: пул пересоздаётся для следующих
+            self._restart(executor)
+            raise
+
+    async def run_async(self, func: Callable[..., T], *args) -> T:
+        """Выполняет func(*args) в дочернем процессе, не блокируя цикл событий"""
+        executor = self._executor
+        if executor is None:
+            return await asyncio.to_thread(func, *args)
+        self.tasks += 1
+        loop = asyncio.get_running_loop()
+        try:
+            return self._unwrap(await loop.run_in_executor(executor, _call, func, *args))
+        except BrokenProcessPool:
+            await asyncio.to_thread(self._restart, executor)
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers if self.enabled else 0,
+            "tasks": self.tasks,
+            "restarts": self.restarts,
+        }
+
+    def cache_stats(self) -> dict:
+        """Счётчики кэшей процессов, где выполняется рендеринг: сумма по
+        дочерним процессам (лимиты — на один процесс) или счётчики текущего
+        процесса без пула"""
+        if not self.enabled:
+            return worker_stats()
+        with self._lock:
+            return _sum_stats(list(self._worker_stats.values()))
+
+
+render_pool = RenderPool(workers=settings.render_workers)
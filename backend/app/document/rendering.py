@@ -0,0 +1,99 @@
+"""
+Рендеринг документов договора через кэш готовых файлов.
+
+Генераторы получают ContractSnapshot вместо ORM-объекта. DOCX и XLSX строятся
+в дочерних процессах render_pool, PDF договора и счёта конвертируется из
+закэшированного DOCX/XLSX, поэтому повторная конвертация не требует
+повторного заполнения шаблона.
+
+Массовая выгрузка рендерит с store=False: она читает кэш, но не пишет в него,
+чтобы одна выгрузка не вытеснила документы интерактивных скачиваний.
+"""
+import asyncio
+
+from .generator import generate_contract_document
+from .invoice_generator import generate_invoice
+from .pdf_generator import convert_to_pdf
+from .pdf_limiter import PdfQueueFull, pdf_limiter
+from .render_cache import render_cache, render_cache_key
+from .render_pool import render_pool
+from .snapshot import ContractSnapshot
+
+# Форматы документов (часть ключа кэша)
+FORMAT_CONTRACT_DOCX = "contract-docx"
+FORMAT_CONTRACT_PDF = "contract-pdf"
+FORMAT_INVOICE_XLSX = "invoice-xlsx"
+FORMAT_INVOICE_PDF = "invoice-pdf"
+
+GENERATORS = {
+    FORMAT_CONTRACT_DOCX: generate_contract_document,
+    FORMAT_INVOICE_XLSX: generate_invoice,
+}
+
+# PDF-формат -> (исходный формат, имя файла для LibreOffice)
+PDF_SOURCES = {
+    FORMAT_CONTRACT_PDF: (FORMAT_CONTRACT_DOCX, "contract.docx"),
+    FORMAT_INVOICE_PDF: (FORMAT_INVOICE_XLSX, "invoice.xlsx"),
+}
+
+FORMATS = (*GENERATORS, *PDF_SOURCES)
+
+MEDIA_TYPES = {
+    FORMAT_CONTRACT_DOCX: "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    FORMAT_CONTRACT_PDF: "application/pdf",
+    FORMAT_INVOICE_XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    FORMAT_INVOICE_PDF: "application/pdf",
+}
+
+
+def generate_format(snapshot: ContractSnapshot, fmt: str) -> bytes:
+    """Строит DOCX/XLSX без кэша (выполняется в дочернем процессе)"""
+    return GENERATORS[fmt](snapshot)
+
+
+def _render_and_store(snapshot: ContractSnapshot, fmt: str, key: str, store: bool = True) -> bytes:
+    if fmt in PDF_SOURCES:
+        source_fmt, filename = PDF_SOURCES[fmt]
+        data = convert_to_pdf(render_document(snapshot, source_fmt, store), filename)
+    else:
+        data = render_pool.run(generate_format, snapshot, fmt)
+    if store:
+        render_cache.put(key, data)
+    return data
+
+
+def render_document(snapshot: ContractSnapshot, fmt: str, store: bool = True) -> bytes:
+    """Возвращает документ из кэша или генерирует и кладёт его в кэш
+    (при store=False готовый документ в кэш не кладётся)"""
+    key = render_cache_key(snapshot, fmt)
+    data = render_cache.get(key)
+    if data is None:
+        data = _render_and_store(snapshot, fmt, key, store)
+    return data
+
+
+async def render_document_async(snapshot: ContractSnapshot, fmt: str, store: bool = True) -> bytes:
+    """То же для обработчиков запросов: PDF конвертируется в очереди pdf_limiter,
+    DOCX/XLSX строятся в пуле процессов, не блокируя цикл событий.
+
+    Может выбросить PdfQueueFull, если очередь конвертаций заполнена.
+    """
+    key = render_cache_key(snapshot, fmt)
+    data = render_cache.get(key)
+    if data is not None:
+        return data
+    if fmt in PDF_SOURCES:
+        return await pdf_limiter.run(_render_and_store, snapshot, fmt, key, store)
+    data = await render_pool.run_async(generate_format, snapshot, fmt)
+    if store:
+        render_cache.put(key, data)
+    return data
+
+
+async def render_document_queued(snapshot: ContractSnapshot, fmt: str, store: bool = True) -> bytes:
+    """То же для фоновой работы: при заполненной очереди PDF ждёт, а не отказывает"""
+    while True:
+        try:
+            return await render_document_async(snapshot, fmt, store)
+        except PdfQueueFull as e:
+            await asyncio.sleep(e.retry_after)
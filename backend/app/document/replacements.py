@@ -1,4 +1,9 @@
+import re
+from bisect import bisect_right
+from collections.abc import Mapping
 from decimal import Decimal
+from functools import cache
+from itertools import accumulate
 
 from app.models import Contract, CLIENT_TYPES
 from .constants import MONTHS_RU, EXECUTOR_DATA
@@ -45,6 +50,80 @@ def replace_in_paragraph(paragraph, replacements: dict):
                 run.text = run.text.replace(key, str(value or ""))
 
 
+# Любой плейсхолдер вида {{key}}
+PLACEHOLDER_RE = re.compile(r"\{\{[^{}]+\}\}")
+
+
+def substitute_paragraph(paragraph, replacements: dict) -> set[str]:
+    """Заменяет все метки в параграфе за один проход.
+
+    Текст параграфа собирается один раз и разбирается одним регулярным
+    выражением. Если известная метка разбита на несколько runs, runs
+    объединяются в первый (как в replace_in_paragraph).
+
+    Returns:
+        Множество меток, для которых нет значения в replacements
+    """
+    runs = paragraph.runs
+    texts = [run.text for run in runs]
+    full_text = "".join(texts)
+    if "{{" not in full_text:
+        return set()
+
+    unknown = set()
+    split_found = False
+    run_ends = list(accumulate(len(text) for text in texts))
+    for match in PLACEHOLDER_RE.finditer(full_text):
+        key = match.group(0)
+        if key not in replacements:
+            unknown.add(key)
+            continue
+        run_index = bisect_right(run_ends, match.start())
+        if match.end() > run_ends[run_index]:
+            split_found = True
+
+    if split_found:
+        # Метка разбита на несколько runs - объединяем их
+        runs[0].text = full_text
+        for run in runs[1:]:
+            run._element.getparent().remove(run._element)
+        runs = runs[:1]
+        texts = [full_text]
+
+    def resolve(match) -> str:
+        key = match.group(0)
+        if key not in replacements:
+            return key
+        return str(replacements[key] or "")
+
+    for run, text in zip(runs, texts):
+        if "{{" not in text:
+            continue
+        new_text = PLACEHOLDER_RE.sub(resolve, text)
+        if new_text != text:
+            run.text = new_text
+
+    return unknown
+
+
+def substitute_document(doc, replacements: dict) -> set[str]:
+    """Заменяет метки во всех параграфах документа и ячейках таблиц.
+
+    Returns:
+        Множество неизвестных меток, оставшихся в документе
+    """
+    unknown = set()
+    for para in doc.paragraphs:
+        unknown |= substitute_paragraph(para, replacements)
+
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for para in cell.paragraphs:
+                    unknown |= substitute_paragraph(para, replacements)
+    return unknown
+
+
 def get_full_name(client) -> str:
     """Возвращает полное ФИО"""
     parts = [client.last_name, client.first_name]
@@ -162,6 +241,7 @@ def build_requisites(client, bank) -> str:
     return main
 
 
+@cache
 def build_executor_requisites_main() -> str:
     """Формирует основные реквизиты Исполнителя (без банковских)"""
     return f"""ИНДИВИДУАЛЬНЫЙ ПРЕДПРИНИМАТЕЛЬ {EXECUTOR_DATA['name'].upper()}
@@ -172,6 +252,7 @@ E-mail: {EXECUTOR_DATA['email']}
 Тел.: {EXECUTOR_DATA['phone']}"""
 
 
+@cache
 def build_executor_requisites_bank() -> str:
     """Формирует банковские реквизиты Исполнителя"""
     return f"""Р/С: {EXECUTOR_DATA['settlement_account']}
@@ -180,6 +261,7 @@ def build_executor_requisites_bank() -> str:
 К/С: {EXECUTOR_DATA['bank_corr']}"""
 
 
+@cache
 def build_executor_requisites() -> str:
     """Формирует полные реквизиты Исполнителя (для обратной совместимости)"""
     main = build_executor_requisites_main()
@@ -187,57 +269,96 @@ def build_executor_requisites() -> str:
     return f"{main}\n\nБанковские реквизиты:\n{bank}"
 
 
-def build_replacements(contract: Contract, total: Decimal = Decimal("0")) -> dict:
-    """Создаёт словарь замен метка -> значение"""
-    client = contract.client
-    bank = client.bank
-    d = contract.date
-
-    return {
-        "{{day}}": str(d.day),
-        "{{date_text}}": f"{MONTHS_RU[d.month]} {d.year}",
-        "{{client_type}}": client.client_type,
-        "{{client_name}}": client.name,
-        "{{client_company_name}}": client.company_name or "",
-        "{{client_short_name}}": client.short_name,
-        "{{client_full_name}}": get_full_name(client),
-        "{{client_first_name}}": client.first_name,
-        "{{client_last_name}}": client.last_name,
-        "{{client_patronymic}}": client.patronymic,
-        "{{client_ogrn}}": client.ogrn,
-        "{{client_ogrnip}}": client.ogrn,  # для обратной совместимости
-        "{{client_kpp}}": client.kpp,
-        "{{client_address}}": client.address,
-        "{{client_inn}}": client.inn,
-        "{{client_email}}": client.email,
-        "{{client_phone}}": client.phone,
-        "{{client_account}}": client.settlement_account,
-        "{{client_position}}": client.position,
-        "{{client_acting_basis}}": client.acting_basis,
-        "{{client_header}}": build_client_header(client),
-        # Паспортные данные для физлиц
-        "{{client_passport_series}}": client.passport_series or "",
-        "{{client_passport_number}}": client.passport_number or "",
-        "{{client_passport_issued_by}}": client.passport_issued_by or "",
-        "{{client_passport_issued_date}}": (
-            client.passport_issued_date.strftime("%d.%m.%Y")
-            if client.passport_issued_date else ""
-        ),
-        # Банковские данные
-        "{{bank_name}}": bank.name if bank else "",
-        "{{bank_bik}}": bank.bik if bank else "",
-        "{{bank_corr}}": bank.correspondent_account if bank else "",
-        # Подписант и контракт
-        "{{signatory}}": get_short_name(client),
-        "{{contract_number}}": contract.number,
-        "{{contract_date}}": d.strftime("%d.%m.%Y"),
-        # Реквизиты (полные - для обратной совместимости)
-        "{{requisites}}": build_requisites(client, bank),
-        "{{executor_requisites}}": build_executor_requisites(),
-        # Реквизиты (разбитые на части)
-        "{{requisites_main}}": build_requisites_main(client),
-        "{{requisites_bank}}": build_requisites_bank(client, bank),
-        "{{executor_main}}": build_executor_requisites_main(),
-        "{{executor_bank}}": build_executor_requisites_bank(),
-        "{{total_price}}": f"{total:,.0f} руб. ({number_to_words_ru(total)})",
-    }
+def _bank_attr(contract: Contract, attr: str) -> str:
+    bank = contract.client.bank
+    return getattr(bank, attr) if bank else ""
+
+
+def _passport_issued_date(contract: Contract) -> str:
+    issued = contract.client.passport_issued_date
+    return issued.strftime("%d.%m.%Y") if issued else ""
+
+
+def _total_price(total: Decimal) -> str:
+    return f"{total:,.0f} руб. ({number_to_words_ru(total)})"
+
+
+# Метка -> функция (договор, итоговая сумма) -> значение
+REPLACEMENT_RESOLVERS = {
+    "{{day}}": lambda c, total: str(c.date.day),
+    "{{date_text}}": lambda c, total: f"{MONTHS_RU[c.date.month]} {c.date.year}",
+    "{{client_type}}": lambda c, total: c.client.client_type,
+    "{{client_name}}": lambda c, total: c.client.name,
+    "{{client_company_name}}": lambda c, total: c.client.company_name or "",
+    "{{client_short_name}}": lambda c, total: c.client.short_name,
+    "{{client_full_name}}": lambda c, total: get_full_name(c.client),
+    "{{client_first_name}}": lambda c, total: c.client.first_name,
+    "{{client_last_name}}": lambda c, total: c.client.last_name,
+    "{{client_patronymic}}": lambda c, total: c.client.patronymic,
+    "{{client_ogrn}}": lambda c, total: c.client.ogrn,
+    "{{client_ogrnip}}": lambda c, total: c.client.ogrn,  # для обратной совместимости
+    "{{client_kpp}}": lambda c, total: c.client.kpp,
+    "{{client_address}}": lambda c, total: c.client.address,
+    "{{client_inn}}": lambda c, total: c.client.inn,
+    "{{client_email}}": lambda c, total: c.client.email,
+    "{{client_phone}}": lambda c, total: c.client.phone,
+    "{{client_account}}": lambda c, total: c.client.settlement_account,
+    "{{client_position}}": lambda c, total: c.client.position,
+    "{{client_acting_basis}}": lambda c, total: c.client.acting_basis,
+    "{{client_header}}": lambda c, total: build_client_header(c.client),
+    # Паспортные данные для физлиц
+    "{{client_passport_series}}": lambda c, total: c.client.passport_series or "",
+    "{{client_passport_number}}": lambda c, total: c.client.passport_number or "",
+    "{{client_passport_issued_by}}": lambda c, total: c.client.passport_issued_by or "",
+    "{{client_passport_issued_date}}": lambda c, total: _passport_issued_date(c),
+    # Банковские данные
+    "{{bank_name}}": lambda c, total: _bank_attr(c, "name"),
+    "{{bank_bik}}": lambda c, total: _bank_attr(c, "bik"),
+    "{{bank_corr}}": lambda c, total: _bank_attr(c, "correspondent_account"),
+    # Подписант и контракт
+    "{{signatory}}": lambda c, total: get_short_name(c.client),
+    "{{contract_number}}": lambda c, total: c.number,
+    "{{contract_date}}": lambda c, total: c.date.strftime("%d.%m.%Y"),
+    # Реквизиты (полные - для обратной совместимости)
+    "{{requisites}}": lambda c, total: build_requisites(c.client, c.client.bank),
+    "{{executor_requisites}}": lambda c, total: build_executor_requisites(),
+    # Реквизиты (разбитые на части)
+    "{{requisites_main}}": lambda c, total: build_requisites_main(c.client),
+    "{{requisites_bank}}": lambda c, total: build_requisites_bank(c.client, c.client.bank),
+    "{{executor_main}}": lambda c, total: build_executor_requisites_main(),
+    "{{executor_bank}}": lambda c, total: build_executor_requisites_bank(),
+    "{{total_price}}": lambda c, total: _total_price(total),
+}
+
+
+class LazyReplacements(Mapping):
+    """Словарь замен метка -> значение, вычисляющий значения по требованию.
+
+    Значение считается только при первом обращении к метке, поэтому шаблон
+    платит лишь за метки, которые в нём действительно есть. Значения,
+    зависящие только от Исполнителя, кэшируются на весь процесс.
+    """
+
+    def __init__(self, contract: Contract, total: Decimal = Decimal("0")):
+        self.contract = contract
+        self.total = total
+        self._values = {}
+
+    def __getitem__(self, key: str):
+        if key not in self._values:
+            self._values[key] = REPLACEMENT_RESOLVERS[key](self.contract, self.total)
+        return self._values[key]
+
+    def __contains__(self, key) -> bool:
+        return key in REPLACEMENT_RESOLVERS
+
+    def __iter__(self):
+        return iter(REPLACEMENT_RESOLVERS)
+
+    def __len__(self) -> int:
+        return len(REPLACEMENT_RESOLVERS)
+
+
+def build_replacements(contract: Contract, total: Decimal = Decimal("0")) -> LazyReplacements:
+    """Создаёт ленивый словарь замен метка -> значение"""
+    return LazyReplacements(contract, total)
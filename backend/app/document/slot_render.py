@@ -0,0 +1,217 @@
+"""
+Рендеринг договора подстановкой значений в заранее сериализованный document.xml.
+
+Шаблон компилируется один раз: каждый run с метками {{...}} заменяется слотом,
+строка услуг превращается в повторяемый фрагмент, а весь document.xml
+сохраняется как набор строковых фрагментов. Рендер — это конкатенация
+фрагментов и XML-экранированных значений, без дерева python-docx.
+
+Результат побайтно совпадает с document.xml, который даёт путь python-docx
+(generate_contract_document в режиме "docx").
+"""
+import re
+import zipfile
+from decimal import Decimal
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+from .replacements import (
+    PLACEHOLDER_RE,
+    REPLACEMENT_RESOLVERS,
+    build_replacements,
+    substitute_paragraph,
+)
+from .tables import add_service_row, find_services_table, format_service_price_text
+from .zip_package import ZipEntry, write_zip
+
+DOCUMENT_PART = "word/document.xml"
+
+# Маркер слота внутри w:t; после сериализации по нему режется XML
+SLOT_MARK = "§slot{}§"
+SLOT_RE = re.compile(r"<w:t>§slot(\d+)§</w:t>")
+
+# Символы, которые python-docx превращает в отдельные элементы run
+RUN_SPECIAL_RE = re.compile(r"([\t\r\n])")
+
+# Символы, недопустимые в XML 1.0; lxml в пути python-docx на них падает
+XML_INVALID_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+# Известные метки с собой в качестве значения: substitute_paragraph объединит
+# разбитые runs, но текст не изменится
+_IDENTITY_REPLACEMENTS = {key: key for key in REPLACEMENT_RESOLVERS}
+
+
+def render_run_content(text: str) -> str:
+    """Сериализует текст run так же, как python-docx (Run.text)"""
+    if XML_INVALID_RE.search(text):
+        # Та же ошибка, что у lxml: иначе получился бы .docx, который Word не откроет
+        raise ValueError(
+            "All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters"
+        )
+    parts = []
+    for piece in RUN_SPECIAL_RE.split(text):
+        if not piece:
+            continue
+        if piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece in "\r\n":
+            parts.append("<w:br/>")
+        elif len(piece.strip()) < len(piece):
+            parts.append(f'<w:t xml:space="preserve">{escape(piece)}</w:t>')
+        else:
+            parts.append(f"<w:t>{escape(piece)}</w:t>")
+    return "".join(parts)
+
+
+class _Segment:
+    """Фрагмент document.xml: литералы, чередующиеся со слотами"""
+
+    def __init__(self, xml: str):
+        pieces = SLOT_RE.split(xml)
+        self.literals = pieces[0::2]
+        self.slot_ids = [int(slot_id) for slot_id in pieces[1::2]]
+
+    def render(self, out: list, texts: dict):
+        out.append(self.literals[0])
+        for slot_id, literal in zip(self.slot_ids, self.literals[1:]):
+            out.append(render_run_content(texts[slot_id]))
+            out.append(literal)
+
+
+def _mark_run(r, slot_id: int):
+    r.clear_content()
+    r.add_t(SLOT_MARK.format(slot_id))
+
+
+def _element_bounds(xml: str, tag: str, pos: int) -> tuple[int, int]:
+    """Возвращает границы элемента tag, внутри которого находится позиция pos"""
+    start = max(xml.rfind(f"<{tag}>", 0, pos), xml.rfind(f"<{tag} ", 0, pos))
+    end = xml.index(f"</{tag}>", pos) + len(f"</{tag}>")
+    return start, end
+
+
+class SlotTemplate:
+    """Скомпилированный document.xml шаблона договора со слотами"""
+
+    def __init__(self, doc):
+        body = doc.element.body
+
+        # Убираем строку-маркер {{services}}, вместо неё будет образец строки услуг
+        table, marker_row = find_services_table(doc)
+        self.has_services_table = table is not None
+        if table is not None:
+            table._tbl.remove(marker_row._tr)
+
+        # Объединяем runs, если метка разбита на несколько runs
+        for p in body.iter(qn("w:p")):
+            substitute_paragraph(Paragraph(p, None), _IDENTITY_REPLACEMENTS)
+
+        # Слоты документа: runs с метками
+        self.slot_texts: dict[int, str] = {}
+        for r in list(body.iter(qn("w:r"))):
+            text = r.text
+            if "{{" in text:
+                slot_id = len(self.slot_texts)
+                self.slot_texts[slot_id] = text
+                _mark_run(r, slot_id)
+
+        # Строка услуг: добавляем образец строки и размечаем её runs
+        row_slots = None
+        if table is not None:
+            row = add_service_row(table, "1.", "name", "price\nline")
+            first_slot = len(self.slot_texts)
+            row_slots = {
+                "index": first_slot,
+                "name": first_slot + 1,
+                "price": first_slot + 2,
+                "line": first_slot + 3,
+            }
+            _mark_run(row.cells[0].paragraphs[0].runs[0]._r, row_slots["index"])
+            _mark_run(row.cells[1].paragraphs[0].runs[0]._r, row_slots["name"])
+            _mark_run(row.cells[2].paragraphs[0].runs[0]._r, row_slots["price"])
+            _mark_run(row.cells[2].paragraphs[1].runs[0]._r, row_slots["line"])
+        self.row_slots = row_slots
+
+        xml = serialize_part_xml(doc.element).decode("utf-8")
+
+        if row_slots is None:
+            self.head = _Segment(xml)
+            self.row_head = self.row_line = self.row_tail = self.tail = None
+        else:
+            row_pos = xml.index(SLOT_MARK.format(row_slots["index"]))
+            row_start, row_end = _element_bounds(xml, "w:tr", row_pos)
+            line_pos = xml.index(SLOT_MARK.format(row_slots["line"]))
+            line_start, line_end = _element_bounds(xml, "w:p", line_pos)
+
+            self.head = _Segment(xml[:row_start])
+            self.row_head = _Segment(xml[row_start:line_start])
+            self.row_line = _Segment(xml[line_start:line_end])
+            self.row_tail = _Segment(xml[line_end:row_end])
+            self.tail = _Segment(xml[row_end:])
+
+        # Остальные части пакета (стили, настройки, связи) не меняются: сжимаем их один раз
+        buffer = BytesIO()
+        doc.save(buffer)
+        with zipfile.ZipFile(buffer) as zf:
+            self.parts = [
+                None if name == DOCUMENT_PART else ZipEntry.deflate(name, zf.read(name))
+                for name in zf.namelist()
+            ]
+
+        self.size = len(xml) + sum(len(entry.compressed) for entry in self.parts if entry)
+
+    def render(self, contract) -> tuple[bytes, set[str]]:
+        """Рендерит договор.
+
+        Returns:
+            Содержимое .docx и множество неизвестных меток
+        """
+        services = contract.services
+        total = Decimal("0")
+        if self.has_services_table:
+            total = sum((service.price for service in services), Decimal("0"))
+
+        replacements = build_replacements(contract, total)
+        # Неизвестные метки и из шаблона, и из текста строк услуг — как в пути python-docx
+        unknown = set()
+
+        def resolve(match) -> str:
+            key = match.group(0)
+            if key not in replacements:
+                unknown.add(key)
+                return key
+            return str(replacements[key] or "")
+
+        def substitute(text: str) -> str:
+            if "{{" not in text:
+                return text
+            return PLACEHOLDER_RE.sub(resolve, text)
+
+        texts = {slot_id: substitute(text) for slot_id, text in self.slot_texts.items()}
+
+        out = []
+        self.head.render(out, texts)
+        if self.row_slots is not None:
+            slots = self.row_slots
+            for i, service in enumerate(services, 1):
+                lines = format_service_price_text(service).split("\n")
+                texts[slots["index"]] = substitute(f"{i}.")
+                texts[slots["name"]] = substitute(service.name)
+                texts[slots["price"]] = substitute(lines[0])
+                self.row_head.render(out, texts)
+                for line in lines[1:]:
+                    texts[slots["line"]] = substitute(line)
+                    self.row_line.render(out, texts)
+                self.row_tail.render(out, texts)
+            self.tail.render(out, texts)
+
+        document_xml = "".join(out).encode("utf-8")
+        return self._pack(document_xml), unknown
+
+    def _pack(self, document_xml: bytes) -> bytes:
+        document = ZipEntry.deflate(DOCUMENT_PART, document_xml)
+        return write_zip([entry or document for entry in self.parts])
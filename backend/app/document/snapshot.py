@@ -0,0 +1,140 @@
+"""
+Неизменяемые снимки договора для генерации документов.
+
+Снимок содержит всё, что влияет на результат рендеринга, и повторяет имена
+атрибутов ORM-моделей, поэтому генераторы принимают его вместо Contract.
+Снимок не зависит от сессии БД и сериализуется (pickle/JSON).
+"""
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class BankSnapshot:
+    id: int
+    name: str
+    bik: str
+    correspondent_account: str
+
+    @classmethod
+    def from_model(cls, bank) -> "BankSnapshot":
+        return cls(
+            id=bank.id,
+            name=bank.name,
+            bik=bank.bik,
+            correspondent_account=bank.correspondent_account,
+        )
+
+
+@dataclass(frozen=True)
+class ServiceSnapshot:
+    id: int
+    name: str
+    price: Decimal
+    payment_terms: str
+
+    @classmethod
+    def from_model(cls, service) -> "ServiceSnapshot":
+        return cls(
+            id=service.id,
+            name=service.name,
+            price=service.price,
+            payment_terms=service.payment_terms,
+        )
+
+
+@dataclass(frozen=True)
+class ClientSnapshot:
+    id: int
+    client_type: str
+    name: str
+    short_name: Optional[str]
+    company_name: Optional[str]
+    ogrn: Optional[str]
+    inn: Optional[str]
+    kpp: Optional[str]
+    address: str
+    email: Optional[str]
+    phone: Optional[str]
+    settlement_account: Optional[str]
+    last_name: str
+    first_name: str
+    patronymic: Optional[str]
+    position: Optional[str]
+    acting_basis: Optional[str]
+    passport_series: Optional[str]
+    passport_number: Optional[str]
+    passport_issued_by: Optional[str]
+    passport_issued_date: Optional[date]
+    bank: Optional[BankSnapshot]
+
+    @classmethod
+    def from_model(cls, client) -> "ClientSnapshot":
+        return cls(
+            id=client.id,
+            client_type=client.client_type,
+            name=client.name,
+            short_name=client.short_name,
+            company_name=client.company_name,
+            ogrn=client.ogrn,
+            inn=client.inn,
+            kpp=client.kpp,
+            address=client.address,
+            email=client.email,
+            phone=client.phone,
+            settlement_account=client.settlement_account,
+            last_name=client.last_name,
+            first_name=client.first_name,
+            patronymic=client.patronymic,
+            position=client.position,
+            acting_basis=client.acting_basis,
+            passport_series=client.passport_series,
+            passport_number=client.passport_number,
+            passport_issued_by=client.passport_issued_by,
+            passport_issued_date=client.passport_issued_date,
+            bank=BankSnapshot.from_model(client.bank) if client.bank else None,
+        )
+
+
+@dataclass(frozen=True)
+class TemplateSnapshot:
+    id: int
+    updated_at: datetime
+    sections: list
+
+    @classmethod
+    def from_model(cls, template) -> "TemplateSnapshot":
+        return cls(id=template.id, updated_at=template.updated_at, sections=template.sections)
+
+
+@dataclass(frozen=True)
+class ContractSnapshot:
+    id: int
+    number: str
+    date: date
+    client: ClientSnapshot
+    services: tuple[ServiceSnapshot, ...]
+    template: Optional[TemplateSnapshot]
+
+    @classmethod
+    def from_model(cls, contract) -> "ContractSnapshot":
+        """Снимок договора; client.bank, services и template должны быть загружены"""
+        return cls(
+            id=contract.id,
+            number=contract.number,
+            date=contract.date,
+            client=ClientSnapshot.from_model(contract.client),
+            services=tuple(ServiceSnapshot.from_model(service) for service in contract.services),
+            template=TemplateSnapshot.from_model(contract.template) if contract.template else None,
+        )
+
+    def digest(self, *salt: str) -> str:
+        """SHA-256 от всех полей снимка (и дополнительных строк salt)"""
+        payload = json.dumps(
+            [asdict(self), *salt], sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
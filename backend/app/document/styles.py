@@ -3,6 +3,7 @@
 """
 from docx import Document
 from docx.shared import Pt, Cm, Twips, Inches
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
 from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.oxml.ns import qn
@@ -30,6 +31,12 @@ PARAGRAPH_SPACING_AFTER = Pt(0)
 # Отступ первой строки (как в оригинале - 0.30 дюйма)
 FIRST_LINE_INDENT = Inches(0.30)
 
+# Именованные стили параграфов (имя совпадает с идентификатором стиля)
+STYLE_BODY = "ContractBody"
+STYLE_HEADING = "ContractHeading"
+STYLE_TITLE = "ContractTitle"
+STYLE_TABLE_CELL = "TableCell"
+
 
 def apply_document_defaults(doc: Document):
     """Применяет стандартные настройки к документу"""
@@ -41,58 +48,89 @@ def apply_document_defaults(doc: Document):
         section.right_margin = MARGIN_RIGHT
 
     # Настройка стиля Normal
-    style = doc.styles['Normal']
-    font = style.font
-    font.name = FONT_NAME
-    font.size = FONT_SIZE_BODY
-
-    # Установка шрифта для всех типов текста (совместимость Word/LibreOffice)
-    rFonts = style._element.rPr.get_or_add_rFonts()
-    rFonts.set(qn('w:ascii'), FONT_NAME)
-    rFonts.set(qn('w:hAnsi'), FONT_NAME)
-    rFonts.set(qn('w:cs'), FONT_NAME)
-    rFonts.set(qn('w:eastAsia'), FONT_NAME)
+    _set_style_font(doc.styles['Normal'])
 
 
-def apply_run_font(run, font_name=FONT_NAME, font_size=FONT_SIZE_BODY):
-    """Применяет стиль шрифта к run с полной поддержкой Word/LibreOffice."""
-    run.font.name = font_name
-    run.font.size = font_size
+def _set_style_font(style, font_name=FONT_NAME, font_size=FONT_SIZE_BODY, bold=None):
+    """Задаёт шрифт стиля с полной поддержкой Word/LibreOffice."""
+    style.font.name = font_name
+    style.font.size = font_size
+    if bold is not None:
+        style.font.bold = bold
 
     # Устанавливаем шрифт для всех типов текста (критично для LibreOffice)
-    rPr = run._element.get_or_add_rPr()
-    rFonts = rPr.get_or_add_rFonts()
+    rFonts = style.element.get_or_add_rPr().get_or_add_rFonts()
     rFonts.set(qn('w:ascii'), font_name)      # ASCII characters
     rFonts.set(qn('w:hAnsi'), font_name)      # High ANSI (extended Latin)
     rFonts.set(qn('w:cs'), font_name)         # Complex Script (Cyrillic)
     rFonts.set(qn('w:eastAsia'), font_name)   # East Asian
 
 
-def apply_title_style(run):
-    """Стиль заголовка документа (жирный, размер заголовка)."""
-    run.bold = True
-    apply_run_font(run, FONT_NAME_HEADING, FONT_SIZE_TITLE)
+def add_contract_styles(doc: Document):
+    """Добавляет в styles.xml именованные стили договора.
+
+    Форматирование задаётся один раз в стиле, а параграфы только ссылаются
+    на него, поэтому runs не несут прямого форматирования шрифта.
+    Стиль ячеек не задаёт интервалы, чтобы не перекрывать стиль таблицы.
+    """
+    styles = doc.styles
+    normal = styles['Normal']
+
+    body = styles.add_style(STYLE_BODY, WD_STYLE_TYPE.PARAGRAPH)
+    body.base_style = normal
+    _set_style_font(body)
+    body.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+    body.paragraph_format.space_after = PARAGRAPH_SPACING_AFTER
+    body.paragraph_format.line_spacing = LINE_SPACING
+    body.paragraph_format.first_line_indent = FIRST_LINE_INDENT
+
+    heading = styles.add_style(STYLE_HEADING, WD_STYLE_TYPE.PARAGRAPH)
+    heading.base_style = normal
+    _set_style_font(heading, FONT_NAME_HEADING, FONT_SIZE_HEADING, bold=True)
+    heading.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.LEFT
+    heading.paragraph_format.space_before = Pt(0)
+    heading.paragraph_format.space_after = Pt(0)
+    heading.paragraph_format.left_indent = Cm(1.25)
+
+    title = styles.add_style(STYLE_TITLE, WD_STYLE_TYPE.PARAGRAPH)
+    title.base_style = normal
+    _set_style_font(title, FONT_NAME_HEADING, FONT_SIZE_TITLE, bold=True)
+    title.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title.paragraph_format.space_after = Pt(0)
+
+    table_cell = styles.add_style(STYLE_TABLE_CELL, WD_STYLE_TYPE.PARAGRAPH)
+    table_cell.base_style = normal
+    _set_style_font(table_cell)
 
 
-def apply_heading_style(run):
-    """Стиль заголовка раздела (жирный, размер подзаголовка)."""
-    run.bold = True
-    apply_run_font(run, FONT_NAME_HEADING, FONT_SIZE_HEADING)
+def set_paragraph_style(paragraph, style_id: str):
+    """Назначает параграфу стиль по идентификатору (без поиска стиля по имени)."""
+    paragraph._p.style = style_id
+
+
+def apply_title_style(paragraph):
+    """Стиль заголовка документа (жирный, по центру)."""
+    set_paragraph_style(paragraph, STYLE_TITLE)
+
+
+def apply_heading_style(paragraph):
+    """Стиль заголовка раздела (жирный, с отступом слева)."""
+    set_paragraph_style(paragraph, STYLE_HEADING)
+
+
+def apply_table_cell_style(paragraph):
+    """Стиль текста в ячейках таблиц."""
+    set_paragraph_style(paragraph, STYLE_TABLE_CELL)
 
 
 def apply_body_style(paragraph, first_line_indent: bool = True, alignment=None):
     """Стиль для основного текста"""
-    if alignment is None:
-        alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    paragraph.alignment = alignment
-    paragraph.paragraph_format.space_after = PARAGRAPH_SPACING_AFTER
-    paragraph.paragraph_format.line_spacing = LINE_SPACING
-
-    if first_line_indent:
-        paragraph.paragraph_format.first_line_indent = FIRST_LINE_INDENT
+    set_paragraph_style(paragraph, STYLE_BODY)
+    if alignment is not None:
+        paragraph.alignment = alignment
 
-    for run in paragraph.runs:
-        apply_run_font(run)
+    if not first_line_indent:
+        paragraph.paragraph_format.first_line_indent = Pt(0)
 
 
 def apply_table_borders(table):
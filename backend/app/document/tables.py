@@ -5,7 +5,7 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Cm, Pt
 
 from .utils import number_to_words_ru
-from .styles import apply_run_font, set_cell_width
+from .styles import apply_table_cell_style, set_cell_width
 
 # Ширина колонок таблицы услуг
 SERVICE_TABLE_COL_WIDTHS = [Cm(1), Cm(8), Cm(8)]
@@ -23,11 +23,11 @@ def set_cell_multiline_text(cell, text: str):
 
     for i, line in enumerate(lines):
         if i == 0:
-            run = cell.paragraphs[0].add_run(line)
+            p = cell.paragraphs[0]
         else:
             p = cell.add_paragraph()
-            run = p.add_run(line)
-        apply_run_font(run)
+        p.add_run(line)
+        apply_table_cell_style(p)
 
 
 def find_services_table(doc):
@@ -40,6 +40,42 @@ def find_services_table(doc):
     return None, None
 
 
+def format_service_price_text(service) -> str:
+    """Формирует текст ячейки стоимости и порядка оплаты услуги"""
+    return (
+        f"Стоимость: {service.price:,.0f} руб. ({number_to_words_ru(service.price)}).\n"
+        f"Порядок оплаты:\n{service.payment_terms}"
+    )
+
+
+def add_service_row(table, index: str, name: str, price_text: str):
+    """Добавляет строку услуги в конец таблицы услуг"""
+    row = table.add_row()
+    # Применяем ширину колонок к новой строке (LibreOffice)
+    for idx, width in enumerate(SERVICE_TABLE_COL_WIDTHS):
+        set_cell_width(row.cells[idx], width.twips)
+
+    # Номер услуги
+    row.cells[0].paragraphs[0].clear()
+    row.cells[0].paragraphs[0].add_run(index)
+    apply_table_cell_style(row.cells[0].paragraphs[0])
+    row.cells[0].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
+    row.cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+
+    # Название услуги
+    row.cells[1].paragraphs[0].clear()
+    row.cells[1].paragraphs[0].add_run(name)
+    apply_table_cell_style(row.cells[1].paragraphs[0])
+    row.cells[1].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
+
+    # Стоимость и порядок оплаты (многострочный текст)
+    set_cell_multiline_text(row.cells[2], price_text)
+    row.cells[2].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
+    row.cells[2].paragraphs[0].paragraph_format.space_before = Pt(6)
+    row.cells[2].paragraphs[0].paragraph_format.space_after = Pt(6)
+    return row
+
+
 def fill_services_table(doc, services: list) -> Decimal:
     """Заполняет таблицу услуг, возвращает итоговую сумму"""
     table, marker_row = find_services_table(doc)
@@ -50,31 +86,7 @@ def fill_services_table(doc, services: list) -> Decimal:
 
     total = Decimal("0")
     for i, service in enumerate(services, 1):
-        row = table.add_row()
-        # Применяем ширину колонок к новой строке (LibreOffice)
-        for idx, width in enumerate(SERVICE_TABLE_COL_WIDTHS):
-            set_cell_width(row.cells[idx], width.twips)
-
-        # Номер услуги
-        row.cells[0].paragraphs[0].clear()
-        run = row.cells[0].paragraphs[0].add_run(f"{i}.")
-        apply_run_font(run)
-        row.cells[0].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-        row.cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-
-        # Название услуги
-        row.cells[1].paragraphs[0].clear()
-        run = row.cells[1].paragraphs[0].add_run(service.name)
-        apply_run_font(run)
-        row.cells[1].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-
-        # Стоимость и порядок оплаты (многострочный текст)
-        price_text = f"Стоимость: {service.price:,.0f} руб. ({number_to_words_ru(service.price)}).\nПорядок оплаты:\n{service.payment_terms}"
-        set_cell_multiline_text(row.cells[2], price_text)
-        row.cells[2].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-        row.cells[2].paragraphs[0].paragraph_format.space_before = Pt(6)
-        row.cells[2].paragraphs[0].paragraph_format.space_after = Pt(6)
-
+        add_service_row(table, f"{i}.", service.name, format_service_price_text(service))
         total += service.price
 
     return total
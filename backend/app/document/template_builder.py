@@ -15,11 +15,12 @@ from .constants import (
     CONTRACT_SECTIONS,
 )
 from .styles import (
+    add_contract_styles,
     apply_document_defaults,
     apply_body_style,
-    apply_run_font,
     apply_title_style,
     apply_heading_style,
+    apply_table_cell_style,
     apply_table_borders,
     set_table_width_fixed,
     set_cell_width,
@@ -34,28 +35,21 @@ class ContractTemplateBuilder:
         self.doc = Document()
         self.sections = sections if sections is not None else CONTRACT_SECTIONS
         apply_document_defaults(self.doc)
+        add_contract_styles(self.doc)
 
     def add_header(self):
         """Добавляет заголовок договора"""
         # Договор
-        p = self.doc.add_paragraph()
-        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = p.add_run("Договор")
-        apply_title_style(run)
-        p.paragraph_format.space_after = Pt(0)
+        p = self.doc.add_paragraph("Договор")
+        apply_title_style(p)
 
         # возмездного оказания услуг
-        p = self.doc.add_paragraph()
-        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = p.add_run("возмездного оказания услуг")
-        apply_title_style(run)
-        p.paragraph_format.space_after = Pt(0)
+        p = self.doc.add_paragraph("возмездного оказания услуг")
+        apply_title_style(p)
 
         # № {{contract_number}} от {{contract_date}}г.
-        p = self.doc.add_paragraph()
-        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = p.add_run("№ {{contract_number}} от {{contract_date}}г.")
-        apply_title_style(run)
+        p = self.doc.add_paragraph("№ {{contract_number}} от {{contract_date}}г.")
+        apply_title_style(p)
         p.paragraph_format.space_after = Pt(12)
 
     def add_city_and_date(self):
@@ -73,16 +67,16 @@ class ContractTemplateBuilder:
         # Левая ячейка: г. Москва
         cell_left = table.rows[0].cells[0]
         p = cell_left.paragraphs[0]
-        run = p.add_run("г. Москва")
-        apply_run_font(run)
+        p.add_run("г. Москва")
+        apply_table_cell_style(p)
 
         # Правая ячейка: «{{day}}» {{date_text}} г.
         cell_right = table.rows[0].cells[1]
         set_cell_margins(cell_right, right=0)  # Убираем правый отступ
         p = cell_right.paragraphs[0]
         p.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        run = p.add_run("«{{day}}» {{date_text}} г.")
-        apply_run_font(run)
+        p.add_run("«{{day}}» {{date_text}} г.")
+        apply_table_cell_style(p)
 
         # Пустая строка после
         self.doc.add_paragraph()
@@ -94,31 +88,22 @@ class ContractTemplateBuilder:
             "именуемый в дальнейшем «Заказчик», вместе именуемые «Стороны», "
             "а по отдельности «Сторона», заключили настоящий договор о нижеследующем:"
         )
-        p = self.doc.add_paragraph()
-        run = p.add_run(text)
-        apply_run_font(run)
+        p = self.doc.add_paragraph(text)
         apply_body_style(p, first_line_indent=True)
 
     def add_section(self, number, title: str, paragraphs: list):
         """Добавляет раздел договора"""
         # Заголовок раздела
-        heading = self.doc.add_paragraph()
-        heading.alignment = WD_ALIGN_PARAGRAPH.LEFT
         if number:
             heading_text = f"{number}. {title}"
         else:
             heading_text = title
-        run = heading.add_run(heading_text)
-        apply_heading_style(run)
-        heading.paragraph_format.space_before = Pt(0)
-        heading.paragraph_format.space_after = Pt(0)
-        heading.paragraph_format.left_indent = Cm(1.25)
+        heading = self.doc.add_paragraph(heading_text)
+        apply_heading_style(heading)
 
         # Пункты раздела
         for para_text in paragraphs:
-            p = self.doc.add_paragraph()
-            run = p.add_run(para_text)
-            apply_run_font(run)
+            p = self.doc.add_paragraph(para_text)
             apply_body_style(p, first_line_indent=True)
 
     def _add_requisites_table(
@@ -131,12 +116,10 @@ class ContractTemplateBuilder:
             self.doc.add_paragraph()
 
         if with_heading:
-            p = self.doc.add_paragraph()
-            p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            run = p.add_run("7. Реквизиты Сторон:")
-            apply_heading_style(run)
+            p = self.doc.add_paragraph("7. Реквизиты Сторон:")
+            apply_heading_style(p)
             p.paragraph_format.space_before = Pt(12)
-            p.paragraph_format.space_after = Pt(0)
+            p.paragraph_format.left_indent = Cm(0)
 
         # Таблица 5 строк x 2 колонки с рамками
         table = self.doc.add_table(rows=5, cols=2)
@@ -161,7 +144,7 @@ class ContractTemplateBuilder:
         p.paragraph_format.space_after = Pt(12)
         run = p.add_run("Исполнитель")
         run.bold = True
-        apply_run_font(run)
+        apply_table_cell_style(p)
 
         cell_right = table.rows[0].cells[1]
         cell_right.vertical_alignment = WD_CELL_VERTICAL_ALIGNMENT.CENTER
@@ -171,59 +154,59 @@ class ContractTemplateBuilder:
         p.paragraph_format.space_after = Pt(12)
         run = p.add_run("Заказчик")
         run.bold = True
-        apply_run_font(run)
+        apply_table_cell_style(p)
 
         # Строка 2: Основные данные
         cell_left = table.rows[1].cells[0]
         p = cell_left.paragraphs[0]
-        run = p.add_run("{{executor_main}}")
+        p.add_run("{{executor_main}}")
         p.paragraph_format.space_before = Pt(6)
-        apply_run_font(run)
+        apply_table_cell_style(p)
 
         cell_right = table.rows[1].cells[1]
         p = cell_right.paragraphs[0]
-        run = p.add_run("{{requisites_main}}")
+        p.add_run("{{requisites_main}}")
         p.paragraph_format.space_before = Pt(6)
-        apply_run_font(run)
+        apply_table_cell_style(p)
 
         # Строка 3: "Банковские реквизиты:"
         cell_left = table.rows[2].cells[0]
         p = cell_left.paragraphs[0]
-        run = p.add_run("Банковские реквизиты:")
+        p.add_run("Банковские реквизиты:")
         p.paragraph_format.space_after = Pt(6)
-        apply_run_font(run)
+        apply_table_cell_style(p)
 
         cell_right = table.rows[2].cells[1]
         p = cell_right.paragraphs[0]
-        run = p.add_run("Банковские реквизиты:")
+        p.add_run("Банковские реквизиты:")
         p.paragraph_format.space_after = Pt(6)
-        apply_run_font(run)
+        apply_table_cell_style(p)
 
         # Строка 4: Банковские данные
         cell_left = table.rows[3].cells[0]
         p = cell_left.paragraphs[0]
-        run = p.add_run("{{executor_bank}}")
-        apply_run_font(run)
+        p.add_run("{{executor_bank}}")
+        apply_table_cell_style(p)
 
         cell_right = table.rows[3].cells[1]
         p = cell_right.paragraphs[0]
-        run = p.add_run("{{requisites_bank}}")
-        apply_run_font(run)
+        p.add_run("{{requisites_bank}}")
+        apply_table_cell_style(p)
 
         # Строка 5: Подписи
         cell_left = table.rows[4].cells[0]
         p = cell_left.paragraphs[0]
         p.paragraph_format.space_before = Pt(24)
-        run = p.add_run(f"_________________/{EXECUTOR_DATA['name_short']} /")
+        p.add_run(f"_________________/{EXECUTOR_DATA['name_short']} /")
         p.paragraph_format.space_after = Pt(6)
-        apply_run_font(run)
+        apply_table_cell_style(p)
 
         cell_right = table.rows[4].cells[1]
         p = cell_right.paragraphs[0]
         p.paragraph_format.space_before = Pt(24)
-        run = p.add_run("_________________/{{signatory}} /")
+        p.add_run("_________________/{{signatory}} /")
         p.paragraph_format.space_after = Pt(6)
-        apply_run_font(run)
+        apply_table_cell_style(p)
 
     def add_requisites_section(self):
         """Добавляет раздел 7: Реквизиты Сторон (таблица с рамками)"""
@@ -236,30 +219,20 @@ class ContractTemplateBuilder:
     def add_task_page(self):
         """Добавляет страницу 'Задание Заказчика № 1' с таблицей услуг"""
         # Заголовок
-        p = self.doc.add_paragraph()
-        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = p.add_run("Задание Заказчика № 1")
-        apply_title_style(run)
-        p.paragraph_format.space_after = Pt(0)
+        p = self.doc.add_paragraph("Задание Заказчика № 1")
+        apply_title_style(p)
 
-        p = self.doc.add_paragraph()
-        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = p.add_run("возмездного оказания услуг")
-        apply_title_style(run)
-        p.paragraph_format.space_after = Pt(0)
+        p = self.doc.add_paragraph("возмездного оказания услуг")
+        apply_title_style(p)
 
-        p = self.doc.add_paragraph()
-        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = p.add_run("{{contract_number}} от {{contract_date}}г.")
-        apply_title_style(run)
+        p = self.doc.add_paragraph("{{contract_number}} от {{contract_date}}г.")
+        apply_title_style(p)
         p.paragraph_format.space_after = Pt(12)
 
         # Текст введения
-        p = self.doc.add_paragraph()
-        run = p.add_run(
+        p = self.doc.add_paragraph(
             "На основании Договора возмездного оказания услуг от «{{day}}» {{date_text}} г. Исполнитель обязуется:\n"
         )
-        apply_run_font(run)
         apply_body_style(p, first_line_indent=False, alignment=WD_ALIGN_PARAGRAPH.LEFT)
 
         # Таблица услуг (3 колонки: №, Наименование, Стоимость)
@@ -285,14 +258,14 @@ class ContractTemplateBuilder:
             p.paragraph_format.space_before = Pt(6)
             p.paragraph_format.space_after = Pt(6)
             if header:
-                run = p.add_run(header)
-                apply_run_font(run)
+                p.add_run(header)
+                apply_table_cell_style(p)
 
         # Маркер для заполнения - используем вторую строку
         cell = table.rows[1].cells[0]
         p = cell.paragraphs[0]
-        run = p.add_run("{{services}}")
-        apply_run_font(run)
+        p.add_run("{{services}}")
+        apply_table_cell_style(p)
 
         # Пустые ячейки справа
         for col_idx in [1, 2]:
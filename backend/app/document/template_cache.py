@@ -0,0 +1,116 @@
+"""
+Кэш скомпилированных шаблонов договора.
+
+ContractTemplateBuilder строит дерево python-docx с нуля (заголовок, преамбула,
+все разделы, таблицы реквизитов, страница задания). Результат зависит только
+от секций шаблона, поэтому собранный документ с плейсхолдерами хранится в LRU
+и на каждый запрос выдаётся его глубокая копия.
+"""
+import copy
+from collections import OrderedDict
+from io import BytesIO
+from threading import Lock
+
+from docx.document import Document as DocxDocument
+
+from app.config import settings
+
+from .slot_render import SlotTemplate
+from .template_builder import ContractTemplateBuilder
+
+# Ключ встроенного шаблона (CONTRACT_SECTIONS)
+BUILTIN_TEMPLATE_KEY = ("builtin",)
+
+
+def template_cache_key(template) -> tuple:
+    """Возвращает ключ кэша для шаблона договора (или встроенного шаблона)"""
+    if template is None or not template.sections:
+        return BUILTIN_TEMPLATE_KEY
+    return ("template", template.id, template.updated_at)
+
+
+class CompiledTemplate:
+    """Собранный документ-шаблон с плейсхолдерами и его slot-версия"""
+
+    def __init__(self, doc: DocxDocument):
+        self.doc = doc
+        buffer = BytesIO()
+        doc.save(buffer)
+        self.slot_template = SlotTemplate(self.instantiate())
+        self.size = len(buffer.getvalue()) + self.slot_template.size
+
+    def instantiate(self) -> DocxDocument:
+        """Возвращает независимую копию документа для заполнения.
+
+        Копируется весь пакет целиком: копия одного Document оставляет
+        части пакета ссылаться на исходное XML-дерево.
+        """
+        package = copy.deepcopy(self.doc.part.package)
+        return package.main_document_part.document
+
+
+class TemplateCache:
+    """LRU-кэш скомпилированных шаблонов с ограничением по числу записей и байтам"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, CompiledTemplate] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, template) -> CompiledTemplate:
+        """Возвращает скомпилированный шаблон, собирая его при промахе"""
+        key = template_cache_key(template)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        sections = None if key == BUILTIN_TEMPLATE_KEY else template.sections
+        compiled = CompiledTemplate(ContractTemplateBuilder(sections=sections).build())
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compiled
+                self._bytes += compiled.size
+                self._evict()
+        return compiled
+
+    def _evict(self):
+        # Последняя добавленная запись остаётся, даже если превышает бюджет сама по себе
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+template_cache = TemplateCache(
+    max_entries=settings.template_cache_max_entries,
+    max_bytes=settings.template_cache_max_bytes,
+)
@@ -1,7 +1,8 @@
 from decimal import Decimal
-from num2words import num2words
+
+from .amount_words import rubles_to_words
 
 
 def number_to_words_ru(n: Decimal) -> str:
     """Конвертирует число в русские слова (для рублей)"""
-    return num2words(int(n), lang='ru') + " рублей"
+    return rubles_to_words(int(n))
@@ -0,0 +1,397 @@
+"""
+Заполнение xlsx-шаблона на уровне zip-архива, без openpyxl.
+
+Шаблон компилируется один раз: неизменные части (стили, тема, картинки)
+остаются сжатыми байтами исходного архива, а XML листа разбирается на
+фрагменты. При рендеринге собирается только XML листа: в слоты подставляются
+значения ячеек, строка-образец повторяется для каждой записи, строки и
+объединения ниже неё сдвигаются. Строки пишутся inline (t="inlineStr"),
+как это делает openpyxl, поэтому sharedStrings.xml не меняется.
+
+Картинки, меняющиеся от документа к документу (QR-код), добавляются в
+рисунок листа при компиляции; при рендеринге в пакет кладутся только байты
+изображения.
+"""
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string
+from openpyxl.utils.exceptions import IllegalCharacterError
+
+from .zip_package import ZipEntry, read_zip_entries, write_zip
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_CONTENT_TYPES = "[Content_Types].xml"
+_IMAGE_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+_EMU_PER_PIXEL = 9525
+
+_ROW_RE = re.compile(r'<row r="(\d+)"[^>]*?(?:/>|>.*?</row>)', re.S)
+_TOKEN_RE = re.compile(r'\x00(\d+)\x00|(<row r="|<c r="[A-Z]+)(\d+)(?=")')
+_STYLE_RE = re.compile(r' s="(\d+)"')
+_DIMENSION_RE = re.compile(r'<dimension ref="([A-Z]+\d+):([A-Z]+)(\d+)"/>')
+_MERGE_CELLS_RE = re.compile(r'<mergeCells[^>]*>(.*?)</mergeCells>', re.S)
+_MERGE_REF_RE = re.compile(r'<mergeCell ref="([A-Z]+)(\d+):([A-Z]+)(\d+)"/>')
+_LEGACY_DRAWING_RE = re.compile(r'<legacyDrawing r:id="([^"]+)"/>')
+_RELATIONSHIP_RE = re.compile(r'<Relationship [^>]*?Id="([^"]+)"[^>]*?Target="([^"]+)"[^>]*/>')
+_OVERRIDE_RE = re.compile(r'<Override PartName="/([^"]+)"[^>]*/>')
+_DRAWING_ID_RE = re.compile(r'<(?:xdr:)?cNvPr id="(\d+)"')
+
+
+def cell_xml(ref: str, style: str, value) -> str:
+    """XML ячейки в том же виде, в каком её пишет openpyxl"""
+    style_attr = f' s="{style}"' if style else ""
+    if value is None or value == "":
+        return f'<c r="{ref}"{style_attr}/>'
+    if isinstance(value, str):
+        if ILLEGAL_CHARACTERS_RE.search(value):
+            raise IllegalCharacterError(f"{value} cannot be used in worksheets.")
+        stripped = value.strip()
+        space = ' xml:space="preserve"' if stripped and stripped != value else ""
+        return f'<c r="{ref}"{style_attr} t="inlineStr"><is><t{space}>{escape(value)}</t></is></c>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style_attr} t="b"><v>{int(value)}</v></c>'
+    return f'<c r="{ref}"{style_attr} t="n"><v>{"%.16g" % value}</v></c>'
+
+
+class _CellSlot:
+    """Ячейка, значение которой подставляется при рендеринге"""
+
+    __slots__ = ("key", "column", "row", "style")
+
+    def __init__(self, key: str, column: str, row: int, style: str):
+        self.key = key
+        self.column = column
+        self.row = row
+        self.style = style
+
+    def render(self, shift: int, values: dict) -> str:
+        return cell_xml(f"{self.column}{self.row + shift}", self.style, values.get(self.key))
+
+
+def _render_tokens(tokens: list, shift: int, values: dict, out: list):
+    for token in tokens:
+        if type(token) is str:
+            out.append(token)
+        elif type(token) is int:
+            out.append(str(token + shift))
+        else:
+            out.append(token.render(shift, values))
+
+
+def _find_cell(row_xml: str, ref: str) -> re.Match:
+    match = re.search(rf'<c r="{ref}"(?=[ />])[^>]*?(?:/>|>.*?</c>)', row_xml, re.S)
+    if match is None:
+        raise ValueError(f"Cell {ref} is missing in the invoice template")
+    return match
+
+
+def _tokenize_row(row_xml: str, slots: dict[str, str]) -> list:
+    """Делит XML строки на литералы, номера строк (int) и слоты ячеек.
+
+    slots: ссылка на ячейку -> ключ значения.
+    """
+    cells = []
+    for ref, key in slots.items():
+        match = _find_cell(row_xml, ref)
+        style = _STYLE_RE.search(match.group(0)[:match.group(0).find(">") + 1])
+        column, row = coordinate_from_string(ref)
+        cells.append((match.start(), match.end(), _CellSlot(key, column, row, style.group(1) if style else "")))
+    cells.sort(key=lambda cell: cell[0])
+
+    marked = []
+    position = 0
+    for index, (start, end, _) in enumerate(cells):
+        marked.append(row_xml[position:start])
+        marked.append(f"\x00{index}\x00")
+        position = end
+    marked.append(row_xml[position:])
+    marked_xml = "".join(marked)
+
+    tokens = []
+    position = 0
+    for match in _TOKEN_RE.finditer(marked_xml):
+        if match.group(1) is not None:
+            tokens.append(marked_xml[position:match.start()])
+            tokens.append(cells[int(match.group(1))][2])
+        else:
+            tokens.append(marked_xml[position:match.end(2)])
+            tokens.append(int(match.group(3)))
+        position = match.end()
+    tokens.append(marked_xml[position:])
+    return _merge_literals(tokens)
+
+
+def _merge_literals(tokens: list) -> list:
+    merged = []
+    for token in tokens:
+        if type(token) is str and merged and type(merged[-1]) is str:
+            merged[-1] += token
+        elif token != "":
+            merged.append(token)
+    return merged
+
+
+def _rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _relationships(xml: str, part: str) -> dict[str, str]:
+    """Id связи -> путь части в пакете"""
+    directory = posixpath.dirname(part)
+    targets = {}
+    for rel_id, target in _RELATIONSHIP_RE.findall(xml):
+        if target.startswith("/"):
+            targets[rel_id] = target[1:]
+        else:
+            targets[rel_id] = posixpath.normpath(posixpath.join(directory, target))
+    return targets
+
+
+def _next_rel_id(xml: str) -> str:
+    numbers = [int(n) for n in re.findall(r'Id="rId(\d+)"', xml)]
+    return f"rId{max(numbers, default=0) + 1}"
+
+
+class XlsxTemplate:
+    """Скомпилированный xlsx-шаблон с одним заполняемым листом.
+
+    slot_cells: ячейки, значения которых задаются при рендеринге (в координатах шаблона).
+    repeat_row: строка-образец, повторяемая для каждой записи rows.
+    repeat_columns: колонки строки-образца, значения которых берутся из записи.
+    images: имя -> (ячейка привязки, ширина, высота в пикселях) для картинок,
+        байты которых передаются при рендеринге.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        slot_cells: tuple[str, ...],
+        repeat_row: int,
+        repeat_columns: tuple[str, ...],
+        images: dict[str, tuple[str, int, int]] | None = None,
+        sheet_part: str = "xl/worksheets/sheet1.xml",
+        deflate_level: int = 6,
+    ):
+        self.repeat_row = repeat_row
+        self.sheet_part = sheet_part
+        self.deflate_level = deflate_level
+
+        entries = read_zip_entries(path)
+        self._parts: dict[str, bytes] = {}
+        with_xml = {_CONTENT_TYPES, sheet_part, _rels_path(sheet_part), "xl/sharedStrings.xml"}
+        for entry in entries:
+            if entry.name in with_xml:
+                self._parts[entry.name] = self._inflate(path, entry.name)
+        self._names = [entry.name for entry in entries]
+        self._raw = {entry.name: entry for entry in entries}
+
+        sheet_xml = self._parts[sheet_part].decode("utf-8")
+        sheet_rels = self._parts.get(_rels_path(sheet_part), b"").decode("utf-8")
+        sheet_xml = self._drop_broken_legacy_drawing(sheet_xml, sheet_rels)
+
+        self.cell_texts = self._read_cell_texts(sheet_xml, slot_cells)
+        self._compile_sheet(sheet_xml, slot_cells, repeat_columns)
+
+        self._image_parts: dict[str, str] = {}
+        if images:
+            self._add_images(path, sheet_rels, images)
+
+        self._compile_content_types()
+
+    @staticmethod
+    def _inflate(path: Path, name: str) -> bytes:
+        with zipfile.ZipFile(path) as zf:
+            return zf.read(name)
+
+    @staticmethod
+    def _drop_broken_legacy_drawing(sheet_xml: str, sheet_rels: str) -> str:
+        # Ссылка на несуществующую связь (комментарии удалены из шаблона) ломает файл в Excel
+        rel_ids = {rel_id for rel_id, _ in _RELATIONSHIP_RE.findall(sheet_rels)}
+        return _LEGACY_DRAWING_RE.sub(
+            lambda m: m.group(0) if m.group(1) in rel_ids else "", sheet_xml,
+        )
+
+    def _read_cell_texts(self, sheet_xml: str, slot_cells: tuple[str, ...]) -> dict[str, str | None]:
+        """Исходные строковые значения слотов (для подстановки плейсхолдеров)"""
+        strings = []
+        shared = self._parts.get("xl/sharedStrings.xml")
+        if shared:
+            for item in ET.fromstring(shared).iter(f"{_MAIN_NS}si"):
+                strings.append("".join(t.text or "" for t in item.iter(f"{_MAIN_NS}t")))
+
+        texts = {}
+        for ref in slot_cells:
+            cell = _find_cell(sheet_xml, ref).group(0)
+            value = re.search(r"<v>(.*?)</v>", cell, re.S)
+            if value is None:
+                texts[ref] = None
+            elif ' t="s"' in cell:
+                texts[ref] = strings[int(value.group(1))]
+            else:
+                texts[ref] = value.group(1)
+        return texts
+
+    def _compile_sheet(self, sheet_xml: str, slot_cells: tuple[str, ...], repeat_columns: tuple[str, ...]):
+        start = sheet_xml.index("<sheetData")
+        data_start = sheet_xml.index(">", start) + 1
+        data_end = sheet_xml.index("</sheetData>")
+        prefix, rows_xml, suffix = sheet_xml[:data_start], sheet_xml[data_start:data_end], sheet_xml[data_end:]
+
+        slots_by_row: dict[int, dict[str, str]] = {}
+        for ref in slot_cells:
+            _, row = coordinate_from_string(ref)
+            slots_by_row.setdefault(row, {})[ref] = ref
+
+        self._head: list = []
+        self._row: list = []
+        self._tail: list = []
+        for match in _ROW_RE.finditer(rows_xml):
+            number = int(match.group(1))
+            if number == self.repeat_row:
+                slots = {f"{column}{number}": column for column in repeat_columns}
+                self._row = _tokenize_row(match.group(0), slots)
+            else:
+                tokens = _tokenize_row(match.group(0), slots_by_row.get(number, {}))
+                (self._head if number < self.repeat_row else self._tail).extend(tokens)
+        self._head = _merge_literals(self._head)
+        self._tail = _merge_literals(self._tail)
+        if not self._row:
+            raise ValueError(f"Row {self.repeat_row} is missing in the invoice template")
+
+        # Диапазон листа и объединения ниже строки-образца сдвигаются при рендеринге
+        dimension = _DIMENSION_RE.search(prefix)
+        self._dimension = (dimension.group(1), dimension.group(2), int(dimension.group(3))) if dimension else None
+        self._prefix = prefix[:dimension.start()] if dimension else prefix
+        self._prefix_after_dimension = prefix[dimension.end():] if dimension else ""
+
+        merges = _MERGE_CELLS_RE.search(suffix)
+        self._merges = [
+            (c1, int(r1), c2, int(r2)) for c1, r1, c2, r2 in _MERGE_REF_RE.findall(merges.group(1))
+        ] if merges else []
+        self._suffix_before_merges = suffix[:merges.start()] if merges else suffix
+        self._suffix_after_merges = suffix[merges.end():] if merges else ""
+
+    def _add_images(self, path: Path, sheet_rels: str, images: dict[str, tuple[str, int, int]]):
+        """Добавляет в рисунок листа привязки картинок, байты которых задаются при рендеринге"""
+        targets = _relationships(sheet_rels, self.sheet_part)
+        drawing_part = next(
+            (target for target in targets.values() if target.startswith("xl/drawings/")), None,
+        )
+        if drawing_part is None:
+            raise ValueError("Invoice template sheet has no drawing part")
+
+        drawing_xml = self._inflate(path, drawing_part).decode("utf-8")
+        drawing_rels_part = _rels_path(drawing_part)
+        drawing_rels = (
+            self._inflate(path, drawing_rels_part).decode("utf-8") if drawing_rels_part in self._raw
+            else '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                 '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                 '</Relationships>'
+        )
+
+        media_index = sum(1 for name in self._names if name.startswith("xl/media/"))
+        shape_id = max((int(n) for n in _DRAWING_ID_RE.findall(drawing_xml)), default=0)
+        anchors = []
+        for name, (anchor, width, height) in images.items():
+            media_index += 1
+            shape_id += 1
+            media_part = f"xl/media/image{media_index}.png"
+            rel_id = _next_rel_id(drawing_rels)
+            drawing_rels = drawing_rels.replace(
+                "</Relationships>",
+                f'<Relationship Id="{rel_id}" Type="{_IMAGE_REL_TYPE}" '
+                f'Target="../media/{posixpath.basename(media_part)}"/></Relationships>',
+            )
+            column, row = coordinate_from_string(anchor)
+            cx, cy = width * _EMU_PER_PIXEL, height * _EMU_PER_PIXEL
+            anchors.append(
+                f"<xdr:oneCellAnchor><xdr:from><xdr:col>{column_index_from_string(column) - 1}</xdr:col>"
+                f"<xdr:colOff>0</xdr:colOff><xdr:row>{row - 1}</xdr:row><xdr:rowOff>0</xdr:rowOff></xdr:from>"
+                f'<xdr:ext cx="{cx}" cy="{cy}"/><xdr:pic><xdr:nvPicPr>'
+                f'<xdr:cNvPr id="{shape_id}" name="{escape(name)}"/>'
+                f'<xdr:cNvPicPr><a:picLocks noChangeAspect="1"/></xdr:cNvPicPr></xdr:nvPicPr>'
+                f'<xdr:blipFill><a:blip xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+                f'r:embed="{rel_id}"/><a:stretch><a:fillRect/></a:stretch></xdr:blipFill>'
+                f'<xdr:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+                f'<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></xdr:spPr></xdr:pic>'
+                f"<xdr:clientData/></xdr:oneCellAnchor>"
+            )
+            self._image_parts[name] = media_part
+
+        if "<xdr:wsDr" not in drawing_xml:
+            raise ValueError("Unsupported drawing markup in the invoice template")
+        drawing_xml = drawing_xml.replace("</xdr:wsDr>", "".join(anchors) + "</xdr:wsDr>")
+        self._raw[drawing_part] = ZipEntry.deflate(drawing_part, drawing_xml.encode("utf-8"))
+        self._raw[drawing_rels_part] = ZipEntry.deflate(drawing_rels_part, drawing_rels.encode("utf-8"))
+        if drawing_rels_part not in self._names:
+            self._names.append(drawing_rels_part)
+        self._names.extend(self._image_parts.values())
+
+    def _compile_content_types(self):
+        # Убираем Override для частей, которых нет в пакете (удалённые комментарии)
+        xml = self._parts[_CONTENT_TYPES].decode("utf-8")
+        present = set(self._names)
+        xml = _OVERRIDE_RE.sub(lambda m: m.group(0) if m.group(1) in present else "", xml)
+        if self._image_parts and 'Extension="png"' not in xml:
+            xml = xml.replace(
+                "<Override", '<Default Extension="png" ContentType="image/png"/><Override', 1,
+            )
+        self._raw[_CONTENT_TYPES] = ZipEntry.deflate(_CONTENT_TYPES, xml.encode("utf-8"))
+
+    @property
+    def size(self) -> int:
+        return sum(len(entry.compressed) for entry in self._raw.values())
+
+    def render_sheet(self, cells: dict, rows: list[dict]) -> str:
+        """XML листа: cells — значения слотов по ссылке, rows — значения колонок для каждой записи.
+
+        Без записей строка-образец остаётся пустой.
+        """
+        rows = rows or [{}]
+        shift = len(rows) - 1
+        out = [self._prefix]
+        if self._dimension:
+            start, column, row = self._dimension
+            out.append(f'<dimension ref="{start}:{column}{row + shift if row > self.repeat_row else row}"/>')
+        out.append(self._prefix_after_dimension)
+
+        _render_tokens(self._head, 0, cells, out)
+        for index, values in enumerate(rows):
+            _render_tokens(self._row, index, values, out)
+        _render_tokens(self._tail, shift, cells, out)
+
+        out.append(self._suffix_before_merges)
+        merges = []
+        for c1, r1, c2, r2 in self._merges:
+            if r1 == r2 == self.repeat_row:
+                merges.extend(f'<mergeCell ref="{c1}{r1 + i}:{c2}{r2 + i}"/>' for i in range(len(rows)))
+            else:
+                r1 = r1 + shift if r1 > self.repeat_row else r1
+                r2 = r2 + shift if r2 > self.repeat_row else r2
+                merges.append(f'<mergeCell ref="{c1}{r1}:{c2}{r2}"/>')
+        if merges:
+            out.append(f'<mergeCells count="{len(merges)}">{"".join(merges)}</mergeCells>')
+        out.append(self._suffix_after_merges)
+        return "".join(out)
+
+    def render(self, cells: dict, rows: list[dict], images: dict[str, bytes] | None = None) -> bytes:
+        """Собирает xlsx: пережимается только лист, картинки кладутся без сжатия"""
+        sheet = ZipEntry.deflate(
+            self.sheet_part, self.render_sheet(cells, rows).encode("utf-8"), self.deflate_level,
+        )
+        images = images or {}
+        entries = []
+        for name in self._names:
+            if name == self.sheet_part:
+                entries.append(sheet)
+            elif name in self._raw:
+                entries.append(self._raw[name])
+        for key, part in self._image_parts.items():
+            entries.append(ZipEntry.store(part, images[key]))
+        return write_zip(entries)
@@ -0,0 +1,156 @@
+"""
+Сборка OOXML-пакетов (.docx/.xlsx) из заранее сжатых частей.
+
+Неизменные части шаблона сжимаются один раз при компиляции (или берутся
+из исходного архива уже сжатыми), а при рендеринге копируются в архив как
+есть. Пережимаются только изменившиеся части.
+"""
+import struct
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+_ZIP64_END_OF_CENTRAL_DIR = struct.Struct("<IQHHIIQQQQ")
+_ZIP64_LOCATOR = struct.Struct("<IIQI")
+
+_ZIP_VERSION = 20
+_ZIP64_VERSION = 45
+_ZIP64_EXTRA_ID = 0x0001
+# Создатель — Unix (как у zipfile): к нему относятся права в _EXTERNAL_ATTR
+_MADE_BY_UNIX = 3 << 8
+_ZIP_STORED = 0
+_ZIP_DEFLATED = 8
+_FLAG_UTF8 = 0x800
+_ZIP32_LIMIT = 0xFFFFFFFF
+_ZIP32_MAX_ENTRIES = 0xFFFF
+# Права rw------- как у zipfile.writestr
+_EXTERNAL_ATTR = 0o600 << 16
+
+
+def _dos_datetime(timestamp: float) -> tuple[int, int]:
+    t = time.localtime(timestamp)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((max(t.tm_year, 1980) - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+@dataclass(frozen=True)
+class ZipEntry:
+    """Сжатая (deflate) или сохранённая без сжатия часть пакета"""
+
+    name: str
+    crc: int
+    size: int
+    compressed: bytes
+    method: int = _ZIP_DEFLATED
+
+    @classmethod
+    def deflate(cls, name: str, data: bytes, level: int = 6) -> "ZipEntry":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        compressed = compressor.compress(data) + compressor.flush()
+        return cls(name=name, crc=zlib.crc32(data), size=len(data), compressed=compressed)
+
+    @classmethod
+    def store(cls, name: str, data: bytes) -> "ZipEntry":
+        """Часть без сжатия — для уже сжатых данных (PNG)"""
+        return cls(name=name, crc=zlib.crc32(data), size=len(data), compressed=data, method=_ZIP_STORED)
+
+
+def read_zip_entries(path: Path) -> list[ZipEntry]:
+    """Читает части архива в исходном сжатом виде, без распаковки"""
+    entries = []
+    with open(path, "rb") as f, zipfile.ZipFile(f) as zf:
+        for info in zf.infolist():
+            if info.compress_type not in (_ZIP_STORED, _ZIP_DEFLATED):
+                raise ValueError(f"Unsupported compression in {path}: {info.filename}")
+            f.seek(info.header_offset)
+            header = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+            f.seek(header[9] + header[10], 1)
+            entries.append(ZipEntry(
+                name=info.filename,
+                crc=info.CRC,
+                size=info.file_size,
+                compressed=f.read(info.compress_size),
+                method=info.compress_type,
+            ))
+    return entries
+
+
+def _zip64_extra(*values: int) -> bytes:
+    """Дополнительное поле ZIP64 с 8-байтными значениями"""
+    return struct.pack(f"<HH{len(values)}Q", _ZIP64_EXTRA_ID, 8 * len(values), *values)
+
+
+class ZipStreamWriter:
+    """Пишет zip-архив по частям: каждая часть отдаётся сразу, центральный каталог — в конце.
+
+    В памяти остаются только записи центрального каталога, поэтому архив
+    можно отправлять клиенту потоком, не собирая его целиком. Архив больше
+    4 ГиБ или с числом частей больше 65535 пишется в формате ZIP64: размеры
+    и смещения, не помещающиеся в 32 бита, уходят в дополнительные поля, а
+    в конце добавляются запись ZIP64 и её указатель. Небольшие пакеты
+    (.docx/.xlsx) остаются обычным zip.
+    """
+
+    def __init__(self, timestamp: float | None = None):
+        self._dos_time, self._dos_date = _dos_datetime(time.time() if timestamp is None else timestamp)
+        self._central: list[bytes] = []
+        self.offset = 0
+
+    def add(self, entry: ZipEntry) -> bytes:
+        """Локальный заголовок и данные части"""
+        name = entry.name.encode("utf-8")
+        flags = 0 if entry.name.isascii() else _FLAG_UTF8
+        compressed_size = len(entry.compressed)
+
+        # В локальном заголовке ZIP64 несёт оба размера, в каталоге — только переполненные поля
+        large = entry.size >= _ZIP32_LIMIT or compressed_size >= _ZIP32_LIMIT
+        local_extra = _zip64_extra(entry.size, compressed_size) if large else b""
+        central_values = [entry.size, compressed_size] if large else []
+        if self.offset >= _ZIP32_LIMIT:
+            central_values.append(self.offset)
+        central_extra = _zip64_extra(*central_values) if central_values else b""
+        version = _ZIP64_VERSION if central_extra else _ZIP_VERSION
+
+        sizes = (_ZIP32_LIMIT, _ZIP32_LIMIT) if large else (compressed_size, entry.size)
+        header = _LOCAL_HEADER.pack(
+            0x04034B50, version, flags, entry.method, self._dos_time, self._dos_date,
+            entry.crc, *sizes, len(name), len(local_extra),
+        )
+        self._central.append(_CENTRAL_HEADER.pack(
+            0x02014B50, _MADE_BY_UNIX | version, version, flags, entry.method, self._dos_time, self._dos_date,
+            entry.crc, *sizes, len(name), len(central_extra), 0, 0, 0,
+            _EXTERNAL_ATTR, min(self.offset, _ZIP32_LIMIT),
+        ) + name + central_extra)
+        self.offset += len(header) + len(name) + len(local_extra) + compressed_size
+        return b"".join((header, name, local_extra, entry.compressed))
+
+    def finish(self) -> bytes:
+        """Центральный каталог и завершающая запись (с записью ZIP64, если нужна)"""
+        central_dir = b"".join(self._central)
+        count = len(self._central)
+        start, size = self.offset, len(central_dir)
+        zip64 = b""
+        if count >= _ZIP32_MAX_ENTRIES or start >= _ZIP32_LIMIT or size >= _ZIP32_LIMIT:
+            zip64 = _ZIP64_END_OF_CENTRAL_DIR.pack(
+                0x06064B50, _ZIP64_END_OF_CENTRAL_DIR.size - 12, _MADE_BY_UNIX | _ZIP64_VERSION, _ZIP64_VERSION,
+                0, 0, count, count, size, start,
+            ) + _ZIP64_LOCATOR.pack(0x07064B50, 0, start + size, 1)
+        return central_dir + zip64 + _END_OF_CENTRAL_DIR.pack(
+            0x06054B50, 0, 0,
+            min(count, _ZIP32_MAX_ENTRIES), min(count, _ZIP32_MAX_ENTRIES),
+            min(size, _ZIP32_LIMIT), min(start, _ZIP32_LIMIT), 0,
+        )
+
+
+def write_zip(entries: list[ZipEntry], timestamp: float | None = None) -> bytes:
+    """Собирает zip-архив из готовых сжатых частей"""
+    writer = ZipStreamWriter(timestamp)
+    chunks = [writer.add(entry) for entry in entries]
+    chunks.append(writer.finish())
+    return b"".join(chunks)
@@ -1,14 +1,42 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.database import engine, Base
-from app.routers import auth, banks, services, clients, contracts, templates
+from app.document.office_pool import office_pool
+from app.document.pdf_limiter import pdf_limiter
+from app.document.render_pool import render_pool
+from app.config import settings
+from app.routers import auth, banks, services, clients, contracts, templates, metrics, jobs
+from app.services.bank_index import bank_index
+from app.services.cbr_sync import cbr_sync
+from app.services.job_handlers import register_job_handlers
+from app.services.job_queue import job_backend
+from app.services.jobs import job_manager
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Прогреваем LibreOffice и процессы рендеринга до первого запроса
+    if office_pool.enabled:
+        await asyncio.to_thread(office_pool.start)
+    await asyncio.to_thread(render_pool.start)
+    register_job_handlers(job_backend)
+    # В режиме postgres задачи выполняет python -m app.worker, API только ставит их в очередь
+    if job_backend is job_manager:
+        job_manager.start()
+    if settings.bank_index_enabled:
+        await bank_index.start()
+    if settings.cbr_sync_enabled:
+        cbr_sync.start()
     yield
+    await cbr_sync.stop()
+    await bank_index.stop()
+    await job_manager.stop()
+    pdf_limiter.shutdown()
+    await asyncio.to_thread(render_pool.stop)
+    await asyncio.to_thread(office_pool.stop)
 
 
 app = FastAPI(title="Contract Generator API", lifespan=lifespan)
@@ -27,6 +55,8 @@ app.include_router(services.router)
 app.include_router(clients.router)
 app.include_router(contracts.router)
 app.include_router(templates.router)
+app.include_router(metrics.router)
+app.include_router(jobs.router)
 
 @app.get("/api/health")
 async def health():
@@ -1,7 +1,7 @@
 from datetime import date, datetime
 from decimal import Decimal
 from typing import Optional
-from sqlalchemy import ForeignKey, String, Text, Numeric, Date, DateTime, Table, Column, Integer
+from sqlalchemy import ForeignKey, String, Text, Numeric, Date, DateTime, Table, Column, Integer, Float, Index, Computed
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -24,6 +24,8 @@ contract_services = Table(
     Column("contract_id", Integer, ForeignKey("contracts.id", ondelete="CASCADE"), primary_key=True),
     Column("service_id", Integer, ForeignKey("services.id", ondelete="CASCADE"), primary_key=True),
 )
+# Первичный ключ начинается с contract_id: для поиска по услуге нужен свой индекс
+Index("ix_contract_services_service_id", contract_services.c.service_id)
 
 
 class Bank(Base):
@@ -33,10 +35,22 @@ class Bank(Base):
     name: Mapped[str] = mapped_column(String(255))
     bik: Mapped[str] = mapped_column(String(9), unique=True, index=True)
     correspondent_account: Mapped[str] = mapped_column(String(20))
+    # Поля поиска в нижнем регистре для триграммного индекса
+    search_text: Mapped[str] = mapped_column(Text, Computed("lower(name || ' ' || bik)", persisted=True))
+    # Число клиентов банка; ведёт триггер на clients (app.services.bank_usage)
+    usage_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     clients: Mapped[list["Client"]] = relationship(back_populates="bank")
 
 
+# Индексы списков: ключи курсорной пагинации (app.pagination) и поиск подстроки (app.search)
+Index(
+    "ix_banks_search_text_trgm", Bank.search_text,
+    postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"},
+)
+Index("ix_banks_usage_count_name_id", Bank.usage_count.desc(), Bank.name, Bank.id)
+
+
 class Service(Base):
     __tablename__ = "services"
 
@@ -44,12 +58,22 @@ class Service(Base):
     name: Mapped[str] = mapped_column(String(255))
     price: Mapped[Decimal] = mapped_column(Numeric(12, 2))
     payment_terms: Mapped[str] = mapped_column(Text)
+    search_text: Mapped[str] = mapped_column(
+        Text, Computed("lower(name || ' ' || payment_terms)", persisted=True)
+    )
 
     contracts: Mapped[list["Contract"]] = relationship(
         secondary=contract_services, back_populates="services"
     )
 
 
+Index("ix_services_name_id", Service.name, Service.id)
+Index(
+    "ix_services_search_text_trgm", Service.search_text,
+    postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"},
+)
+
+
 class Client(Base):
     __tablename__ = "clients"
 
@@ -83,11 +107,24 @@ class Client(Base):
     passport_issued_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    search_text: Mapped[str] = mapped_column(Text, Computed(
+        "lower(name || ' ' || coalesce(inn, '') || ' ' || last_name || ' ' || first_name"
+        " || ' ' || coalesce(phone, '') || ' ' || coalesce(email, ''))",
+        persisted=True,
+    ))
 
     bank: Mapped[Optional["Bank"]] = relationship(back_populates="clients")
     contracts: Mapped[list["Contract"]] = relationship(back_populates="client")
 
 
+Index("ix_clients_created_at_id", Client.created_at.desc(), Client.id.desc())
+Index("ix_clients_bank_id", Client.bank_id)
+Index(
+    "ix_clients_search_text_trgm", Client.search_text,
+    postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"},
+)
+
+
 class Template(Base):
     __tablename__ = "templates"
 
@@ -111,9 +148,65 @@ class Contract(Base):
     template_id: Mapped[Optional[int]] = mapped_column(ForeignKey("templates.id"), nullable=True)
     date: Mapped[date] = mapped_column(Date, default=date.today)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    search_text: Mapped[str] = mapped_column(Text, Computed("lower(number)", persisted=True))
 
     client: Mapped["Client"] = relationship(back_populates="contracts")
     template: Mapped[Optional["Template"]] = relationship(back_populates="contracts")
     services: Mapped[list["Service"]] = relationship(
         secondary=contract_services, back_populates="contracts"
     )
+
+
+Index("ix_contracts_created_at_id", Contract.created_at.desc(), Contract.id.desc())
+Index("ix_contracts_client_id", Contract.client_id)
+Index("ix_contracts_template_id", Contract.template_id)
+Index("ix_contracts_date_id", Contract.date, Contract.id)
+Index(
+    "ix_contracts_search_text_trgm", Contract.search_text,
+    postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"},
+)
+
+
+class RenderJob(Base):
+    """Фоновая задача в общей очереди (режим jobs_backend = "postgres")"""
+    __tablename__ = "render_jobs"
+    __table_args__ = (
+        Index("ix_render_jobs_claim", "kind", "status", "run_after"),
+        Index("ix_render_jobs_finished_at", "finished_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50))
+    params: Mapped[dict] = mapped_column(JSON)
+    status: Mapped[str] = mapped_column(String(20))
+    progress: Mapped[float] = mapped_column(Float, default=0.0)
+    message: Mapped[str] = mapped_column(Text, default="")
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    data: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # Имя файла-результата в каталоге задачи на общем хранилище (jobs_dir/<id>/)
+    result_filename: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    result_media_type: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer)
+    # Не раньше этого момента задачу можно взять (отложенный повтор)
+    run_after: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Захват обработчиком: после locked_until задачу может забрать другой обработчик
+    locked_by: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class CBRImportState(Base):
+    """Отпечаток последнего загруженного архива справочника БИК (app.services.cbr_import)"""
+    __tablename__ = "cbr_import_state"
+
+    # Адрес архива: состояние своё для каждого источника
+    source: Mapped[str] = mapped_column(String(255), primary_key=True)
+    etag: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    last_modified: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # Последняя проверка (в том числе без изменений) и последняя запись в banks
+    checked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    imported_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,224 @@
+"""
+Курсорная (keyset) пагинация списков.
+
+Страница по номеру (OFFSET) заставляет БД пройти все предыдущие строки,
+поэтому глубокие страницы дорожают линейно. Курсор хранит ключ сортировки
+последней строки страницы, и следующая страница начинается условием
+«строго после этого ключа» по составному индексу.
+
+Списки всегда сортируются с id в конце ключа, поэтому порядок однозначен
+и в обоих режимах; next_cursor возвращается и при запросе по номеру
+страницы, так что клиент может перейти на курсоры с любой страницы.
+Курсор непрозрачен: base64 от JSON с именем списка и значениями ключа.
+
+Общее число строк считается по выбору клиента (параметр count):
+exact — count(*) OVER () в том же запросе, что и страница, без второго
+прохода по таблице; estimated — оценка планировщика (reltuples таблицы
+без фильтра, иначе число строк из EXPLAIN); none — без подсчёта, только
+has_more. Подсказкам при вводе достаточно none.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Literal
+
+from fastapi import HTTPException, status
+from sqlalchemy import ColumnElement, Select, Table, and_, func, or_, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_NONE = "none"
+CountMode = Literal["exact", "estimated", "none"]
+
+
+@dataclass(frozen=True)
+class KeysetOrder:
+    """Порядок списка: имя (для проверки курсора) и ключи (выражение, по убыванию)"""
+    name: str
+    keys: tuple[tuple[ColumnElement, bool], ...]
+
+    def order_by(self) -> list[ColumnElement]:
+        return [expr.desc() if descending else expr.asc() for expr, descending in self.keys]
+
+    def after(self, values: list) -> ColumnElement:
+        """Условие «строка идёт после ключа values» в этом порядке"""
+        directions = {descending for _, descending in self.keys}
+        if len(directions) == 1:
+            # Одно направление: сравнение кортежей, которое Postgres берёт по индексу
+            left = tuple_(*(expr for expr, _ in self.keys))
+            right = tuple_(*values)
+            return left < right if directions.pop() else left > right
+
+        conditions = []
+        for i, (expr, descending) in enumerate(self.keys):
+            equal = [self.keys[j][0] == values[j] for j in range(i)]
+            conditions.append(and_(*equal, expr < values[i] if descending else expr > values[i]))
+        # Избыточная граница по первому ключу: с ней индекс начинает чтение с курсора
+        first, descending = self.keys[0]
+        return and_(first <= values[0] if descending else first >= values[0], or_(*conditions))
+
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    raise TypeError(f"Cannot encode {type(value).__name__} in cursor")
+
+
+def _decode_value(value: dict):
+    if "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    if "d" in value:
+        return date.fromisoformat(value["d"])
+    if "dec" in value:
+        return Decimal(value["dec"])
+    return value
+
+
+def _matches_key(value: Any, expr: ColumnElement) -> bool:
+    """Значение из курсора того же типа, что и ключ (None — для ключа с NULL)"""
+    if value is None:
+        return True
+    try:
+        expected = expr.type.python_type
+    except NotImplementedError:
+        # Тип выражения неизвестен: годится любое скалярное значение JSON
+        return not isinstance(value, (dict, list))
+    if isinstance(value, bool) and expected is not bool:
+        return False
+    if expected is float:
+        return isinstance(value, (int, float))
+    if expected is date:
+        # datetime — подкласс date
+        return type(value) is date
+    return isinstance(value, expected)
+
+
+def encode_cursor(order: KeysetOrder, values) -> str:
+    payload = json.dumps([order.name, list(values)], default=_encode_value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(order: KeysetOrder, cursor: str) -> list:
+    """Значения ключа из курсора; неверный или чужой курсор — 400"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        name, values = json.loads(payload, object_hook=_decode_value)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        name, values = None, None
+    if (
+        name != order.name
+        or not isinstance(values, list)
+        or len(values) != len(order.keys)
+        or not all(_matches_key(value, expr) for value, (expr, _) in zip(values, order.keys))
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+@dataclass
+class Page:
+    items: list
+    next_cursor: str | None
+    total: int | None  # None при count=none
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+    def pages(self, per_page: int) -> int | None:
+        if self.total is None:
+            return None
+        return (self.total + per_page - 1) // per_page if per_page > 0 else 1
+
+    def response(self, page: int, per_page: int) -> dict:
+        """Поля ответа списка: items, total, page, pages, next_cursor, has_more"""
+        return {
+            "items": self.items,
+            "total": self.total,
+            "page": page,
+            "pages": self.pages(per_page),
+            "next_cursor": self.next_cursor,
+            "has_more": self.has_more,
+        }
+
+
+async def count_rows(db: AsyncSession, query: Select) -> int:
+    """Точное число строк запроса отдельным запросом"""
+    count_query = select(func.count()).select_from(query.order_by(None).subquery())
+    return (await db.execute(count_query)).scalar() or 0
+
+
+async def estimate_rows(db: AsyncSession, query: Select, table: Table) -> int:
+    """Оценка числа строк по статистике Postgres без прохода по таблице"""
+    if query.whereclause is None:
+        reltuples = (await db.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": table.name},
+        )).scalar()
+        # -1: таблицу ещё не анализировали, статистики нет
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+        return await count_rows(db, query)
+
+    # Параметры передаются драйверу отдельно: поиск пользователя не попадает в текст SQL
+    compiled = query.order_by(None).compile(dialect=db.bind.dialect)
+    params = compiled.construct_params()
+    parameters = tuple(params[name] for name in compiled.positiontup or ())
+    connection = await db.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", parameters)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def fetch_page(
+    db: AsyncSession,
+    query: Select,
+    order: KeysetOrder,
+    per_page: int,
+    page: int = 1,
+    cursor: str | None = None,
+    count: CountMode = COUNT_EXACT,
+) -> Page:
+    """Страница списка, курсор следующей и общее число строк в режиме count.
+
+    С курсором номер страницы не учитывается.
+    """
+    base_query = query
+    query = query.add_columns(*(expr.label(f"_key{i}") for i, (expr, _) in enumerate(order.keys)))
+    # Окно считается до LIMIT, но после условия курсора: с курсором оно не даёт общего числа
+    window = count == COUNT_EXACT and not cursor
+    if window:
+        query = query.add_columns(func.count().over().label("_total"))
+    query = query.order_by(*order.order_by())
+    if cursor:
+        query = query.where(order.after(decode_cursor(order, cursor)))
+    else:
+        query = query.offset((page - 1) * per_page)
+
+    # Лишняя строка показывает, есть ли следующая страница
+    rows = (await db.execute(query.limit(per_page + 1))).all()
+    items = [row[0] for row in rows[:per_page]]
+    next_cursor = None
+    if per_page > 0 and len(rows) > per_page:
+        next_cursor = encode_cursor(order, rows[per_page - 1][1:len(order.keys) + 1])
+
+    total = None
+    if window and rows:
+        total = rows[0]._total
+    elif count == COUNT_EXACT:
+        # Страница за концом списка или курсор: окно не дало числа
+        total = await count_rows(db, base_query)
+    elif count == COUNT_ESTIMATED:
+        # Последний ключ порядка — id основной таблицы списка
+        total = await estimate_rows(db, base_query, order.keys[-1][0].table)
+    return Page(items=items, next_cursor=next_cursor, total=total)
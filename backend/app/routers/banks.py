@@ -1,60 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, func, or_, desc
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
 from app.database import get_db
-from app.models import Bank, Client
-from app.schemas import BankCreate, BankUpdate, BankResponse, BankListResponse, CBRImportResult
-from app.services.cbr_import import CBRImportService
+from app.pagination import COUNT_EXACT, CountMode, KeysetOrder, fetch_page
+from app.search import search_filter, search_rank_order
+from app.models import Bank
+from app.schemas import BankCreate, BankUpdate, BankResponse, BankListResponse, BankLookupItem, CBRImportResult
+from app.services.bank_index import bank_index
+from app.services.cbr_import import IMPORT_RUNNING_MESSAGE, CBRImportService
 
 router = APIRouter(prefix="/api/banks", tags=["banks"], dependencies=[Depends(get_current_user)])
 
+# Sort by usage (most used first), then by name; index ix_banks_usage_count_name_id
+BANKS_ORDER = KeysetOrder("banks", ((Bank.usage_count, True), (Bank.name, False), (Bank.id, False)))
+
 
 @router.get("", response_model=BankListResponse)
 async def get_banks(
     page: int = 1,
     per_page: int = 10,
     search: str = "",
+    cursor: str | None = None,
+    count: CountMode = COUNT_EXACT,
+    rank: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
-    # Subquery to count clients per bank
-    client_count = (
-        select(Client.bank_id, func.count(Client.id).label("usage_count"))
-        .group_by(Client.bank_id)
-        .subquery()
-    )
-
-    query = (
-        select(Bank)
-        .outerjoin(client_count, Bank.id == client_count.c.bank_id)
-    )
+    query = select(Bank)
 
     if search:
-        search_filter = or_(
-            Bank.name.ilike(f"%{search}%"),
-            Bank.bik.ilike(f"%{search}%")
-        )
-        query = query.where(search_filter)
+        query = query.where(search_filter(Bank.search_text, search))
 
-    count_query = select(func.count()).select_from(Bank)
-    if search:
-        count_query = count_query.where(search_filter)
+    order = BANKS_ORDER
+    if search and rank:
+        order = search_rank_order("banks", Bank.search_text, search, Bank.id)
+    result = await fetch_page(db, query, order, per_page, page, cursor, count)
 
-    total = (await db.execute(count_query)).scalar() or 0
-    pages = (total + per_page - 1) // per_page
+    return BankListResponse(**result.response(page, per_page))
 
-    # Sort by usage (most used first), then by name
-    query = (
-        query
-        .order_by(desc(func.coalesce(client_count.c.usage_count, 0)), Bank.name)
-        .offset((page - 1) * per_page)
-        .limit(per_page)
-    )
-    result = await db.execute(query)
-    items = result.scalars().all()
 
-    return BankListResponse(items=items, total=total, page=page, pages=pages)
+@router.get("/lookup", response_model=list[BankLookupItem])
+async def lookup_banks(
+    q: str = "",
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """Typeahead by BIK prefix and name word prefixes, served from the in-memory index."""
+    if bank_index.loaded:
+        return bank_index.lookup(q, limit)
+
+    # Index not loaded yet (startup or DB error): same order from the database
+    query = select(Bank.id, Bank.bik, Bank.name)
+    if q.strip():
+        query = query.where(search_filter(Bank.search_text, q))
+    result = await db.execute(query.order_by(*BANKS_ORDER.order_by()).limit(limit))
+    return [row._asdict() for row in result.all()]
 
 
 @router.get("/{bank_id}", response_model=BankResponse)
@@ -72,6 +73,7 @@ async def create_bank(data: BankCreate, db: AsyncSession = Depends(get_db)):
     db.add(bank)
     await db.commit()
     await db.refresh(bank)
+    bank_index.schedule_refresh()
     return bank
 
 
@@ -85,6 +87,7 @@ async def update_bank(bank_id: int, data: BankUpdate, db: AsyncSession = Depends
         setattr(bank, key, value)
     await db.commit()
     await db.refresh(bank)
+    bank_index.schedule_refresh()
     return bank
 
 
@@ -96,14 +99,22 @@ async def delete_bank(bank_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bank not found")
     await db.delete(bank)
     await db.commit()
+    bank_index.schedule_refresh()
 
 
 @router.post("/import-cbr", response_model=CBRImportResult)
-async def import_from_cbr(db: AsyncSession = Depends(get_db)):
-    """Import bank directory from Central Bank of Russia."""
+async def import_from_cbr(force: bool = False, db: AsyncSession = Depends(get_db)):
+    """Import bank directory from Central Bank of Russia.
+
+    Skipped when the archive matches the last import, unless force is set.
+    """
     service = CBRImportService()
-    result = await service.import_banks(db)
+    result = await service.import_banks(db, force=force)
+    if not result.skipped:
+        bank_index.schedule_refresh()
 
+    if result.error_messages == [IMPORT_RUNNING_MESSAGE]:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=IMPORT_RUNNING_MESSAGE)
     if not result.success:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -1,15 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, func, or_
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.auth import get_current_user
 from app.database import get_db
+from app.pagination import COUNT_EXACT, CountMode, KeysetOrder, fetch_page
+from app.search import search_filter, search_rank_order
 from app.models import Client, Contract
 from app.schemas import ClientCreate, ClientUpdate, ClientResponse, ClientListResponse, ContractResponse
 
 router = APIRouter(prefix="/api/clients", tags=["clients"], dependencies=[Depends(get_current_user)])
 
+# Новые клиенты первыми; индекс ix_clients_created_at_id
+CLIENTS_ORDER = KeysetOrder("clients", ((Client.created_at, True), (Client.id, True)))
+
 
 # Сокращённые названия организационно-правовых форм
 ORG_FORMS_SHORT = {
@@ -50,33 +55,22 @@ async def get_clients(
     page: int = 1,
     per_page: int = 10,
     search: str = "",
+    cursor: str | None = None,
+    count: CountMode = COUNT_EXACT,
+    rank: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     query = select(Client).options(selectinload(Client.bank))
 
+    order = CLIENTS_ORDER
     if search:
-        search_filter = or_(
-            Client.name.ilike(f"%{search}%"),
-            Client.inn.ilike(f"%{search}%"),
-            Client.last_name.ilike(f"%{search}%"),
-            Client.first_name.ilike(f"%{search}%"),
-            Client.phone.ilike(f"%{search}%"),
-            Client.email.ilike(f"%{search}%")
-        )
-        query = query.where(search_filter)
-
-    count_query = select(func.count()).select_from(Client)
-    if search:
-        count_query = count_query.where(search_filter)
-
-    total = (await db.execute(count_query)).scalar() or 0
-    pages = (total + per_page - 1) // per_page
+        query = query.where(search_filter(Client.search_text, search))
+        if rank:
+            order = search_rank_order("clients", Client.search_text, search, Client.id)
 
-    query = query.order_by(Client.created_at.desc()).offset((page - 1) * per_page).limit(per_page)
-    result = await db.execute(query)
-    items = result.scalars().all()
+    result = await fetch_page(db, query, order, per_page, page, cursor, count)
 
-    return ClientListResponse(items=items, total=total, page=page, pages=pages)
+    return ClientListResponse(**result.response(page, per_page))
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
@@ -1,60 +1,57 @@
 from datetime import date
 from io import BytesIO
 from urllib.parse import quote
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy import select, func, or_
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.auth import get_current_user
+from app.config import settings
 from app.database import get_db
+from app.pagination import COUNT_EXACT, CountMode, KeysetOrder, fetch_page
 from app.models import Contract, Client, Service, Template
 from app.schemas import ContractCreate, ContractUpdate, ContractResponse, ContractListResponse
-from app.document import generate_contract_document, generate_contract_pdf
-from app.document.invoice_generator import generate_invoice
-from app.document.pdf_generator import generate_invoice_pdf
+from app.document.export import iter_contract_snapshots, stream_export
+from app.document.pdf_limiter import PdfQueueFull
+from app.document.rendering import (
+    FORMAT_CONTRACT_DOCX,
+    FORMAT_CONTRACT_PDF,
+    FORMAT_INVOICE_PDF,
+    FORMAT_INVOICE_XLSX,
+    FORMATS,
+    render_document_async,
+)
+from app.document.snapshot import ContractSnapshot
+from app.services.contracts import filter_contracts, find_contract_ids, find_contract_snapshot
 
 router = APIRouter(prefix="/api/contracts", tags=["contracts"], dependencies=[Depends(get_current_user)])
 
+# Новые договоры первыми; индекс ix_contracts_created_at_id
+CONTRACTS_ORDER = KeysetOrder("contracts", ((Contract.created_at, True), (Contract.id, True)))
+
 
 @router.get("", response_model=ContractListResponse)
 async def get_contracts(
     page: int = 1,
     per_page: int = 10,
     search: str = "",
+    date_from: date | None = None,
+    date_to: date | None = None,
+    cursor: str | None = None,
+    count: CountMode = COUNT_EXACT,
     db: AsyncSession = Depends(get_db)
 ):
     query = select(Contract).options(
         selectinload(Contract.client).selectinload(Client.bank),
         selectinload(Contract.services)
     )
+    query = filter_contracts(query, search, date_from, date_to)
 
-    if search:
-        query = query.join(Client).where(
-            or_(
-                Contract.number.ilike(f"%{search}%"),
-                Client.name.ilike(f"%{search}%")
-            )
-        )
-
-    count_query = select(func.count()).select_from(Contract)
-    if search:
-        count_query = count_query.join(Client).where(
-            or_(
-                Contract.number.ilike(f"%{search}%"),
-                Client.name.ilike(f"%{search}%")
-            )
-        )
+    result = await fetch_page(db, query, CONTRACTS_ORDER, per_page, page, cursor, count)
 
-    total = (await db.execute(count_query)).scalar() or 0
-    pages = (total + per_page - 1) // per_page
-
-    query = query.order_by(Contract.created_at.desc()).offset((page - 1) * per_page).limit(per_page)
-    result = await db.execute(query)
-    items = result.scalars().all()
-
-    return ContractListResponse(items=items, total=total, page=page, pages=pages)
+    return ContractListResponse(**result.response(page, per_page))
 
 
 @router.post("", response_model=ContractResponse, status_code=status.HTTP_201_CREATED)
@@ -94,6 +91,37 @@ async def create_contract(data: ContractCreate, db: AsyncSession = Depends(get_d
     return result.scalar_one()
 
 
+@router.get("/export")
+async def export_contracts(
+    search: str = "",
+    date_from: date | None = None,
+    date_to: date | None = None,
+    formats: list[str] = Query(default=[FORMAT_CONTRACT_DOCX]),
+    db: AsyncSession = Depends(get_db),
+):
+    """Скачать документы отфильтрованных договоров одним zip-архивом.
+
+    Архив отдаётся потоком: файлы попадают в ответ по мере готовности.
+    """
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown or not formats:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown formats: {', '.join(unknown)}. Allowed: {', '.join(FORMATS)}",
+        )
+
+    # Сессия запроса закрывается до отправки ответа, договоры загружаются пачками в своих сессиях
+    ids = await find_contract_ids(db, search, date_from, date_to)
+    snapshots = iter_contract_snapshots(ids, settings.export_batch_size)
+
+    filename = f"contracts_{date.today().isoformat()}.zip"
+    return StreamingResponse(
+        stream_export(snapshots, dict.fromkeys(formats)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=\"{filename}\""},
+    )
+
+
 @router.get("/{contract_id}", response_model=ContractResponse)
 async def get_contract(contract_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
@@ -152,20 +180,30 @@ async def update_contract(contract_id: int, data: ContractUpdate, db: AsyncSessi
     return result.scalar_one()
 
 
-@router.get("/{contract_id}/download")
-async def download_contract(contract_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Contract).options(
-            selectinload(Contract.client).selectinload(Client.bank),
-            selectinload(Contract.services),
-            selectinload(Contract.template)
-        ).where(Contract.id == contract_id)
-    )
-    contract = result.scalar_one_or_none()
-    if not contract:
+async def load_contract_snapshot(contract_id: int, db: AsyncSession) -> ContractSnapshot:
+    """Загружает договор со всеми связями, нужными генераторам, и снимает снимок"""
+    snapshot = await find_contract_snapshot(db, contract_id)
+    if snapshot is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contract not found")
+    return snapshot
+
+
+async def render_contract_file(contract: ContractSnapshot, fmt: str) -> bytes:
+    """Рендерит документ вне цикла событий; при переполнении очереди PDF отвечает 503"""
+    try:
+        return await render_document_async(contract, fmt)
+    except PdfQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="PDF conversion queue is full",
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
-    doc_bytes = generate_contract_document(contract)
+
+@router.get("/{contract_id}/download")
+async def download_contract(contract_id: int, db: AsyncSession = Depends(get_db)):
+    contract = await load_contract_snapshot(contract_id, db)
+    doc_bytes = await render_contract_file(contract, FORMAT_CONTRACT_DOCX)
 
     filename = f"contract_{contract.number}.docx"
     encoded_filename = quote(filename, safe='')
@@ -181,18 +219,8 @@ async def download_contract(contract_id: int, db: AsyncSession = Depends(get_db)
 
 @router.get("/{contract_id}/download-pdf")
 async def download_contract_pdf(contract_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Contract).options(
-            selectinload(Contract.client).selectinload(Client.bank),
-            selectinload(Contract.services),
-            selectinload(Contract.template)
-        ).where(Contract.id == contract_id)
-    )
-    contract = result.scalar_one_or_none()
-    if not contract:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contract not found")
-
-    pdf_bytes = await generate_contract_pdf(contract)
+    contract = await load_contract_snapshot(contract_id, db)
+    pdf_bytes = await render_contract_file(contract, FORMAT_CONTRACT_PDF)
 
     filename = f"contract_{contract.number}.pdf"
     encoded_filename = quote(filename, safe='')
@@ -209,17 +237,8 @@ async def download_contract_pdf(contract_id: int, db: AsyncSession = Depends(get
 @router.get("/{contract_id}/invoice")
 async def download_invoice(contract_id: int, db: AsyncSession = Depends(get_db)):
     """Скачать счёт на оплату в формате Excel"""
-    result = await db.execute(
-        select(Contract).options(
-            selectinload(Contract.client),
-            selectinload(Contract.services)
-        ).where(Contract.id == contract_id)
-    )
-    contract = result.scalar_one_or_none()
-    if not contract:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contract not found")
-
-    invoice_bytes = generate_invoice(contract)
+    contract = await load_contract_snapshot(contract_id, db)
+    invoice_bytes = await render_contract_file(contract, FORMAT_INVOICE_XLSX)
 
     filename = f"invoice_{contract.number}.xlsx"
     encoded_filename = quote(filename, safe='')
@@ -236,17 +255,8 @@ async def download_invoice(contract_id: int, db: AsyncSession = Depends(get_db))
 @router.get("/{contract_id}/invoice-pdf")
 async def download_invoice_pdf(contract_id: int, db: AsyncSession = Depends(get_db)):
     """Скачать счёт на оплату в формате PDF"""
-    result = await db.execute(
-        select(Contract).options(
-            selectinload(Contract.client),
-            selectinload(Contract.services)
-        ).where(Contract.id == contract_id)
-    )
-    contract = result.scalar_one_or_none()
-    if not contract:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contract not found")
-
-    pdf_bytes = generate_invoice_pdf(contract)
+    contract = await load_contract_snapshot(contract_id, db)
+    pdf_bytes = await render_contract_file(contract, FORMAT_INVOICE_PDF)
 
     filename = f"invoice_{contract.number}.pdf"
     encoded_filename = quote(filename, safe='')
@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import ValidationError
+
+from app.auth import get_current_user
+from app.schemas import JobCreate, JobResponse
+from app.services.job_queue import job_backend
+from app.services.jobs import JOB_SUCCEEDED, Job, JobQueueFull, UnknownJobKind
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"], dependencies=[Depends(get_current_user)])
+
+
+async def get_job_or_404(job_id: str) -> Job:
+    job = await job_backend.get(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.post("", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(data: JobCreate):
+    """Поставить тяжёлую операцию в очередь; ход выполнения — GET /{id} или /{id}/events"""
+    try:
+        job = await job_backend.submit(data.kind, data.params)
+    except UnknownJobKind:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown job kind: {data.kind}. Allowed: {', '.join(job_backend.kinds)}",
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    except JobQueueFull:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Job queue is full")
+    return job.to_dict()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    return (await get_job_or_404(job_id)).to_dict()
+
+
+@router.get("/{job_id}/events")
+async def get_job_events(job_id: str):
+    """Server-Sent Events: состояние задачи при каждом изменении, поток закрывается по завершении"""
+    job = await get_job_or_404(job_id)
+
+    async def stream():
+        async for event in job_backend.events(job):
+            if event is None:
+                # Комментарий SSE: прокси не закрывают соединение без данных
+                yield ": ping\n\n"
+            else:
+                yield f"event: job\ndata: {JobResponse.model_validate(event).model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Скачать файл-результат завершённой задачи"""
+    job = await get_job_or_404(job_id)
+    if job.status != JOB_SUCCEEDED or job.result_path is None or not job.result_path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job result is not available")
+    return FileResponse(job.result_path, media_type=job.result_media_type, filename=job.result_path.name)
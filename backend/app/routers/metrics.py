@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+
+from app.auth import get_current_user
+from app.document.office_pool import office_pool
+from app.document.pdf_limiter import pdf_limiter
+from app.document.render_cache import render_cache
+from app.document.render_pool import render_pool
+from app.services.bank_index import bank_index
+from app.services.job_queue import job_backend
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"], dependencies=[Depends(get_current_user)])
+
+
+@router.get("")
+async def get_metrics():
+    """Статистика кэшей генерации документов"""
+    # Кэши шаблонов и QR-кодов заполняются там, где идёт рендеринг, то есть в пуле процессов
+    caches = render_pool.cache_stats()
+    return {
+        "template_cache": caches.get("template_cache", {}),
+        "render_cache": render_cache.stats(),
+        "office_pool": office_pool.stats(),
+        "pdf_queue": pdf_limiter.stats(),
+        "render_pool": render_pool.stats(),
+        "qr_cache": caches.get("qr_cache", {}),
+        "jobs": await job_backend.stats(),
+        "bank_index": bank_index.stats(),
+    }
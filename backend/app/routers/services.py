@@ -1,43 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, func, or_
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
 from app.database import get_db
+from app.pagination import COUNT_EXACT, CountMode, KeysetOrder, fetch_page
+from app.search import search_filter, search_rank_order
 from app.models import Service
 from app.schemas import ServiceCreate, ServiceUpdate, ServiceResponse, ServiceListResponse
 
 router = APIRouter(prefix="/api/services", tags=["services"], dependencies=[Depends(get_current_user)])
 
+# По названию; индекс ix_services_name_id
+SERVICES_ORDER = KeysetOrder("services", ((Service.name, False), (Service.id, False)))
+
 
 @router.get("", response_model=ServiceListResponse)
 async def get_services(
     page: int = 1,
     per_page: int = 10,
     search: str = "",
+    cursor: str | None = None,
+    count: CountMode = COUNT_EXACT,
+    rank: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     query = select(Service)
 
+    order = SERVICES_ORDER
     if search:
-        search_filter = or_(
-            Service.name.ilike(f"%{search}%"),
-            Service.payment_terms.ilike(f"%{search}%")
-        )
-        query = query.where(search_filter)
-
-    count_query = select(func.count()).select_from(Service)
-    if search:
-        count_query = count_query.where(search_filter)
-
-    total = (await db.execute(count_query)).scalar() or 0
-    pages = (total + per_page - 1) // per_page
+        query = query.where(search_filter(Service.search_text, search))
+        if rank:
+            order = search_rank_order("services", Service.search_text, search, Service.id)
 
-    query = query.order_by(Service.name).offset((page - 1) * per_page).limit(per_page)
-    result = await db.execute(query)
-    items = result.scalars().all()
+    result = await fetch_page(db, query, order, per_page, page, cursor, count)
 
-    return ServiceListResponse(items=items, total=total, page=page, pages=pages)
+    return ServiceListResponse(**result.response(page, per_page))
 
 
 @router.get("/{service_id}", response_model=ServiceResponse)
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
 from app.database import get_db
+from app.pagination import COUNT_EXACT, CountMode, KeysetOrder, fetch_page
 from app.models import Template, Contract
 from app.schemas import (
     TemplateCreate,
@@ -15,27 +16,26 @@ from app.schemas import (
 
 router = APIRouter(prefix="/api/templates", tags=["templates"], dependencies=[Depends(get_current_user)])
 
+# Шаблон по умолчанию первым, затем новые
+TEMPLATES_ORDER = KeysetOrder(
+    "templates", ((Template.is_default, True), (Template.created_at, True), (Template.id, True))
+)
+
 
 @router.get("", response_model=TemplateListResponse)
 async def get_templates(
     page: int = 1,
     per_page: int = 10,
+    cursor: str | None = None,
+    count: CountMode = COUNT_EXACT,
     db: AsyncSession = Depends(get_db)
 ):
     """Получить список шаблонов с пагинацией"""
     query = select(Template)
 
-    count_query = select(func.count()).select_from(Template)
-    total = (await db.execute(count_query)).scalar() or 0
-    pages = (total + per_page - 1) // per_page if per_page > 0 else 1
-
-    query = query.order_by(Template.is_default.desc(), Template.created_at.desc())
-    query = query.offset((page - 1) * per_page).limit(per_page)
-
-    result = await db.execute(query)
-    items = result.scalars().all()
+    result = await fetch_page(db, query, TEMPLATES_ORDER, per_page, page, cursor, count)
 
-    return TemplateListResponse(items=items, total=total, page=page, pages=pages)
+    return TemplateListResponse(**result.response(page, per_page))
 
 
 @router.get("/default", response_model=TemplateResponse)
@@ -37,6 +37,12 @@ class BankResponse(BankBase):
         from_attributes = True
 
 
+class BankLookupItem(BaseModel):
+    id: int
+    bik: str
+    name: str
+
+
 # Service
 class ServiceBase(BaseModel):
     name: str
@@ -135,30 +141,38 @@ class ContractResponse(BaseModel):
 
 class ContractListResponse(BaseModel):
     items: list[ContractResponse]
-    total: int
+    total: Optional[int]  # None при count=none
     page: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 
 class ClientListResponse(BaseModel):
     items: list[ClientResponse]
-    total: int
+    total: Optional[int]  # None при count=none
     page: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 
 class ServiceListResponse(BaseModel):
     items: list[ServiceResponse]
-    total: int
+    total: Optional[int]  # None при count=none
     page: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 
 class BankListResponse(BaseModel):
     items: list[BankResponse]
-    total: int
+    total: Optional[int]  # None при count=none
     page: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 
 # CBR Import
@@ -167,6 +181,9 @@ class CBRImportResult(BaseModel):
     total_processed: int
     created: int
     updated: int
+    unchanged: int = 0
+    # Архив совпал с последним загруженным: записи не разбирались
+    skipped: bool = False
     errors: int
     error_messages: list[str] = []
     import_date: datetime
@@ -208,6 +225,54 @@ class TemplateResponse(BaseModel):
 
 class TemplateListResponse(BaseModel):
     items: list[TemplateResponse]
-    total: int
+    total: Optional[int]  # None при count=none
     page: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+
+# Jobs
+ExportFormat = Literal["contract-docx", "contract-pdf", "invoice-xlsx", "invoice-pdf"]
+
+
+class JobCreate(BaseModel):
+    kind: str
+    params: dict = {}
+
+
+class ContractJobParams(BaseModel):
+    contract_id: int
+
+
+class BulkExportParams(BaseModel):
+    search: str = ""
+    date_from: date | None = None
+    date_to: date | None = None
+    formats: list[ExportFormat] = ["contract-docx"]
+
+
+class CBRImportParams(BaseModel):
+    # Загрузить архив, даже если он совпадает с последним загруженным
+    force: bool = False
+
+
+class JobResultFile(BaseModel):
+    url: str
+    filename: str
+    media_type: Optional[str] = None
+    size: int
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    progress: float
+    message: str = ""
+    error: Optional[str] = None
+    data: Optional[dict] = None
+    result: Optional[JobResultFile] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
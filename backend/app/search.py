@@ -0,0 +1,41 @@
+"""
+Поиск подстроки по триграммному индексу (pg_trgm).
+
+У клиентов, договоров, банков и услуг есть вычисляемый столбец
+search_text: все поля поиска в нижнем регистре через пробел, с GIN-индексом
+gin_trgm_ops. Условие «search_text LIKE '%строка%'» Postgres берёт по этому
+индексу вместо OR по нескольким ILIKE с полным проходом таблицы. Индекс
+помогает со строки из трёх символов; более короткий запрос читает таблицу
+целиком.
+
+Похожесть (word_similarity) позволяет отдавать первыми лучшие совпадения.
+Ключ такого порядка зависит от строки поиска, поэтому курсор привязан к ней:
+курсор, выданный для одного запроса, для другого отклоняется.
+"""
+import hashlib
+
+from sqlalchemy import ColumnElement, Float, func
+
+from app.pagination import KeysetOrder
+
+
+def search_pattern(search: str) -> str:
+    """Шаблон LIKE для подстроки: регистр снят, % и _ экранированы"""
+    escaped = search.strip().lower().replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return f"%{escaped}%"
+
+
+def search_filter(column, search: str) -> ColumnElement:
+    """Условие «column содержит search» для столбца в нижнем регистре"""
+    return column.like(search_pattern(search), escape="/")
+
+
+def search_rank(column, search: str) -> ColumnElement:
+    """Похожесть search на лучший фрагмент column (0..1), для сортировки по релевантности"""
+    return func.word_similarity(search.strip().lower(), column, type_=Float)
+
+
+def search_rank_order(name: str, column, search: str, id_column) -> KeysetOrder:
+    """Порядок по релевантности, затем по id; в имени порядка — отпечаток строки поиска"""
+    digest = hashlib.sha256(search.strip().lower().encode("utf-8")).hexdigest()[:16]
+    return KeysetOrder(f"{name}-rank:{digest}", ((search_rank(column, search), True), (id_column, False)))
@@ -0,0 +1,194 @@
+"""
+Индекс справочника БИК в памяти процесса API для подсказок при вводе.
+
+Справочник ЦБ — десятки тысяч строк, меняется раз в сутки, а подсказка
+запрашивается на каждое нажатие клавиши. Индекс загружается при старте,
+перезагружается после импорта ЦБ и правки банков в этом процессе, а также
+каждые bank_index_refresh_interval секунд (правки с других узлов).
+
+Хранение компактное: банки лежат в порядке выдачи (usage_count DESC, name,
+id), так что номер позиции — это и ранг. Для поиска — отсортированные
+массивы БИК и слов названия (casefold, «ё» как «е») с позициями банков;
+префикс ищется двоичным поиском. Слова запроса из цифр ищутся по префиксу
+БИК, остальные — по префиксу слов названия; условия пересекаются.
+"""
+import asyncio
+import heapq
+import logging
+import re
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import async_session
+from app.models import Bank
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(value: str) -> list[str]:
+    """Слова строки в нижнем регистре, «ё» приравнена к «е»"""
+    return _WORD_RE.findall(value.casefold().replace("ё", "е"))
+
+
+@dataclass
+class _IndexData:
+    ids: array = field(default_factory=lambda: array("q"))
+    biks: list[str] = field(default_factory=list)
+    names: list[str] = field(default_factory=list)
+    # Слова названий каждого банка: проверка остальных слов запроса у кандидатов
+    words: list[tuple[str, ...]] = field(default_factory=list)
+    bik_keys: list[str] = field(default_factory=list)
+    bik_positions: array = field(default_factory=lambda: array("I"))
+    word_keys: list[str] = field(default_factory=list)
+    word_positions: array = field(default_factory=lambda: array("I"))
+
+
+def build_index(rows) -> _IndexData:
+    """Индекс из строк (id, bik, name) в порядке выдачи"""
+    data = _IndexData()
+    bik_pairs = []
+    word_pairs = []
+    for position, (bank_id, bik, name) in enumerate(rows):
+        data.ids.append(bank_id)
+        data.biks.append(bik)
+        data.names.append(name)
+        words = tuple(dict.fromkeys(tokenize(name)))
+        data.words.append(words)
+        bik_pairs.append((bik, position))
+        word_pairs.extend((word, position) for word in words)
+
+    bik_pairs.sort()
+    word_pairs.sort()
+    data.bik_keys = [key for key, _ in bik_pairs]
+    data.bik_positions = array("I", (position for _, position in bik_pairs))
+    data.word_keys = [key for key, _ in word_pairs]
+    data.word_positions = array("I", (position for _, position in word_pairs))
+    return data
+
+
+def _prefix_range(keys: list[str], prefix: str) -> tuple[int, int]:
+    start = bisect_left(keys, prefix)
+    # Следующая строка после всех строк с этим префиксом
+    end = bisect_left(keys, prefix + "\U0010ffff", start)
+    return start, end
+
+
+class BankIndex:
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._data = _IndexData()
+        self.loaded = False
+        self.loaded_at: float | None = None
+        self._started = False
+        self._stale = False
+        self._refresh_task: asyncio.Task | None = None
+        self._periodic_task: asyncio.Task | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self._data.ids)
+
+    async def start(self):
+        """Первая загрузка и периодическое обновление (в цикле событий приложения)"""
+        self._started = True
+        try:
+            await self.refresh()
+        except Exception:
+            # Без индекса поиск идёт в БД; следующая попытка — по расписанию
+            logger.exception("Failed to load bank index")
+        if self.refresh_interval > 0:
+            self._periodic_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self):
+        self._started = False
+        tasks = [t for t in (self._periodic_task, self._refresh_task) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._periodic_task = self._refresh_task = None
+
+    async def refresh(self):
+        """Перечитывает справочник и подменяет индекс целиком"""
+        async with async_session() as db:
+            result = await db.execute(
+                select(Bank.id, Bank.bik, Bank.name).order_by(Bank.usage_count.desc(), Bank.name, Bank.id)
+            )
+            rows = result.all()
+        self._data = await asyncio.to_thread(build_index, rows)
+        self.loaded = True
+        self.loaded_at = time.time()
+
+    def schedule_refresh(self):
+        """Перезагрузить индекс в фоне после изменения справочника; вызовы подряд сливаются"""
+        if not self._started:
+            return
+        self._stale = True
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_while_stale())
+
+    async def _refresh_while_stale(self):
+        while self._stale:
+            self._stale = False
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh bank index")
+                return
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            self.schedule_refresh()
+
+    def lookup(self, query: str, limit: int = 20) -> list[dict]:
+        """Банки, у которых каждое слово запроса — префикс БИК или слова названия"""
+        data = self._data
+        tokens = tokenize(query)
+        if not tokens:
+            positions = range(min(limit, len(data.ids)))
+            return [self._item(data, position) for position in positions]
+
+        ranges = []
+        for token in tokens:
+            if token.isdigit():
+                start, end = _prefix_range(data.bik_keys, token)
+                ranges.append((end - start, data.bik_positions, start, end, token, True))
+            else:
+                start, end = _prefix_range(data.word_keys, token)
+                ranges.append((end - start, data.word_positions, start, end, token, False))
+        ranges.sort(key=lambda r: r[0])
+
+        # Кандидаты — из самого узкого условия, остальные проверяются у каждого кандидата
+        _, positions, start, end, _, _ = ranges[0]
+        candidates = set(positions[start:end])
+        for _, _, _, _, token, is_bik in ranges[1:]:
+            if is_bik:
+                candidates = {p for p in candidates if data.biks[p].startswith(token)}
+            else:
+                candidates = {p for p in candidates if any(w.startswith(token) for w in data.words[p])}
+            if not candidates:
+                break
+
+        return [self._item(data, position) for position in heapq.nsmallest(limit, candidates)]
+
+    @staticmethod
+    def _item(data: _IndexData, position: int) -> dict:
+        return {"id": data.ids[position], "bik": data.biks[position], "name": data.names[position]}
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "banks": self.size,
+            "words": len(self._data.word_keys),
+            "age_seconds": round(time.time() - self.loaded_at, 1) if self.loaded_at else None,
+        }
+
+
+bank_index = BankIndex(refresh_interval=settings.bank_index_refresh_interval)
@@ -0,0 +1,42 @@
+"""
+Счётчик клиентов банка (banks.usage_count) для сортировки справочника.
+
+Счётчик ведёт триггер clients_bank_usage_count на clients (миграция
+e5f6a7b8c9d0) в той же транзакции, что и изменение клиента: добавление,
+удаление и смена банка меняют его на единицу. Так список банков
+сортируется по индексу (usage_count DESC, name, id) без подсчёта по всей
+таблице клиентов на каждый запрос.
+
+Триггер не видит, например, TRUNCATE или правки при отключённых
+триггерах; reconcile_bank_usage пересчитывает счётчики и исправляет
+расхождения (scripts/reconcile_bank_usage.py).
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# SHARE блокирует запись в clients до конца транзакции и ждёт начатые записи:
+# иначе клиент, добавленный во время пересчёта, изменил бы счётчик триггером,
+# а UPDATE затёр бы его значением из снимка, взятого в начале запроса
+LOCK_CLIENTS_SQL = "LOCK TABLE clients IN SHARE MODE"
+
+# Одним запросом: пишутся только банки, у которых счётчик разошёлся
+RECONCILE_BANK_USAGE_SQL = """
+UPDATE banks SET usage_count = actual.count
+FROM (
+    SELECT b.id, count(c.id) AS count
+    FROM banks b LEFT JOIN clients c ON c.bank_id = b.id
+    GROUP BY b.id
+) AS actual
+WHERE banks.id = actual.id AND banks.usage_count <> actual.count
+"""
+
+
+async def reconcile_bank_usage(db: AsyncSession) -> int:
+    """Пересчитывает banks.usage_count по клиентам; возвращает число исправленных банков.
+
+    На время пересчёта запись в clients ждёт; транзакция db завершается здесь.
+    """
+    await db.execute(text(LOCK_CLIENTS_SQL))
+    result = await db.execute(text(RECONCILE_BANK_USAGE_SQL))
+    await db.commit()
+    return result.rowcount
@@ -1,23 +1,81 @@
+import asyncio
+import hashlib
 import io
 import zipfile
 import xml.etree.ElementTree as ET
+from collections.abc import Iterator
+from dataclasses import dataclass
 from datetime import datetime
+from itertools import islice
 
 import httpx
-from sqlalchemy import select, text
-from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Bank
+from app.config import settings
+from app.models import CBRImportState
 from app.schemas import CBRImportResult
 
-CBR_NEWBIK_URL = "https://www.cbr.ru/s/newbik"
 ED807_NS = {"cbr": "urn:cbr-ru:ed:v2.0"}
+ENTRY_TAG = f"{{{ED807_NS['cbr']}}}BICDirectoryEntry"
+
+# Advisory lock held by the import transaction: one import at a time across replicas
+IMPORT_LOCK_KEY = 0x43425231
+IMPORT_RUNNING_MESSAGE = "CBR import is already running"
+
+# Staging table for COPY; dropped at the end of the import transaction
+STAGING_TABLE = "cbr_banks_import"
+STAGING_COLUMNS = ("seq", "bik", "name", "correspondent_account")
+
+CREATE_STAGING_SQL = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+    seq integer NOT NULL,
+    bik text NOT NULL,
+    name text NOT NULL,
+    correspondent_account text NOT NULL
+) ON COMMIT DROP
+"""
+
+# One statement for the whole directory. A BIK repeated in the file keeps its
+# last record (ON CONFLICT cannot touch a row twice). Rows whose name and
+# account did not change are skipped by the WHERE and are not rewritten.
+# xmax = 0 only for freshly inserted rows, so RETURNING tells created from updated.
+MERGE_SQL = f"""
+WITH upserted AS (
+    INSERT INTO banks (bik, name, correspondent_account)
+    SELECT DISTINCT ON (bik) bik, name, correspondent_account
+    FROM {STAGING_TABLE}
+    ORDER BY bik, seq DESC
+    ON CONFLICT (bik) DO UPDATE
+        SET name = EXCLUDED.name, correspondent_account = EXCLUDED.correspondent_account
+        WHERE (banks.name, banks.correspondent_account)
+              IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.correspondent_account)
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT
+    (SELECT count(DISTINCT bik) FROM {STAGING_TABLE}) AS distinct_biks,
+    count(*) FILTER (WHERE inserted) AS created,
+    count(*) FILTER (WHERE NOT inserted) AS updated
+FROM upserted
+"""
+
+
+@dataclass
+class FetchedArchive:
+    content: bytes | None  # None: 304 Not Modified
+    etag: str | None
+    last_modified: str | None
+    sha256: str | None
+
+    def matches(self, state: CBRImportState) -> bool:
+        """The archive is the one already imported: not modified or same bytes."""
+        return self.content is None or (state.sha256 is not None and self.sha256 == state.sha256)
 
 
 class CBRImportService:
-    def __init__(self, timeout: float = 120.0):
+    def __init__(self, timeout: float = 120.0, url: str | None = None):
         self.timeout = timeout
+        self.url = url or settings.cbr_newbik_url
 
     async def ensure_unique_constraint(self, db: AsyncSession) -> None:
         """Create unique constraint on bik if it doesn't exist."""
@@ -26,62 +84,162 @@ class CBRImportService:
         """))
         await db.commit()
 
-    async def fetch_newbik_archive(self) -> bytes:
+    async def load_state(self, db: AsyncSession) -> CBRImportState:
+        # Re-read under the lock: the row may be cached from before another import
+        state = await db.get(CBRImportState, self.url, populate_existing=True)
+        if state is None:
+            state = CBRImportState(source=self.url)
+            db.add(state)
+        return state
+
+    async def fetch_newbik_archive(self, state: CBRImportState | None = None) -> FetchedArchive:
+        """Download the archive; with state, a conditional request that may return 304."""
+        headers = {}
+        if state is not None:
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+
         async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
-            response = await client.get(CBR_NEWBIK_URL)
+            response = await client.get(self.url, headers=headers)
+            if response.status_code == 304 and state is not None:
+                return FetchedArchive(None, state.etag, state.last_modified, state.sha256)
             response.raise_for_status()
-            return response.content
+            content = response.content
 
-    def parse_ed807_from_zip(self, zip_content: bytes) -> list[dict]:
-        records = []
+        return FetchedArchive(
+            content=content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            sha256=hashlib.sha256(content).hexdigest(),
+        )
+
+    async def try_lock(self, db: AsyncSession) -> bool:
+        """Take the import lock until the end of the current transaction."""
+        result = await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": IMPORT_LOCK_KEY})
+        return bool(result.scalar())
 
+    def iter_ed807_records(self, zip_content: bytes) -> Iterator[dict]:
+        """Stream records from the ED807 file without reading it or its tree into memory."""
         with zipfile.ZipFile(io.BytesIO(zip_content)) as zf:
             xml_files = [n for n in zf.namelist() if n.endswith('.xml')]
             if not xml_files:
                 raise ValueError("No XML file found in archive")
 
-            xml_content = zf.read(xml_files[0])
+            with zf.open(xml_files[0]) as stream:
+                events = ET.iterparse(stream, events=('start', 'end'))
+                _, root = next(events)
+                for event, element in events:
+                    if event != 'end' or element.tag != ENTRY_TAG:
+                        continue
+                    record = self.parse_entry(element)
+                    # Drop parsed entries so the tree never holds more than one
+                    element.clear()
+                    root.clear()
+                    if record is not None:
+                        yield record
+
+    def iter_ed807_batches(self, zip_content: bytes, size: int) -> Iterator[list[dict]]:
+        records = self.iter_ed807_records(zip_content)
+        while batch := list(islice(records, size)):
+            yield batch
+
+    def parse_ed807_from_zip(self, zip_content: bytes) -> list[dict]:
+        return list(self.iter_ed807_records(zip_content))
 
-        root = ET.fromstring(xml_content)
+    @staticmethod
+    def parse_entry(entry: ET.Element) -> dict | None:
+        bik = entry.get('BIC')
+        if not bik or len(bik) != 9:
+            return None
 
-        for entry in root.findall('.//cbr:BICDirectoryEntry', ED807_NS):
-            bik = entry.get('BIC')
-            if not bik or len(bik) != 9:
-                continue
+        participant = entry.find('cbr:ParticipantInfo', ED807_NS)
+        if participant is None:
+            return None
 
-            participant = entry.find('cbr:ParticipantInfo', ED807_NS)
-            if participant is None:
-                continue
+        name = participant.get('NameP', '')
+        if not name:
+            return None
 
-            name = participant.get('NameP', '')
-            if not name:
-                continue
+        correspondent_account = None
+        for account in entry.findall('cbr:Accounts', ED807_NS):
+            if account.get('RegulationAccountType') == 'CRSA':
+                correspondent_account = account.get('Account')
+                break
 
-            correspondent_account = None
-            for account in entry.findall('cbr:Accounts', ED807_NS):
-                if account.get('RegulationAccountType') == 'CRSA':
-                    correspondent_account = account.get('Account')
-                    break
+        return {
+            'bik': bik,
+            'name': name,
+            'correspondent_account': correspondent_account or ''
+        }
 
-            records.append({
-                'bik': bik,
-                'name': name,
-                'correspondent_account': correspondent_account or ''
-            })
+    async def create_staging(self, db: AsyncSession) -> None:
+        await db.execute(text(CREATE_STAGING_SQL))
 
-        return records
+    async def copy_records(self, db: AsyncSession, records: list[dict], start: int = 0) -> None:
+        """COPY a batch of parsed records into the staging table; start numbers the batch rows."""
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            STAGING_TABLE,
+            records=[
+                (start + i, r['bik'], r['name'], r['correspondent_account'])
+                for i, r in enumerate(records)
+            ],
+            columns=STAGING_COLUMNS,
+        )
 
-    async def import_banks(self, db: AsyncSession) -> CBRImportResult:
-        errors = []
-        created = 0
-        updated = 0
+    async def merge_staging(self, db: AsyncSession) -> tuple[int, int, int]:
+        """Upsert staged records into banks; returns (created, updated, unchanged)."""
+        row = (await db.execute(text(MERGE_SQL))).one()
+        return row.created, row.updated, row.distinct_biks - row.created - row.updated
 
+    async def import_banks(self, db: AsyncSession, force: bool = False) -> CBRImportResult:
+        """Import the directory unless the archive matches the last import (force: always)."""
         try:
             await self.ensure_unique_constraint(db)
-            archive = await self.fetch_newbik_archive()
-            records = self.parse_ed807_from_zip(archive)
+            if not await self.try_lock(db):
+                await db.rollback()
+                return CBRImportResult(
+                    success=False,
+                    total_processed=0,
+                    created=0,
+                    updated=0,
+                    errors=1,
+                    error_messages=[IMPORT_RUNNING_MESSAGE],
+                    import_date=datetime.utcnow()
+                )
+
+            state = await self.load_state(db)
+            fetched = await self.fetch_newbik_archive(None if force else state)
+            state.checked_at = datetime.utcnow()
+            if not force and fetched.matches(state):
+                # Same file: keep the validators the server sent this time
+                state.etag, state.last_modified = fetched.etag, fetched.last_modified
+                await db.commit()
+                return CBRImportResult(
+                    success=True,
+                    skipped=True,
+                    total_processed=0,
+                    created=0,
+                    updated=0,
+                    errors=0,
+                    import_date=datetime.utcnow()
+                )
 
-            if not records:
+            archive = fetched.content
+            await self.create_staging(db)
+
+            # Parsing is CPU-bound: each batch is parsed in a thread, then copied
+            batches = self.iter_ed807_batches(archive, settings.cbr_import_batch_size)
+            total = 0
+            while batch := await asyncio.to_thread(next, batches, None):
+                await self.copy_records(db, batch, start=total)
+                total += len(batch)
+
+            if not total:
+                await db.rollback()
                 return CBRImportResult(
                     success=False,
                     total_processed=0,
@@ -92,49 +250,24 @@ class CBRImportService:
                     import_date=datetime.utcnow()
                 )
 
-            existing_biks = set()
-            result = await db.execute(select(Bank.bik))
-            for row in result.scalars():
-                existing_biks.add(row)
-
-            for record in records:
-                try:
-                    stmt = pg_insert(Bank).values(
-                        name=record['name'],
-                        bik=record['bik'],
-                        correspondent_account=record['correspondent_account']
-                    ).on_conflict_do_update(
-                        index_elements=['bik'],
-                        set_={
-                            'name': record['name'],
-                            'correspondent_account': record['correspondent_account']
-                        }
-                    )
-
-                    await db.execute(stmt)
-
-                    if record['bik'] in existing_biks:
-                        updated += 1
-                    else:
-                        created += 1
-                        existing_biks.add(record['bik'])
-
-                except Exception as e:
-                    errors.append(f"Error processing BIK {record['bik']}: {str(e)}")
-
+            created, updated, unchanged = await self.merge_staging(db)
+            # Fingerprint is saved in the import transaction: a failed import is retried in full
+            state.etag, state.last_modified, state.sha256 = fetched.etag, fetched.last_modified, fetched.sha256
+            state.imported_at = state.checked_at
             await db.commit()
 
             return CBRImportResult(
                 success=True,
-                total_processed=len(records),
+                total_processed=total,
                 created=created,
                 updated=updated,
-                errors=len(errors),
-                error_messages=errors[:10],
+                unchanged=unchanged,
+                errors=0,
                 import_date=datetime.utcnow()
             )
 
         except httpx.HTTPError as e:
+            await db.rollback()
             return CBRImportResult(
                 success=False,
                 total_processed=0,
@@ -0,0 +1,83 @@
+"""
+Плановое обновление справочника БИК из процесса API.
+
+Раз в cbr_sync_check_interval секунд планировщик смотрит, когда справочник
+проверяли в последний раз (cbr_import_state.checked_at), и если прошло
+больше cbr_sync_interval, запускает импорт. Время проверки хранится в БД,
+поэтому период выдерживается и после перезапуска, и между репликами; сам
+импорт идёт под advisory-блокировкой, так что при одновременном старте
+работает одна реплика, а остальные пропускают ход. Неизменившийся архив
+(304 или тот же SHA-256) не разбирается.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.database import async_session
+from app.models import CBRImportState
+from app.services.bank_index import bank_index
+from app.services.cbr_import import IMPORT_RUNNING_MESSAGE, CBRImportService
+
+logger = logging.getLogger(__name__)
+
+
+def is_due(state: CBRImportState | None, interval: float, now: datetime) -> bool:
+    """Пора ли проверять справочник: ни разу не проверяли или прошло interval секунд"""
+    if state is None or state.checked_at is None:
+        return True
+    return now - state.checked_at >= timedelta(seconds=interval)
+
+
+class CBRSyncScheduler:
+    def __init__(self, interval: float, check_interval: float):
+        self.interval = interval
+        self.check_interval = check_interval
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Scheduled CBR import failed")
+            await asyncio.sleep(self.check_interval)
+
+    async def run_once(self) -> bool:
+        """Импорт, если подошёл срок; True, если справочник загружался"""
+        service = CBRImportService()
+        async with async_session() as db:
+            state = await db.get(CBRImportState, service.url)
+            if not is_due(state, self.interval, datetime.utcnow()):
+                return False
+            result = await service.import_banks(db)
+
+        if result.success and not result.skipped:
+            logger.info(
+                "Scheduled CBR import: %d created, %d updated, %d unchanged",
+                result.created, result.updated, result.unchanged,
+            )
+            bank_index.schedule_refresh()
+        elif result.error_messages == [IMPORT_RUNNING_MESSAGE]:
+            # Другая реплика уже загружает справочник
+            logger.info("Scheduled CBR import skipped: %s", IMPORT_RUNNING_MESSAGE)
+        elif not result.success:
+            logger.warning("Scheduled CBR import failed: %s", "; ".join(result.error_messages))
+        return result.success and not result.skipped
+
+
+cbr_sync = CBRSyncScheduler(
+    interval=settings.cbr_sync_interval,
+    check_interval=settings.cbr_sync_check_interval,
+)
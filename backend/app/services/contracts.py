@@ -0,0 +1,54 @@
+from datetime import date
+
+from sqlalchemy import Select, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models import Client, Contract
+from app.document.snapshot import ContractSnapshot
+from app.search import search_filter
+
+
+def filter_contracts(query, search: str = "", date_from: date | None = None, date_to: date | None = None):
+    """Фильтры списка договоров: поиск по номеру и клиенту, период по дате договора"""
+    if search:
+        # Обе ветви идут по триграммным индексам; клиент ищется по всем своим полям поиска
+        query = query.where(
+            or_(
+                search_filter(Contract.search_text, search),
+                Contract.client_id.in_(select(Client.id).where(search_filter(Client.search_text, search))),
+            )
+        )
+    if date_from:
+        query = query.where(Contract.date >= date_from)
+    if date_to:
+        query = query.where(Contract.date <= date_to)
+    return query
+
+
+def select_contracts_for_render() -> Select:
+    """Запрос договоров со всеми связями, нужными генераторам"""
+    return select(Contract).options(
+        selectinload(Contract.client).selectinload(Client.bank),
+        selectinload(Contract.services),
+        selectinload(Contract.template),
+    )
+
+
+async def find_contract_snapshot(db: AsyncSession, contract_id: int) -> ContractSnapshot | None:
+    """Снимок договора для генерации документов или None, если договора нет"""
+    result = await db.execute(select_contracts_for_render().where(Contract.id == contract_id))
+    contract = result.scalar_one_or_none()
+    return ContractSnapshot.from_model(contract) if contract else None
+
+
+async def find_contract_ids(
+    db: AsyncSession,
+    search: str = "",
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list[int]:
+    """Идентификаторы отфильтрованных договоров в порядке выгрузки (по дате договора)"""
+    query = filter_contracts(select(Contract.id), search, date_from, date_to)
+    result = await db.execute(query.order_by(Contract.date, Contract.id))
+    return list(result.scalars().all())
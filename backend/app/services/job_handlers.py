@@ -0,0 +1,84 @@
+"""
+Виды фоновых задач: документы договора, массовая выгрузка и импорт справочника ЦБ.
+"""
+import asyncio
+from datetime import date
+
+from app.config import settings
+from app.database import async_session
+from app.document.export import document_filename, iter_contract_snapshots, stream_export
+from app.document.rendering import FORMATS, MEDIA_TYPES, render_document_queued
+from app.schemas import BulkExportParams, CBRImportParams, ContractJobParams
+from app.services.bank_index import bank_index
+from app.services.cbr_import import CBRImportService
+from app.services.contracts import find_contract_ids, find_contract_snapshot
+
+from .job_queue import PostgresJobQueue
+from .jobs import Job, JobError, JobManager
+
+JOB_BULK_EXPORT = "bulk-export"
+JOB_CBR_IMPORT = "cbr-import"
+
+
+def contract_document_job(fmt: str):
+    """Обработчик задачи «документ договора» для формата fmt"""
+
+    async def run(job: Job, params: ContractJobParams):
+        async with async_session() as db:
+            snapshot = await find_contract_snapshot(db, params.contract_id)
+        if snapshot is None:
+            raise JobError("Contract not found")
+
+        job.report(0.0, "Генерация документа")
+        data = await render_document_queued(snapshot, fmt)
+        path = job.result_file(document_filename(snapshot, fmt), MEDIA_TYPES[fmt])
+        await asyncio.to_thread(path.write_bytes, data)
+
+    return run
+
+
+async def bulk_export_job(job: Job, params: BulkExportParams):
+    async with async_session() as db:
+        ids = await find_contract_ids(db, params.search, params.date_from, params.date_to)
+    formats = list(dict.fromkeys(params.formats))
+    total = len(ids) * len(formats)
+    if not total:
+        raise JobError("No contracts match the filters")
+
+    done = 0
+
+    def on_file(name: str):
+        nonlocal done
+        done += 1
+        job.report(done / total, f"{done} из {total}: {name}")
+
+    job.report(0.0, f"Договоров: {len(ids)}")
+    path = job.result_file(f"contracts_{date.today().isoformat()}.zip", "application/zip")
+    snapshots = iter_contract_snapshots(ids, settings.export_batch_size)
+    with open(path, "wb") as f:
+        async for chunk in stream_export(snapshots, formats, on_file=on_file):
+            await asyncio.to_thread(f.write, chunk)
+
+
+async def cbr_import_job(job: Job, params: CBRImportParams):
+    job.report(0.0, "Загрузка справочника БИК ЦБ РФ")
+    async with async_session() as db:
+        result = await CBRImportService().import_banks(db, force=params.force)
+    # В процессе обработчика (app.worker) индекса нет: API перечитает справочник по расписанию
+    if not result.skipped:
+        bank_index.schedule_refresh()
+    job.data = result.model_dump(mode="json")
+    if not result.success:
+        raise JobError(result.error_messages[0] if result.error_messages else "Import failed")
+    if result.skipped:
+        job.report(1.0, "Справочник не изменился")
+    else:
+        job.report(1.0, f"Обработано записей: {result.total_processed}")
+
+
+def register_job_handlers(manager: JobManager | PostgresJobQueue):
+    for fmt in FORMATS:
+        manager.register(fmt, contract_document_job(fmt), ContractJobParams, settings.jobs_document_concurrency)
+    manager.register(JOB_BULK_EXPORT, bulk_export_job, BulkExportParams, settings.jobs_export_concurrency)
+    # Импорт перезаписывает весь справочник: параллельные запуски не имеют смысла
+    manager.register(JOB_CBR_IMPORT, cbr_import_job, CBRImportParams, 1)
@@ -0,0 +1,413 @@
+"""
+Общая очередь фоновых задач в Postgres (jobs_backend = "postgres").
+
+Узлы API только записывают задачу в таблицу render_jobs и читают её
+состояние; выполняют задачи отдельные процессы python -m app.worker.
+Обработчик захватывает задачу запросом SELECT ... FOR UPDATE SKIP LOCKED,
+поэтому несколько обработчиков не берут одну задачу и не ждут друг друга.
+
+Захват действует jobs_visibility_timeout секунд и продлевается, пока
+задача выполняется; если обработчик пропал, по истечении срока задачу
+заберёт другой. Непредвиденные ошибки повторяются с паузой
+jobs_retry_backoff * 2^(попытка - 1) до jobs_max_attempts попыток,
+JobError завершает задачу сразу. Файлы-результаты пишутся в jobs_dir,
+который должен быть общим для API и обработчиков.
+"""
+import asyncio
+import logging
+import os
+import random
+import shutil
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, func, or_, select, update
+
+from app.config import settings
+from app.database import async_session
+from app.models import RenderJob
+
+from .jobs import (
+    JOB_FAILED,
+    JOB_FINISHED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    PRUNE_INTERVAL,
+    Job,
+    JobError,
+    JobHandler,
+    JobKind,
+    JobQueueFull,
+    UnknownJobKind,
+    job_manager,
+    jobs_directory,
+)
+
+logger = logging.getLogger(__name__)
+
+JOBS_BACKEND_MEMORY = "memory"
+JOBS_BACKEND_POSTGRES = "postgres"
+
+
+def job_from_row(row: RenderJob) -> Job:
+    job = Job(
+        id=row.id,
+        kind=row.kind,
+        params=row.params,
+        status=row.status,
+        progress=row.progress,
+        message=row.message,
+        error=row.error,
+        data=row.data,
+        created_at=row.created_at,
+        started_at=row.started_at,
+        finished_at=row.finished_at,
+        attempts=row.attempts,
+        max_attempts=row.max_attempts,
+    )
+    if row.result_filename:
+        job.result_path = jobs_directory(row.id) / row.result_filename
+        job.result_media_type = row.result_media_type
+    return job
+
+
+def _event_state(event: dict) -> tuple:
+    return event["status"], event["progress"], event["message"], event["error"]
+
+
+class PostgresJobQueue:
+    """Очередь задач в таблице render_jobs, общая для узлов API и обработчиков"""
+
+    def __init__(
+        self,
+        queue_size: int,
+        ttl: float,
+        poll_interval: float,
+        visibility_timeout: float,
+        max_attempts: int,
+        retry_backoff: float,
+    ):
+        self.queue_size = queue_size
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.kinds: dict[str, JobKind] = {}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._running: dict[str, Job] = {}
+
+    def register(self, kind: str, handler: JobHandler, params_model: type[BaseModel], concurrency: int = 1):
+        self.kinds[kind] = JobKind(handler=handler, params_model=params_model, concurrency=concurrency)
+
+    # --- Сторона API ---
+
+    async def submit(self, kind: str, params: dict) -> Job:
+        """Проверяет параметры и записывает задачу в очередь.
+
+        Может выбросить UnknownJobKind, pydantic.ValidationError, JobQueueFull.
+        """
+        job_kind = self.kinds.get(kind)
+        if job_kind is None:
+            raise UnknownJobKind(kind)
+        validated = job_kind.params_model.model_validate(params)
+
+        now = datetime.utcnow()
+        async with async_session() as db:
+            queued = await db.scalar(
+                select(func.count()).select_from(RenderJob).where(
+                    RenderJob.kind == kind, RenderJob.status == JOB_QUEUED
+                )
+            )
+            if queued >= self.queue_size:
+                raise JobQueueFull(kind)
+            row = RenderJob(
+                id=uuid.uuid4().hex,
+                kind=kind,
+                params=validated.model_dump(mode="json"),
+                status=JOB_QUEUED,
+                progress=0.0,
+                message="",
+                attempts=0,
+                max_attempts=self.max_attempts,
+                run_after=now,
+                created_at=now,
+            )
+            db.add(row)
+            await db.commit()
+        return job_from_row(row)
+
+    async def get(self, job_id: str) -> Job | None:
+        async with async_session() as db:
+            row = await db.get(RenderJob, job_id)
+        return job_from_row(row) if row else None
+
+    async def events(self, job: Job, heartbeat: float = 15.0) -> AsyncIterator[dict | None]:
+        """Состояние задачи и его изменения до завершения; None — пульс для прокси.
+
+        Состояние читается из БД раз в jobs_poll_interval: задачу выполняет
+        другой процесс.
+        """
+        event = job.to_dict()
+        yield event
+        last_sent = time.monotonic()
+        while event["status"] not in JOB_FINISHED:
+            await asyncio.sleep(self.poll_interval)
+            current = await self.get(job.id)
+            if current is None:
+                return
+            state = current.to_dict()
+            if _event_state(state) != _event_state(event):
+                event = state
+                last_sent = time.monotonic()
+                yield event
+            elif time.monotonic() - last_sent >= heartbeat:
+                last_sent = time.monotonic()
+                yield None
+
+    async def stats(self) -> dict:
+        async with async_session() as db:
+            result = await db.execute(
+                select(RenderJob.kind, RenderJob.status, func.count()).group_by(RenderJob.kind, RenderJob.status)
+            )
+            rows = result.all()
+        by_status: dict[str, int] = {}
+        queued: dict[str, int] = {}
+        for kind, status, count in rows:
+            by_status[status] = by_status.get(status, 0) + count
+            if status == JOB_QUEUED:
+                queued[kind] = count
+        return {
+            "backend": JOBS_BACKEND_POSTGRES,
+            "jobs": by_status,
+            "queued": {name: queued.get(name, 0) for name in self.kinds},
+            "concurrency": {name: kind.concurrency for name, kind in self.kinds.items()},
+            "running_here": len(self._running),
+        }
+
+    # --- Сторона обработчика (python -m app.worker) ---
+
+    async def run(self):
+        """Обработчики всех видов задач; работает до отмены"""
+        tasks = [
+            asyncio.create_task(self._work(name, kind), name=f"job-{name}")
+            for name, kind in self.kinds.items()
+            for _ in range(max(kind.concurrency, 1))
+        ]
+        tasks.append(asyncio.create_task(self._prune_loop(), name="job-prune"))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def claim(self, kind: str) -> Job | None:
+        """Захватывает очередную задачу вида kind или возвращает None.
+
+        Берёт задачу в очереди, срок отложенного повтора которой наступил,
+        или выполняемую задачу с истёкшим захватом (обработчик пропал).
+        """
+        async with async_session() as db:
+            while True:
+                now = datetime.utcnow()
+                row = await db.scalar(
+                    select(RenderJob)
+                    .where(
+                        RenderJob.kind == kind,
+                        or_(
+                            and_(RenderJob.status == JOB_QUEUED, RenderJob.run_after <= now),
+                            and_(RenderJob.status == JOB_RUNNING, RenderJob.locked_until < now),
+                        ),
+                    )
+                    .order_by(RenderJob.run_after)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                if row is None:
+                    return None
+                if row.attempts >= row.max_attempts:
+                    # Обработчик пропал на последней попытке
+                    row.status = JOB_FAILED
+                    row.error = "Worker lost: visibility timeout expired"
+                    row.finished_at = now
+                    row.locked_by = row.locked_until = None
+                    await db.commit()
+                    continue
+
+                row.status = JOB_RUNNING
+                row.attempts += 1
+                row.error = None
+                row.started_at = now
+                row.locked_by = self.worker_id
+                row.locked_until = now + timedelta(seconds=self.visibility_timeout)
+                await db.commit()
+                return job_from_row(row)
+
+    async def _work(self, name: str, kind: JobKind):
+        while True:
+            try:
+                job = await self.claim(name)
+            except Exception:
+                logger.exception("Failed to claim %s job", name)
+                job = None
+            if job is None:
+                # Разброс опроса: обработчики не ходят в БД одновременно
+                await asyncio.sleep(self.poll_interval * random.uniform(0.5, 1.5))
+                continue
+            await self._run(kind, job)
+
+    async def _run(self, kind: JobKind, job: Job):
+        self._running[job.id] = job
+        lease = asyncio.create_task(self._keep_lease(job))
+        try:
+            await kind.handler(job, kind.params_model.model_validate(job.params))
+        except asyncio.CancelledError:
+            # Остановка обработчика: задача возвращается в очередь без потери попытки
+            lease.cancel()
+            await asyncio.shield(self._release(job))
+            raise
+        except JobError as e:
+            lease.cancel()
+            await self._fail(job, str(e))
+        except Exception as e:
+            logger.exception("Job %s (%s) failed, attempt %d", job.id, job.kind, job.attempts)
+            lease.cancel()
+            await self._retry_or_fail(job, f"{type(e).__name__}: {e}")
+        else:
+            lease.cancel()
+            saved = await self._update(
+                job,
+                status=JOB_SUCCEEDED,
+                progress=1.0,
+                message=job.message,
+                data=job.data,
+                result_filename=job.result_path.name if job.result_path else None,
+                result_media_type=job.result_media_type,
+                finished_at=datetime.utcnow(),
+                locked_by=None,
+                locked_until=None,
+            )
+            if not saved:
+                logger.warning("Job %s finished after its lease expired, result discarded", job.id)
+        finally:
+            self._running.pop(job.id, None)
+
+    async def _keep_lease(self, job: Job):
+        """Сохраняет ход выполнения и продлевает захват, пока задача выполняется"""
+        saved = (job.progress, job.message)
+        extended = time.monotonic()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            state = (job.progress, job.message)
+            if state == saved and time.monotonic() - extended < self.visibility_timeout / 3:
+                continue
+            try:
+                if not await self._update(
+                    job,
+                    progress=job.progress,
+                    message=job.message,
+                    locked_until=datetime.utcnow() + timedelta(seconds=self.visibility_timeout),
+                ):
+                    logger.warning("Job %s lease lost, another worker may take it over", job.id)
+            except Exception:
+                logger.exception("Failed to save progress of job %s", job.id)
+                continue
+            saved = state
+            extended = time.monotonic()
+
+    async def _update(self, job: Job, **values) -> bool:
+        """Обновляет захваченную этим обработчиком задачу; False — захват потерян"""
+        async with async_session() as db:
+            result = await db.execute(
+                update(RenderJob)
+                .where(
+                    RenderJob.id == job.id,
+                    RenderJob.status == JOB_RUNNING,
+                    RenderJob.locked_by == self.worker_id,
+                )
+                .values(**values)
+            )
+            await db.commit()
+        return result.rowcount > 0
+
+    async def _fail(self, job: Job, error: str):
+        await self._update(
+            job,
+            status=JOB_FAILED,
+            error=error,
+            data=job.data,
+            finished_at=datetime.utcnow(),
+            locked_by=None,
+            locked_until=None,
+        )
+        await asyncio.to_thread(shutil.rmtree, jobs_directory(job.id), True)
+
+    async def _retry_or_fail(self, job: Job, error: str):
+        if job.attempts >= job.max_attempts:
+            await self._fail(job, error)
+            return
+        delay = self.retry_backoff * 2 ** (job.attempts - 1)
+        await self._update(
+            job,
+            status=JOB_QUEUED,
+            error=error,
+            message=f"Повтор через {delay:.0f} с (попытка {job.attempts} из {job.max_attempts})",
+            run_after=datetime.utcnow() + timedelta(seconds=delay),
+            locked_by=None,
+            locked_until=None,
+        )
+
+    async def _release(self, job: Job):
+        try:
+            await self._update(
+                job,
+                status=JOB_QUEUED,
+                attempts=RenderJob.attempts - 1,
+                run_after=datetime.utcnow(),
+                locked_by=None,
+                locked_until=None,
+            )
+        except Exception:
+            # Не удалось вернуть: задачу заберут по истечении захвата
+            logger.exception("Failed to release job %s", job.id)
+
+    async def _prune_loop(self):
+        while True:
+            try:
+                await self.prune()
+            except Exception:
+                logger.exception("Failed to prune finished jobs")
+            await asyncio.sleep(PRUNE_INTERVAL)
+
+    async def prune(self):
+        """Удаляет завершённые задачи старше ttl вместе с файлами"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        async with async_session() as db:
+            result = await db.execute(
+                delete(RenderJob)
+                .where(RenderJob.status.in_(JOB_FINISHED), RenderJob.finished_at < cutoff)
+                .returning(RenderJob.id)
+            )
+            ids = list(result.scalars().all())
+            await db.commit()
+        for job_id in ids:
+            await asyncio.to_thread(shutil.rmtree, jobs_directory(job_id), True)
+
+
+job_queue = PostgresJobQueue(
+    queue_size=settings.jobs_queue_size,
+    ttl=settings.jobs_ttl,
+    poll_interval=settings.jobs_poll_interval,
+    visibility_timeout=settings.jobs_visibility_timeout,
+    max_attempts=settings.jobs_max_attempts,
+    retry_backoff=settings.jobs_retry_backoff,
+)
+
+# Очередь, с которой работают роутеры: в памяти API или общая в Postgres
+job_backend = job_queue if settings.jobs_backend == JOBS_BACKEND_POSTGRES else job_manager
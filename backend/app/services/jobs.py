@@ -0,0 +1,271 @@
+"""
+Фоновые задачи: тяжёлые операции (PDF, массовая выгрузка, импорт ЦБ)
+выполняются вне HTTP-запроса.
+
+Задача ставится в очередь своего вида и выполняется одним из обработчиков
+этого вида; число обработчиков задаёт предел параллельности для вида.
+Ход выполнения публикуется подписчикам (SSE), результат-файл сохраняется
+в каталоге задачи и отдаётся отдельным запросом. Завершённые задачи
+хранятся jobs_ttl секунд; раз в PRUNE_INTERVAL секунд устаревшие удаляются
+вместе с файлами, даже если новых задач не ставят.
+
+Здесь — очередь в памяти процесса API (jobs_backend = "memory"); общая
+очередь в Postgres для нескольких узлов — app.services.job_queue. Обе
+реализации дают одинаковый интерфейс: register, submit, get, events, stats.
+"""
+import asyncio
+import logging
+import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from pydantic import BaseModel
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_FINISHED = (JOB_SUCCEEDED, JOB_FAILED)
+
+# Как часто удаляются задачи старше jobs_ttl (с)
+PRUNE_INTERVAL = 60.0
+
+
+class JobError(Exception):
+    """Ожидаемая ошибка задачи: сообщение показывается пользователю как есть"""
+
+
+class UnknownJobKind(Exception):
+    pass
+
+
+class JobQueueFull(Exception):
+    def __init__(self, kind: str):
+        super().__init__(f"Job queue for {kind} is full")
+        self.kind = kind
+
+
+def jobs_directory(job_id: str) -> Path:
+    """Каталог файлов задачи: jobs_dir (общий для узлов) или временный каталог"""
+    return Path(settings.jobs_dir or Path(tempfile.gettempdir()) / "contract-jobs") / job_id
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict
+    status: str = JOB_QUEUED
+    progress: float = 0.0
+    message: str = ""
+    error: str | None = None
+    data: dict | None = None  # итог задачи в JSON (например, отчёт импорта)
+    result_path: Path | None = None
+    result_media_type: str | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    attempts: int = 0
+    max_attempts: int = 1
+    _listeners: set = field(default_factory=set, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JOB_FINISHED
+
+    def to_dict(self) -> dict:
+        result = None
+        if self.result_path is not None:
+            result = {
+                "url": f"/api/jobs/{self.id}/result",
+                "filename": self.result_path.name,
+                "media_type": self.result_media_type,
+                "size": self.result_path.stat().st_size if self.result_path.exists() else 0,
+            }
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "error": self.error,
+            "data": self.data,
+            "result": result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def _publish(self):
+        event = self.to_dict()
+        for queue in self._listeners:
+            queue.put_nowait(event)
+
+    def report(self, progress: float, message: str = ""):
+        """Обновляет ход выполнения (0..1) и оповещает подписчиков"""
+        self.progress = min(max(progress, 0.0), 1.0)
+        if message:
+            self.message = message
+        self._publish()
+
+    def result_file(self, filename: str, media_type: str) -> Path:
+        """Путь файла-результата; обработчик записывает его сам"""
+        directory = jobs_directory(self.id)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.result_path = directory / filename
+        self.result_media_type = media_type
+        return self.result_path
+
+
+JobHandler = Callable[[Job, Any], Awaitable[None]]
+
+
+@dataclass
+class JobKind:
+    handler: JobHandler
+    params_model: type[BaseModel]
+    concurrency: int
+    queue: asyncio.Queue | None = None
+
+
+class JobManager:
+    """Очереди и обработчики задач в процессе API"""
+
+    def __init__(self, queue_size: int, ttl: float):
+        self.queue_size = queue_size
+        self.ttl = ttl
+        self.kinds: dict[str, JobKind] = {}
+        self._jobs: dict[str, Job] = {}
+        self._workers: list[asyncio.Task] = []
+
+    def register(self, kind: str, handler: JobHandler, params_model: type[BaseModel], concurrency: int = 1):
+        self.kinds[kind] = JobKind(handler=handler, params_model=params_model, concurrency=concurrency)
+
+    def start(self):
+        """Запускает обработчики всех видов задач (в цикле событий приложения)"""
+        if self._workers:
+            return
+        for name, kind in self.kinds.items():
+            kind.queue = asyncio.Queue(maxsize=self.queue_size)
+            for _ in range(max(kind.concurrency, 1)):
+                self._workers.append(asyncio.create_task(self._work(kind), name=f"job-{name}"))
+        self._workers.append(asyncio.create_task(self._prune_loop(), name="job-prune"))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, kind: str, params: dict) -> Job:
+        """Проверяет параметры и ставит задачу в очередь.
+
+        Может выбросить UnknownJobKind, pydantic.ValidationError, JobQueueFull.
+        """
+        job_kind = self.kinds.get(kind)
+        if job_kind is None:
+            raise UnknownJobKind(kind)
+        validated = job_kind.params_model.model_validate(params)
+        if job_kind.queue is None:
+            raise RuntimeError("Job manager is not started")
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=validated.model_dump(mode="json"))
+        try:
+            job_kind.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(kind)
+        self._jobs[job.id] = job
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    async def _work(self, kind: JobKind):
+        while True:
+            job = await kind.queue.get()
+            try:
+                await self._run(kind, job)
+            finally:
+                kind.queue.task_done()
+
+    async def _run(self, kind: JobKind, job: Job):
+        job.status = JOB_RUNNING
+        job.attempts += 1
+        job.started_at = datetime.utcnow()
+        job._publish()
+        try:
+            await kind.handler(job, kind.params_model.model_validate(job.params))
+        except asyncio.CancelledError:
+            job.status = JOB_FAILED
+            job.error = "Cancelled on shutdown"
+            raise
+        except JobError as e:
+            job.status = JOB_FAILED
+            job.error = str(e)
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            job.status = JOB_FAILED
+            job.error = f"{type(e).__name__}: {e}"
+        else:
+            job.status = JOB_SUCCEEDED
+            job.progress = 1.0
+        finally:
+            job.finished_at = datetime.utcnow()
+            job._publish()
+
+    async def events(self, job: Job, heartbeat: float = 15.0) -> AsyncIterator[dict | None]:
+        """Состояние задачи и его изменения до завершения; None — пульс для прокси"""
+        queue: asyncio.Queue = asyncio.Queue()
+        job._listeners.add(queue)
+        try:
+            event = job.to_dict()
+            yield event
+            while event["status"] not in JOB_FINISHED:
+                try:
+                    event = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+        finally:
+            job._listeners.discard(queue)
+
+    async def _prune_loop(self):
+        while True:
+            try:
+                await self.prune()
+            except Exception:
+                logger.exception("Failed to prune finished jobs")
+            await asyncio.sleep(PRUNE_INTERVAL)
+
+    async def prune(self):
+        """Удаляет завершённые задачи старше ttl вместе с файлами"""
+        now = datetime.utcnow()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and (now - job.finished_at).total_seconds() > self.ttl:
+                del self._jobs[job_id]
+                if job.result_path is not None:
+                    # Файл выгрузки может весить гигабайты: удаляем вне цикла событий
+                    await asyncio.to_thread(shutil.rmtree, job.result_path.parent, True)
+
+    async def stats(self) -> dict:
+        by_status: dict[str, int] = {}
+        for job in self._jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            "backend": "memory",
+            "jobs": by_status,
+            "queued": {name: kind.queue.qsize() if kind.queue else 0 for name, kind in self.kinds.items()},
+            "concurrency": {name: kind.concurrency for name, kind in self.kinds.items()},
+        }
+
+
+job_manager = JobManager(queue_size=settings.jobs_queue_size, ttl=settings.jobs_ttl)
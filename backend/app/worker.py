@@ -0,0 +1,50 @@
+"""
+Обработчик общей очереди задач: python -m app.worker
+
+Берёт задачи из таблицы render_jobs (jobs_backend = "postgres") и строит
+документы, PDF и выгрузки. Процессов-обработчиков может быть сколько угодно:
+мощность рендеринга масштабируется отдельно от узлов API.
+"""
+import asyncio
+import logging
+import signal
+
+from app.database import engine
+from app.document.office_pool import office_pool
+from app.document.pdf_limiter import pdf_limiter
+from app.document.render_pool import render_pool
+from app.services.job_handlers import register_job_handlers
+from app.services.job_queue import job_queue
+
+logger = logging.getLogger("app.worker")
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if office_pool.enabled:
+        await asyncio.to_thread(office_pool.start)
+    await asyncio.to_thread(render_pool.start)
+    register_job_handlers(job_queue)
+
+    runner = asyncio.create_task(job_queue.run())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, runner.cancel)
+
+    logger.info("Worker %s started: %s", job_queue.worker_id, ", ".join(job_queue.kinds))
+    try:
+        await runner
+    except asyncio.CancelledError:
+        pass
+    finally:
+        # Выполнявшиеся задачи уже возвращены в очередь
+        pdf_limiter.shutdown()
+        await asyncio.to_thread(render_pool.stop)
+        await asyncio.to_thread(office_pool.stop)
+        await engine.dispose()
+        logger.info("Worker %s stopped", job_queue.worker_id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
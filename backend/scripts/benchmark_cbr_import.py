@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк записи справочника БИК в Postgres.
+Сравнивает прежнюю запись (INSERT ... ON CONFLICT на каждую запись) с COPY
+во временную таблицу и одним INSERT ... SELECT: время, объём WAL и счётчики
+добавлено/обновлено/без изменений для первого импорта, повторного импорта
+того же файла и импорта с 1% изменённых записей. Используются синтетические
+БИК с префиксом 99 (у ЦБ таких нет); каждая серия откатывается, база
+DATABASE_URL не меняется. Нужна база с применёнными миграциями.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import settings
+from app.models import Bank
+from app.services.cbr_import import CBRImportService
+
+RECORDS = 60_000
+
+
+def make_records(changed_every: int = 0) -> list[dict]:
+    records = []
+    for i in range(RECORDS):
+        suffix = " (новое название)" if changed_every and i % changed_every == 0 else ""
+        records.append({
+            "bik": f"99{i:07d}",
+            "name": f"Банк {i}{suffix}",
+            "correspondent_account": f"301018100{i:011d}",
+        })
+    return records
+
+
+async def per_row_upsert(db: AsyncSession, records: list[dict]) -> None:
+    """Прежняя запись: отдельный INSERT ... ON CONFLICT на каждую запись"""
+    for record in records:
+        await db.execute(pg_insert(Bank).values(**record).on_conflict_do_update(
+            index_elements=["bik"],
+            set_={"name": record["name"], "correspondent_account": record["correspondent_account"]},
+        ))
+
+
+async def copy_upsert(service: CBRImportService, db: AsyncSession, records: list[dict]):
+    """Новая запись; временная таблица живёт до конца транзакции, поэтому очищается"""
+    await service.create_staging(db)
+    await db.execute(text("TRUNCATE cbr_banks_import"))
+    await service.copy_records(db, records)
+    return await service.merge_staging(db)
+
+
+async def wal_lsn(db: AsyncSession) -> str:
+    return (await db.execute(text("SELECT pg_current_wal_lsn()"))).scalar()
+
+
+async def measure(db: AsyncSession, title: str, step) -> None:
+    start_lsn = await wal_lsn(db)
+    start = time.perf_counter()
+    counts = await step()
+    elapsed = time.perf_counter() - start
+    wal = (await db.execute(
+        text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), CAST(:lsn AS pg_lsn))"), {"lsn": start_lsn}
+    )).scalar()
+    line = f"  {title:<20} {elapsed:>7.2f} с {int(wal) / 1024 / 1024:>8.1f} МБ WAL"
+    if counts:
+        line += "   добавлено {}, обновлено {}, без изменений {}".format(*counts)
+    print(line)
+
+
+async def run() -> None:
+    engine = create_async_engine(settings.database_url)
+    service = CBRImportService()
+    initial, changed = make_records(), make_records(changed_every=100)
+    try:
+        print("INSERT ... ON CONFLICT на каждую запись:")
+        async with AsyncSession(engine) as db:
+            await measure(db, "первый импорт", lambda: per_row_upsert(db, initial))
+            await measure(db, "повторный импорт", lambda: per_row_upsert(db, initial))
+            await measure(db, "1% изменений", lambda: per_row_upsert(db, changed))
+            await db.rollback()
+
+        print("\nCOPY и один INSERT ... SELECT:")
+        async with AsyncSession(engine) as db:
+            for title, records in (
+                ("первый импорт", initial),
+                ("повторный импорт", initial),
+                ("1% изменений", changed),
+            ):
+                await measure(db, title, lambda records=records: copy_upsert(service, db, records))
+            await db.rollback()
+    finally:
+        await engine.dispose()
+
+
+def main():
+    """Главная функция бенчмарка"""
+    print("=" * 60)
+    print(f"Бенчмарк записи справочника БИК ({RECORDS:,} записей)")
+    print("=" * 60)
+
+    asyncio.run(run())
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
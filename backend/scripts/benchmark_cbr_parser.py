@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк разбора справочника БИК (ED807).
+Собирает синтетический архив ЦБ на 60 тыс. записей и сравнивает прежний
+разбор (файл целиком, ET.fromstring, список записей) с потоковым iterparse
+пачками: пиковая память (прирост ru_maxrss) и время. Каждый разбор идёт в
+отдельном процессе, чтобы пики не смешивались; выдача сравнивается по
+контрольной сумме. БД не нужна.
+"""
+import hashlib
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.config import settings
+from app.services.cbr_import import ED807_NS, CBRImportService
+
+ENTRIES = 60_000
+
+
+def write_archive(path: Path) -> None:
+    """Архив с ED807 той же структуры, что у ЦБ: участник, ограничения, счета"""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        with zf.open("20261017_ED807_full.xml", "w") as raw:
+            f = io.TextIOWrapper(raw, encoding="utf-8")
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            f.write(f'<ED807 xmlns="{ED807_NS["cbr"]}" EDNo="1" EDDate="2026-10-17" EDAuthor="4583001999" '
+                    'CreationReason="FCBD" CreationDateTime="2026-10-17T00:00:00Z" InfoTypeCode="FIRR" '
+                    'BusinessDay="2026-10-17" DirectoryVersion="1">\n')
+            for i in range(ENTRIES):
+                bik = f"04{i:07d}"
+                name = quoteattr(f"ПАО Банк «Тестовый {i}» — филиал №{i % 97}")
+                f.write(
+                    f'<BICDirectoryEntry BIC="{bik}">'
+                    f'<ParticipantInfo NameP={name} EnglName="Test Bank {i}" RegN="{i}" CntrCd="RU" '
+                    f'Rgn="45" Ind="1{i % 100000:05d}" Tnp="г" Nnp="Москва" Adr="ул. Тестовая, д. {i % 300}" '
+                    f'DateIn="1992-01-01" PtType="20" Srvcs="5" XchType="1" UID="{4500000000 + i}" '
+                    f'ParticipantStatus="PSAC"><RstrList Rstr="URRS" RstrDate="2020-01-01"/></ParticipantInfo>'
+                )
+                for kind, account in (("CBRA", f"4010281{i:013d}"), ("CRSA", f"30101810{i:012d}")):
+                    f.write(
+                        f'<Accounts Account="{account}" RegulationAccountType="{kind}" CK="45" '
+                        f'AccountCBRBIC="044525000" DateIn="2000-01-01" AccountStatus="ACAC"/>'
+                    )
+                f.write("</BICDirectoryEntry>\n")
+            f.write("</ED807>\n")
+            f.flush()
+            f.detach()
+
+
+def parse_whole_file(zip_content: bytes) -> list[dict]:
+    """Прежний разбор: XML целиком в памяти, дерево целиком, список всех записей"""
+    with zipfile.ZipFile(io.BytesIO(zip_content)) as zf:
+        xml_content = zf.read([n for n in zf.namelist() if n.endswith(".xml")][0])
+    root = ET.fromstring(xml_content)
+    return [
+        record
+        for entry in root.findall(".//cbr:BICDirectoryEntry", ED807_NS)
+        if (record := CBRImportService.parse_entry(entry)) is not None
+    ]
+
+
+def run_parser(mode: str, path: str) -> dict:
+    """Разбор в этом процессе; пик памяти считается от состояния до чтения архива"""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    zip_content = Path(path).read_bytes()
+    digest = hashlib.sha256()
+    records = 0
+    if mode == "old":
+        batches = [parse_whole_file(zip_content)]
+    else:
+        batches = CBRImportService().iter_ed807_batches(zip_content, settings.cbr_import_batch_size)
+    for batch in batches:
+        for record in batch:
+            digest.update(f"{record['bik']}|{record['name']}|{record['correspondent_account']}\n".encode())
+        records += len(batch)
+    return {
+        "seconds": time.perf_counter() - start,
+        "rss_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024,
+        "records": records,
+        "digest": digest.hexdigest(),
+    }
+
+
+def main():
+    """Главная функция бенчмарка"""
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        print(json.dumps(run_parser(sys.argv[2], sys.argv[3])))
+        return 0
+
+    print("=" * 60)
+    print(f"Бенчмарк разбора ED807 ({ENTRIES:,} записей)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "newbik.zip"
+        write_archive(path)
+        with zipfile.ZipFile(path) as zf:
+            xml_size = zf.infolist()[0].file_size
+        print(f"Архив: {path.stat().st_size / 1024 / 1024:.1f} МБ, XML: {xml_size / 1024 / 1024:.1f} МБ\n")
+
+        results = {}
+        for mode, title in (("old", "Весь файл и дерево"), ("new", "Потоковый iterparse")):
+            output = subprocess.run(
+                [sys.executable, __file__, "--run", mode, str(path)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = json.loads(output)
+            r = results[mode]
+            print(f"  {title:<22} {r['seconds']:>6.2f} с {r['rss_mb']:>8.1f} МБ пик памяти "
+                  f"({r['records']:,} записей)")
+
+    old, new = results["old"], results["new"]
+    same = old["digest"] == new["digest"] and old["records"] == ENTRIES
+    print(f"\n  {'✓' if same else '✗'} Одинаковые записи у обоих разборов")
+    print(f"  Память: в {old['rss_mb'] / max(new['rss_mb'], 0.1):.0f} раз меньше")
+    print("=" * 60)
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
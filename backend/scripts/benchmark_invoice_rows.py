@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк заполнения таблицы услуг счёта.
+Сравнивает прежний способ (insert_rows + копирование объектов стилей по 70
+колонкам), expand_service_rows (один сдвиг листа, копирование индексов стилей)
+и сборку скомпилированного xlsx-архива на 1/10/100/1000 услугах.
+"""
+import sys
+import time
+from copy import copy
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.document.invoice_generator import (
+    SERVICES_ROW,
+    fill_services_table,
+    get_invoice_package,
+    load_invoice_template,
+    service_row_values,
+    totals_values,
+)
+from sample_data import make_sample_contract
+
+SERVICE_COUNTS = (1, 10, 100, 1000)
+REPEATS = 3
+
+
+def legacy_fill_services_table(ws, services: list, start_row: int = SERVICES_ROW):
+    """Прежняя реализация: insert_rows и copy() стилей каждой ячейки"""
+    if len(services) > 1:
+        ws.insert_rows(start_row + 1, len(services) - 1)
+        for i in range(1, len(services)):
+            for col in range(1, 71):
+                source_cell = ws.cell(row=start_row, column=col)
+                target_cell = ws.cell(row=start_row + i, column=col)
+                if source_cell.has_style:
+                    target_cell.font = copy(source_cell.font)
+                    target_cell.border = copy(source_cell.border)
+                    target_cell.fill = copy(source_cell.fill)
+                    target_cell.number_format = source_cell.number_format
+                    target_cell.protection = copy(source_cell.protection)
+                    target_cell.alignment = copy(source_cell.alignment)
+    for i, service in enumerate(services):
+        for column, value in service_row_values(i, service).items():
+            ws[f"{column}{start_row + i}"] = value
+
+
+def measure_openpyxl(fill, services) -> float:
+    """Лучшее время заполнения (мс); загрузка шаблона не входит в замер"""
+    best = float("inf")
+    for _ in range(REPEATS):
+        ws = load_invoice_template().active
+        start = time.perf_counter()
+        fill(ws, services)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def measure_package(services) -> float:
+    package = get_invoice_package()
+    cells = dict(package.cell_texts)
+    cells.update(totals_values(sum(s.price for s in services), len(services)))
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        rows = [service_row_values(i, service) for i, service in enumerate(services)]
+        package.render(cells, rows, images={"qr": b""})
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    """Главная функция бенчмарка"""
+    print("=" * 60)
+    print("Бенчмарк заполнения таблицы услуг счёта (мс)")
+    print("=" * 60)
+    print(f"  {'услуг':>6} {'insert_rows':>12} {'expand':>10} {'xlsx-архив':>11}")
+
+    for count in SERVICE_COUNTS:
+        services = make_sample_contract(services_count=count).services
+        legacy_ms = measure_openpyxl(legacy_fill_services_table, services)
+        expand_ms = measure_openpyxl(fill_services_table, services)
+        package_ms = measure_package(services)
+        print(f"  {count:>6} {legacy_ms:>12.2f} {expand_ms:>10.2f} {package_ms:>11.2f}")
+
+    print("\n" + "=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
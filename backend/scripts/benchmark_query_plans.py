@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Регрессия планов запросов API на объёмах, близких к боевым.
+
+Заполняет отдельную базу Postgres синтетическими данными (по умолчанию
+1 млн клиентов, 3 млн договоров, 60 тыс. банков, 10 тыс. услуг), вызывает
+эндпоинты app/routers/* через ASGI, перехватывает каждый SELECT, который
+они отправляют в базу, и выполняет его с EXPLAIN (ANALYZE, BUFFERS).
+Результаты сравниваются с базовой линией в JSON: проверка не проходит,
+если появился Seq Scan по большой таблице, которого не было в базовой
+линии, или время запроса выросло больше порога.
+
+База задаётся --database-url (или PLANS_DATABASE_URL) и не может совпадать
+с DATABASE_URL приложения: заполнение очищает таблицы. Схема создаётся
+миграциями (alembic upgrade head). Заполнение занимает несколько минут;
+без --seed используются уже загруженные данные.
+
+    python scripts/benchmark_query_plans.py --database-url ... --seed --update-baseline
+    python scripts/benchmark_query_plans.py --database-url ...
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.auth import get_current_user
+from app.config import settings
+from app.database import get_db
+from app.main import app
+from app.services.bank_usage import RECONCILE_BANK_USAGE_SQL
+from app.services.contracts import find_contract_ids
+
+DEFAULT_BASELINE = SCRIPT_DIR / "query_plans_baseline.json"
+
+# Seq Scan по этим таблицам на заполненной базе — признак недостающего индекса
+LARGE_TABLES = {"clients", "contracts", "contract_services", "banks", "services"}
+
+TRUNCATE_SQL = (
+    "TRUNCATE contract_services, contracts, clients, banks, services, templates RESTART IDENTITY CASCADE"
+)
+
+SEED_SQL = [
+    """
+    INSERT INTO banks (id, name, bik, correspondent_account)
+    SELECT g, 'Банк ' || initcap(substr(md5(g::text), 1, 10)),
+           '04' || lpad(g::text, 7, '0'), '30101810' || lpad(g::text, 12, '0')
+    FROM generate_series(1, :banks) AS g
+    """,
+    """
+    INSERT INTO services (id, name, price, payment_terms)
+    SELECT g, 'Услуга ' || substr(md5(g::text), 1, 8), 1000 + g % 50000,
+           'Оплата в течение ' || (5 + g % 25) || ' дней'
+    FROM generate_series(1, :services) AS g
+    """,
+    """
+    INSERT INTO templates (id, name, sections, is_default, created_at, updated_at)
+    SELECT g, 'Шаблон ' || g, '{}'::json, g = 1, now(), now()
+    FROM generate_series(1, 5) AS g
+    """,
+    """
+    INSERT INTO clients (id, client_type, name, inn, address, email, phone, bank_id,
+                         last_name, first_name, created_at)
+    SELECT g, 'ip', 'ИП ' || n.last_name || ' ' || n.first_name,
+           lpad((g::bigint * 7919 % 1000000000000)::text, 12, '0'), 'г. Москва, ул. Тестовая, д. ' || g % 300,
+           lower(md5(g::text)) || '@mail.ru', '+7' || lpad((g::bigint * 104729 % 10000000000)::text, 10, '0'),
+           CASE WHEN g % 10 = 0 THEN NULL ELSE 1 + (g::bigint * 7919) % :banks END,
+           n.last_name, n.first_name,
+           timestamp '2021-01-01' + (g::bigint * 97 % (5 * 365 * 86400)) * interval '1 second'
+    FROM generate_series(1, :clients) AS g,
+         LATERAL (SELECT 'Фамилия' || substr(md5(g::text), 1, 6) AS last_name,
+                         'Имя' || substr(md5((g * 3)::text), 1, 4) AS first_name) AS n
+    """,
+    """
+    INSERT INTO contracts (id, number, client_id, template_id, date, created_at)
+    SELECT g, 'ДОГ-' || lpad(g::text, 8, '0'), 1 + (g::bigint * 7919) % :clients, 1 + g % 5,
+           date '2021-01-01' + (g::bigint * 31 % (5 * 365))::int,
+           timestamp '2021-01-01' + (g::bigint * 89 % (5 * 365 * 86400)) * interval '1 second'
+    FROM generate_series(1, :contracts) AS g
+    """,
+    """
+    INSERT INTO contract_services (contract_id, service_id)
+    SELECT c.id, 1 + (c.id::bigint * 7919 + s * 104729) % :services
+    FROM contracts c, generate_series(0, 1) AS s
+    ON CONFLICT DO NOTHING
+    """,
+]
+
+SEQUENCES = ("banks", "services", "templates", "clients", "contracts")
+
+
+@dataclass
+class Case:
+    """Эндпоинт API (path) или функция сервиса (call) с запросами к базе"""
+    name: str
+    path: str | None = None
+    call: Callable[[AsyncSession], Awaitable] | None = None
+    # Взять next_cursor из ответа на этот адрес и добавить к path
+    cursor_from: str | None = None
+    method: str = "GET"
+
+
+@dataclass
+class Captured:
+    statements: list[tuple[str, tuple]] = field(default_factory=list)
+    enabled: bool = False
+
+
+def make_cases(volumes: dict) -> list[Case]:
+    client_id = volumes["clients"] // 2
+    contract_id = volumes["contracts"] // 2
+    return [
+        Case("clients", "/api/clients?per_page=20"),
+        Case("clients-deep-page", "/api/clients?per_page=20&page=500&count=none"),
+        Case("clients-cursor", "/api/clients?per_page=20&count=none", cursor_from="/api/clients?per_page=20&count=none"),
+        Case("clients-estimated", "/api/clients?per_page=20&count=estimated"),
+        Case("clients-search", "/api/clients?per_page=20&count=none&search=фамилия1a2"),
+        Case("clients-search-inn", "/api/clients?per_page=20&count=none&search=0000791"),
+        Case("clients-search-rank", "/api/clients?per_page=20&count=none&rank=true&search=фамилия1a2"),
+        Case("client", f"/api/clients/{client_id}"),
+        Case("client-contracts", f"/api/clients/{client_id}/contracts"),
+        Case("contracts", "/api/contracts?per_page=20"),
+        Case("contracts-cursor", "/api/contracts?per_page=20&count=none",
+             cursor_from="/api/contracts?per_page=20&count=none"),
+        Case("contracts-estimated", "/api/contracts?per_page=20&count=estimated"),
+        Case("contracts-search-number", "/api/contracts?per_page=20&count=none&search=дог-0001234"),
+        Case("contracts-search-client", "/api/contracts?per_page=20&count=none&search=фамилия1a2"),
+        Case("contracts-period", "/api/contracts?per_page=20&date_from=2023-03-01&date_to=2023-03-07"),
+        Case("contracts-export-ids", call=lambda db: find_contract_ids(
+            db, date_from=date(2023, 3, 1), date_to=date(2023, 3, 7))),
+        Case("contract", f"/api/contracts/{contract_id}"),
+        Case("banks", "/api/banks?per_page=20&count=none"),
+        Case("banks-search", "/api/banks?per_page=20&count=none&search=банк 1a"),
+        Case("banks-search-bik", "/api/banks?per_page=20&count=none&search=0400012"),
+        # Индекс в памяти не загружен: запрос идёт в базу, как при старте API
+        Case("banks-lookup-fallback", "/api/banks/lookup?q=банк 1a"),
+        Case("bank", "/api/banks/1"),
+        Case("services", "/api/services?per_page=20"),
+        Case("services-search", "/api/services?per_page=20&count=none&search=услуга 1a"),
+        Case("templates", "/api/templates"),
+        Case("template-default", "/api/templates/default"),
+        # Шаблон используется в договорах: удаление отклоняется после подсчёта ссылок
+        Case("template-delete-in-use", "/api/templates/2", method="DELETE"),
+    ]
+
+
+def migrate(database_url: str) -> None:
+    env = {**os.environ, "DATABASE_URL": database_url}
+    subprocess.run(["alembic", "upgrade", "head"], cwd=BACKEND_DIR, env=env, check=True)
+
+
+async def seed(engine, volumes: dict) -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(TRUNCATE_SQL))
+        try:
+            # Без триггеров (счётчик банков) и проверок внешних ключей; нужен суперпользователь
+            await conn.execute(text("SET session_replication_role = replica"))
+        except Exception as e:
+            print(f"  триггеры не отключены ({e.__class__.__name__}), заполнение будет дольше")
+        for statement in SEED_SQL:
+            params = {k: v for k, v in volumes.items() if f":{k}" in statement}
+            await conn.execute(text(statement), params)
+        await conn.execute(text(RECONCILE_BANK_USAGE_SQL))
+        for table in SEQUENCES:
+            await conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+            ))
+        # Статистика для планировщика и карта видимости для index-only scan
+        await conn.execute(text("VACUUM ANALYZE"))
+
+
+def walk_plan(node: dict, seq_scans: set[str]) -> None:
+    if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES:
+        seq_scans.add(node["Relation Name"])
+    for child in node.get("Plans", []):
+        walk_plan(child, seq_scans)
+
+
+async def explain(conn, statement: str, parameters: tuple, repeats: int) -> dict:
+    """Медиана времени (планирование + выполнение), Seq Scan по большим таблицам и буферы"""
+    times, plan = [], None
+    for _ in range(repeats):
+        result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        plan = plan[0]
+        times.append(plan["Planning Time"] + plan["Execution Time"])
+    seq_scans = set()
+    walk_plan(plan["Plan"], seq_scans)
+    return {
+        "sql": " ".join(statement.split())[:300],
+        "time_ms": round(statistics.median(times), 3),
+        "seq_scans": sorted(seq_scans),
+        "buffers": plan["Plan"].get("Shared Hit Blocks", 0) + plan["Plan"].get("Shared Read Blocks", 0),
+    }
+
+
+async def run_cases(engine, cases: list[Case], repeats: int) -> dict:
+    captured = Captured()
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if captured.enabled and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.statements.append((statement, parameters))
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: "benchmark"
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://plans") as client:
+        for case in cases:
+            path = case.path
+            if case.cursor_from:
+                first = (await client.get(case.cursor_from)).json()
+                path = f"{path}&cursor={first['next_cursor']}"
+
+            captured.statements, captured.enabled = [], True
+            if case.call:
+                async with session_factory() as db:
+                    await case.call(db)
+                status = 200
+            else:
+                status = (await client.request(case.method, path)).status_code
+            captured.enabled = False
+
+            async with engine.connect() as conn:
+                queries = [await explain(conn, s, p, repeats) for s, p in captured.statements]
+                await conn.rollback()
+            results[case.name] = {
+                "status": status,
+                "time_ms": round(sum(q["time_ms"] for q in queries), 3),
+                "seq_scans": sorted({t for q in queries for t in q["seq_scans"]}),
+                "queries": queries,
+            }
+    app.dependency_overrides.clear()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_ms: float) -> list[str]:
+    """Новые Seq Scan и рост времени относительно базовой линии"""
+    failures = []
+    base_cases = baseline.get("cases", {})
+    print(f"  {'Эндпоинт':<28} {'мс':>9} {'база, мс':>9}  Seq Scan")
+    for name, result in results.items():
+        base = base_cases.get(name)
+        problems = []
+        if result["status"] >= 500:
+            problems.append(f"ответ {result['status']}")
+        new_scans = set(result["seq_scans"]) - set(base["seq_scans"] if base else [])
+        if new_scans:
+            problems.append(f"новый Seq Scan: {', '.join(sorted(new_scans))}")
+        if base and result["time_ms"] > base["time_ms"] * (1 + threshold) and \
+                result["time_ms"] - base["time_ms"] > min_ms:
+            problems.append(f"медленнее базы в {result['time_ms'] / max(base['time_ms'], 0.001):.1f} раза")
+
+        base_ms = f"{base['time_ms']:>9.1f}" if base else f"{'—':>9}"
+        mark = "✗" if problems else "✓"
+        print(f"  {mark} {name:<24} {result['time_ms']:>9.1f} {base_ms}  {', '.join(result['seq_scans']) or '—'}")
+        failures.extend(f"{name}: {problem}" for problem in problems)
+    return failures
+
+
+async def run(args) -> int:
+    engine = create_async_engine(args.database_url, poolclass=NullPool)
+    volumes = {"clients": args.clients, "contracts": args.contracts, "banks": args.banks, "services": args.services}
+    try:
+        if args.seed:
+            print("Заполнение: " + ", ".join(f"{k} {v:,}" for k, v in volumes.items()) + "...")
+            await seed(engine, volumes)
+        else:
+            async with engine.connect() as conn:
+                for table in volumes:
+                    volumes[table] = (await conn.execute(text(f"SELECT max(id) FROM {table}"))).scalar() or 0
+        print()
+        results = await run_cases(engine, make_cases(volumes), args.repeats)
+    finally:
+        await engine.dispose()
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(results, ensure_ascii=False, indent=2))
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    failures = compare(results, baseline, args.threshold, args.min_ms)
+
+    if args.update_baseline:
+        baseline = {
+            "volumes": volumes,
+            "cases": {name: {"time_ms": r["time_ms"], "seq_scans": r["seq_scans"]} for name, r in results.items()},
+        }
+        baseline_path.write_text(json.dumps(baseline, ensure_ascii=False, indent=2) + "\n")
+        print(f"\nБазовая линия записана: {baseline_path}")
+        return 0
+
+    if failures:
+        print("\nРегрессии:")
+        for failure in failures:
+            print(f"  ✗ {failure}")
+        return 1
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Регрессия планов запросов API")
+    parser.add_argument("--database-url", default=os.environ.get("PLANS_DATABASE_URL"),
+                        help="отдельная база для заполнения (PLANS_DATABASE_URL)")
+    parser.add_argument("--seed", action="store_true", help="очистить таблицы и заполнить заново")
+    parser.add_argument("--clients", type=int, default=1_000_000)
+    parser.add_argument("--contracts", type=int, default=3_000_000)
+    parser.add_argument("--banks", type=int, default=60_000)
+    parser.add_argument("--services", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=3, help="запусков EXPLAIN ANALYZE на запрос")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.5, help="допустимый рост времени (0.5 — на 50%%)")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="рост меньше этого (мс) не считается регрессией")
+    parser.add_argument("--report", help="записать полный отчёт с SQL в JSON")
+    return parser.parse_args()
+
+
+def main():
+    """Главная функция проверки"""
+    args = parse_args()
+    if not args.database_url:
+        print("Нужна отдельная база: --database-url или PLANS_DATABASE_URL")
+        return 2
+    if args.database_url == settings.database_url:
+        print("База планов совпадает с DATABASE_URL приложения: заполнение очистит её таблицы")
+        return 2
+
+    print("=" * 60)
+    print("Регрессия планов запросов")
+    print("=" * 60)
+
+    migrate(args.database_url)
+    code = asyncio.run(run(args))
+    print("=" * 60)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
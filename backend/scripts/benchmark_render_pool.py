@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк рендеринга DOCX/XLSX в пуле процессов.
+Запускает пачку параллельных скачиваний разных договоров (промахи кэша)
+и замеряет общее время и максимальную задержку цикла событий: пока документ
+строится в потоке цикла, остальные запросы API стоят.
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.document.render_cache import render_cache
+from app.document.render_pool import render_pool
+from app.document.rendering import (
+    FORMAT_CONTRACT_DOCX,
+    FORMAT_INVOICE_XLSX,
+    generate_format,
+    render_document_async,
+)
+from app.document.snapshot import ContractSnapshot
+from sample_data import make_sample_contract
+
+DOWNLOADS = 24
+WORKERS = min(4, os.cpu_count() or 1)
+
+
+async def measure_lag(stop: asyncio.Event) -> float:
+    """Максимальная задержка срабатывания таймера 10 мс"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    return worst
+
+
+async def run_downloads(snapshots, render) -> tuple[float, float]:
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(render(snapshot, fmt) for snapshot, fmt in snapshots))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return elapsed, await lag_task
+
+
+async def render_on_loop(snapshot, fmt):
+    # Прежнее поведение: синхронная генерация прямо в обработчике
+    return generate_format(snapshot, fmt)
+
+
+def make_snapshots() -> list:
+    formats = (FORMAT_CONTRACT_DOCX, FORMAT_INVOICE_XLSX)
+    return [
+        (ContractSnapshot.from_model(make_sample_contract(services_count=5, number=f"{i}/2026")),
+         formats[i % 2])
+        for i in range(DOWNLOADS)
+    ]
+
+
+async def bench():
+    snapshots = make_snapshots()
+
+    # Прогрев кэшей в родительском процессе для честного сравнения
+    for snapshot, fmt in snapshots[:2]:
+        generate_format(snapshot, fmt)
+
+    inline_time, inline_lag = await run_downloads(snapshots, render_on_loop)
+    print(f"  В цикле событий    : {inline_time:6.2f} с, задержка цикла до {inline_lag * 1000:7.1f} мс")
+
+    render_pool.workers = WORKERS
+    await asyncio.to_thread(render_pool.start)
+    try:
+        render_cache.clear()
+        pool_time, pool_lag = await run_downloads(snapshots, render_document_async)
+    finally:
+        await asyncio.to_thread(render_pool.stop)
+    print(f"  Пул процессов ({WORKERS})  : {pool_time:6.2f} с, задержка цикла до {pool_lag * 1000:7.1f} мс")
+
+
+def main():
+    """Главная функция бенчмарка"""
+    print("=" * 60)
+    print(f"Рендеринг {DOWNLOADS} документов: цикл событий vs пул процессов")
+    print("=" * 60)
+    asyncio.run(bench())
+    print("\n" + "=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
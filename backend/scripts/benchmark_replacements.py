@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк подстановки меток в шаблон договора.
+Сравнивает replace_in_paragraph (цикл по всем ключам) и substitute_paragraph
+(один проход по параграфу) на шаблоне по умолчанию.
+"""
+import sys
+import time
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.document.replacements import (
+    build_replacements,
+    replace_in_paragraph,
+    substitute_paragraph,
+)
+from app.document.tables import fill_services_table
+from app.document.template_cache import template_cache
+from sample_data import make_sample_contract
+
+ITERATIONS = 50
+
+
+def iter_paragraphs(doc):
+    yield from doc.paragraphs
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                yield from cell.paragraphs
+
+
+def run(contract, substitute) -> tuple[float, str]:
+    """Возвращает среднее время подстановки (мс) и итоговый текст документа"""
+    elapsed = 0.0
+    text = ""
+    for _ in range(ITERATIONS):
+        doc = template_cache.get(None).instantiate()
+        total = fill_services_table(doc, contract.services)
+        replacements = build_replacements(contract, total)
+        paragraphs = list(iter_paragraphs(doc))
+
+        start = time.perf_counter()
+        for para in paragraphs:
+            substitute(para, replacements)
+        elapsed += time.perf_counter() - start
+
+        text = "\n".join(para.text for para in iter_paragraphs(doc))
+    return elapsed / ITERATIONS * 1000, text
+
+
+def main():
+    """Главная функция бенчмарка"""
+    print("=" * 60)
+    print("Бенчмарк подстановки меток (шаблон по умолчанию)")
+    print("=" * 60)
+
+    contract = make_sample_contract()
+    legacy_ms, legacy_text = run(contract, replace_in_paragraph)
+    single_ms, single_text = run(contract, substitute_paragraph)
+
+    print(f"  replace_in_paragraph : {legacy_ms:8.2f} мс")
+    print(f"  substitute_paragraph : {single_ms:8.2f} мс")
+    print(f"  Ускорение            : {legacy_ms / single_ms:8.1f}x")
+
+    if legacy_text != single_text:
+        print("\n✗ Результаты подстановки различаются")
+        return 1
+
+    print("\n✓ Результаты подстановки совпадают")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
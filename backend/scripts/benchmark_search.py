@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска подстроки (подсказки при вводе) в Postgres.
+Создаёт временные таблицы клиентов (1 млн) и банков (50 тыс.) с теми же
+search_text и триграммными индексами, что и в миграции, и сравнивает
+прежнее условие (OR по ILIKE) с LIKE по search_text. Таблицы временные:
+база DATABASE_URL не меняется. Нужен Postgres с расширением pg_trgm.
+"""
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.search import search_pattern
+
+CLIENTS = 1_000_000
+BANKS = 50_000
+REPEATS = 20
+TARGET_MS = 20.0
+
+SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    CREATE TEMP TABLE bench_clients AS
+    SELECT g AS id,
+           'ИП ' || last_name || ' ' || first_name AS name,
+           lpad((g::bigint * 7919 % 1000000000000)::text, 12, '0') AS inn,
+           last_name, first_name,
+           '+7' || lpad((g::bigint * 104729 % 10000000000)::text, 10, '0') AS phone,
+           lower(md5(g::text)) || '@mail.ru' AS email
+    FROM generate_series(1, {CLIENTS}) AS g,
+         LATERAL (SELECT 'Фамилия' || substr(md5(g::text), 1, 6) AS last_name,
+                         'Имя' || substr(md5((g * 3)::text), 1, 4) AS first_name) AS n
+    """,
+    f"""
+    CREATE TEMP TABLE bench_banks AS
+    SELECT g AS id,
+           'Банк ' || initcap(substr(md5(g::text), 1, 10)) AS name,
+           '04' || lpad(g::text, 7, '0') AS bik
+    FROM generate_series(1, {BANKS}) AS g
+    """,
+    """ALTER TABLE bench_clients ADD COLUMN search_text text GENERATED ALWAYS AS (
+        lower(name || ' ' || coalesce(inn, '') || ' ' || last_name || ' ' || first_name
+              || ' ' || coalesce(phone, '') || ' ' || coalesce(email, ''))) STORED""",
+    "ALTER TABLE bench_banks ADD COLUMN search_text text GENERATED ALWAYS AS (lower(name || ' ' || bik)) STORED",
+    "CREATE INDEX ON bench_clients USING gin (search_text gin_trgm_ops)",
+    "CREATE INDEX ON bench_banks USING gin (search_text gin_trgm_ops)",
+    "ANALYZE bench_clients",
+    "ANALYZE bench_banks",
+]
+
+OLD_CLIENTS = """
+SELECT id FROM bench_clients
+WHERE name ILIKE :p OR inn ILIKE :p OR last_name ILIKE :p OR first_name ILIKE :p
+   OR phone ILIKE :p OR email ILIKE :p
+ORDER BY id LIMIT 20
+"""
+NEW_CLIENTS = "SELECT id FROM bench_clients WHERE search_text LIKE :p ESCAPE '/' ORDER BY id LIMIT 20"
+OLD_BANKS = "SELECT id FROM bench_banks WHERE name ILIKE :p OR bik ILIKE :p ORDER BY name, id LIMIT 20"
+NEW_BANKS = "SELECT id FROM bench_banks WHERE search_text LIKE :p ESCAPE '/' ORDER BY name, id LIMIT 20"
+
+# Как вводит пользователь: фрагменты фамилии, ИНН, телефона, названия банка, БИК
+CLIENT_QUERIES = ["фамилия1a2", "имяb3", "0000791", "+7000010", "c4ca42"]
+BANK_QUERIES = ["банк 1a", "c4ca4238", "0400012", "банк ec"]
+
+
+async def timed(conn, sql: str, search: str, literal: bool) -> float:
+    """Медиана времени запроса, мс"""
+    pattern = search_pattern(search) if not literal else f"%{search}%"
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await conn.execute(text(sql), {"p": pattern})
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+async def run() -> bool:
+    engine = create_async_engine(settings.database_url)
+    ok = True
+    try:
+        async with engine.connect() as conn:
+            print(f"Подготовка: {CLIENTS:,} клиентов, {BANKS:,} банков...")
+            start = time.perf_counter()
+            for statement in SETUP:
+                await conn.execute(text(statement))
+            print(f"  готово за {time.perf_counter() - start:.1f} с\n")
+
+            for title, old, new, queries in (
+                ("Клиенты", OLD_CLIENTS, NEW_CLIENTS, CLIENT_QUERIES),
+                ("Банки", OLD_BANKS, NEW_BANKS, BANK_QUERIES),
+            ):
+                print(f"{title}:")
+                print(f"  {'Запрос':<14} {'OR ILIKE, мс':>14} {'search_text, мс':>16}")
+                for search in queries:
+                    before = await timed(conn, old, search, literal=True)
+                    after = await timed(conn, new, search, literal=False)
+                    mark = "✓" if after <= TARGET_MS else "✗"
+                    ok = ok and after <= TARGET_MS
+                    print(f"  {search:<14} {before:>14.1f} {after:>16.1f} {mark}")
+                print()
+            await conn.rollback()
+    finally:
+        await engine.dispose()
+    return ok
+
+
+def main():
+    """Главная функция бенчмарка"""
+    print("=" * 60)
+    print("Бенчмарк триграммного поиска")
+    print("=" * 60)
+
+    ok = asyncio.run(run())
+    print(f"Цель: медиана не больше {TARGET_MS:.0f} мс — {'достигнута' if ok else 'не достигнута'}")
+    print("=" * 60)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Проверка и бенчмарк суммы прописью.
+Сравнивает integer_to_words_ru с num2words(lang='ru') на случайной выборке
+чисел 0..10^12 и граничных значениях, затем замеряет скорость.
+"""
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from num2words import num2words
+
+from app.document.amount_words import integer_to_words_ru, rubles_to_words
+from app.document.invoice_generator import format_price_words
+
+SAMPLES = 200_000
+BENCH_ITERATIONS = 20_000
+MAX_VALUE = 10 ** 12
+
+
+def sample_numbers(rng: random.Random) -> list[int]:
+    edges = [0, 1, 2, 5, 10, 11, 14, 19, 20, 21, 99, 100, 101, 111, 999, 1000, 1001, 2000, 5000,
+             11000, 21000, 22000, 100000, 999999, 1000000, 2000001, 10 ** 9, MAX_VALUE - 1, MAX_VALUE]
+    numbers = edges + list(range(0, 10000))
+    # Равномерно по количеству разрядов, чтобы покрыть все порядки
+    for _ in range(SAMPLES):
+        digits = rng.randint(1, 13)
+        numbers.append(rng.randint(0, min(10 ** digits, MAX_VALUE)))
+    return numbers
+
+
+def check_property(numbers: list[int]) -> list[int]:
+    return [n for n in numbers if integer_to_words_ru(n) != num2words(n, lang="ru")]
+
+
+def check_forms() -> list[str]:
+    expected = {
+        rubles_to_words(1): "один рубль",
+        rubles_to_words(2): "два рубля",
+        rubles_to_words(11): "одиннадцать рублей",
+        rubles_to_words(21000): "двадцать одна тысяча рублей",
+        rubles_to_words(1000000): "один миллион рублей",
+        format_price_words(Decimal("21000.01")): "Двадцать одна тысяча рублей 01 копейка",
+        format_price_words(Decimal("2.22")): "Два рубля 22 копейки",
+        format_price_words(Decimal("15.12")): "Пятнадцать рублей 12 копеек",
+    }
+    return [f"{got!r} != {want!r}" for got, want in expected.items() if got != want]
+
+
+def bench(func, numbers: list[int]) -> float:
+    """Среднее время вызова в микросекундах"""
+    start = time.perf_counter()
+    for n in numbers:
+        func(n)
+    return (time.perf_counter() - start) / len(numbers) * 1_000_000
+
+
+def main():
+    """Главная функция проверки"""
+    print("=" * 60)
+    print("Сумма прописью: сравнение с num2words")
+    print("=" * 60)
+
+    rng = random.Random(56042)
+    numbers = sample_numbers(rng)
+    mismatches = check_property(numbers)
+    form_errors = check_forms()
+
+    print(f"  Проверено чисел: {len(numbers):,}")
+    if mismatches or form_errors:
+        for n in mismatches[:10]:
+            print(f"  ✗ {n}: {integer_to_words_ru(n)!r} != {num2words(n, lang='ru')!r}")
+        for error in form_errors:
+            print(f"  ✗ {error}")
+        return 1
+    print("  ✓ Совпадает с num2words, формы рубля и копейки верны")
+
+    # Цены каталога услуг повторяются: меряем и уникальные значения, и повторы
+    unique = [rng.randint(0, MAX_VALUE) for _ in range(BENCH_ITERATIONS)]
+    repeated = [rng.choice((15000, 20000, 35000, 50000)) for _ in range(BENCH_ITERATIONS)]
+
+    integer_to_words_ru.cache_clear()
+    print(f"\n  num2words             : {bench(lambda n: num2words(n, lang='ru'), unique):8.2f} мкс")
+    print(f"  integer_to_words_ru   : {bench(integer_to_words_ru, unique):8.2f} мкс (без кэша)")
+    print(f"  rubles_to_words       : {bench(rubles_to_words, repeated):8.2f} мкс (повторы)")
+
+    print("\n" + "=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Проверка индекса справочника БИК в памяти.
+Строит индекс по синтетическому справочнику (50 тыс. банков, кириллица,
+«ё», регистр) и сравнивает выдачу lookup с полным перебором: каждое слово
+запроса — префикс БИК (цифры) или префикс слова названия, порядок —
+порядок загрузки. Замеряет время построения и медиану запроса. БД не нужна.
+"""
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.bank_index import BankIndex, build_index, tokenize
+
+BANKS = 50_000
+LIMIT = 20
+TARGET_MS = 1.0
+
+WORDS = [
+    "Сбербанк", "ВТБ", "Альфа-Банк", "Газпромбанк", "Тинькофф", "Открытие", "Промсвязьбанк",
+    "Совкомбанк", "Россельхозбанк", "Райффайзенбанк", "Уралсиб", "Ёлка", "Северный", "Южный",
+    "Московский", "Региональный", "Кредит", "Инвест", "Капитал", "Развитие", "Народный",
+]
+FORMS = ["ПАО", "АО", "ООО", "КБ", "АКБ", "Филиал", "Отделение"]
+
+QUERIES = [
+    "", "04", "044525", "044525225", "сбер", "СБЕР", "елка", "ёлк", "альфа банк",
+    "пао газпром", "филиал 04", "кб кап 0401", "московский развитие", "ооо", "нетакого", "99",
+]
+
+
+def make_rows() -> list[tuple[int, str, str]]:
+    rng = random.Random(21)
+    rows = []
+    biks = rng.sample(range(10_000_000), BANKS)
+    for i in range(BANKS):
+        name = f"{rng.choice(FORMS)} {rng.choice(WORDS)} {rng.choice(WORDS)} №{rng.randint(1, 999)}"
+        rows.append((i + 1, f"04{biks[i]:07d}", name))
+    # Порядок выдачи: как при загрузке из БД (usage_count DESC, name, id)
+    usage = {bank_id: rng.randint(0, 50) if rng.random() < 0.1 else 0 for bank_id, _, _ in rows}
+    rows.sort(key=lambda r: (-usage[r[0]], r[2], r[0]))
+    return rows
+
+
+def brute_force(rows, query: str, limit: int) -> list[int]:
+    tokens = tokenize(query)
+    found = []
+    for bank_id, bik, name in rows:
+        words = tokenize(name)
+        if all(
+            bik.startswith(t) if t.isdigit() else any(w.startswith(t) for w in words)
+            for t in tokens
+        ):
+            found.append(bank_id)
+            if len(found) == limit:
+                break
+    return found
+
+
+def main():
+    """Главная функция проверки"""
+    print("=" * 60)
+    print("Проверка индекса справочника БИК")
+    print("=" * 60)
+
+    rows = make_rows()
+    start = time.perf_counter()
+    index = BankIndex(refresh_interval=0)
+    index._data = build_index(rows)
+    index.loaded = True
+    print(f"Построение: {BANKS:,} банков за {(time.perf_counter() - start) * 1000:.0f} мс, "
+          f"слов в индексе {index.stats()['words']:,}\n")
+
+    failed = False
+    queries = QUERIES + [bik[:n] for _, bik, _ in rows[:50] for n in (3, 6, 9)]
+    for query in queries:
+        got = [item["id"] for item in index.lookup(query, LIMIT)]
+        expected = brute_force(rows, query, LIMIT)
+        if got != expected:
+            failed = True
+            print(f"  ✗ {query!r}: {got[:5]}... вместо {expected[:5]}...")
+    if not failed:
+        print(f"  ✓ Выдача совпадает с перебором ({len(queries)} запросов)")
+
+    times = []
+    for query in QUERIES * 50:
+        t = time.perf_counter()
+        index.lookup(query, LIMIT)
+        times.append((time.perf_counter() - t) * 1000)
+    median, worst = statistics.median(times), max(times)
+    fast = median <= TARGET_MS
+    failed = failed or not fast
+    print(f"  {'✓' if fast else '✗'} Запрос: медиана {median:.3f} мс, максимум {worst:.3f} мс "
+          f"(цель — медиана не больше {TARGET_MS:.0f} мс)")
+
+    print("\n" + "=" * 60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
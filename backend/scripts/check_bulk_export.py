@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Проверка массовой выгрузки договоров.
+Собирает потоковый zip из тестовых договоров без БД, проверяет архив и
+содержимое файлов, список ошибок, уникальность путей при похожих номерах,
+формат ZIP64 для больших выгрузок, то, что выгрузка не пишет в кэш
+документов, и то, что пик памяти не растёт с количеством договоров.
+"""
+import asyncio
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.document import export
+from app.document.export import export_filename, stream_export
+from app.document.rendering import FORMAT_CONTRACT_DOCX, FORMAT_INVOICE_XLSX, render_document
+from app.document.render_cache import render_cache
+from app.document.snapshot import ContractSnapshot
+from app.document.zip_package import ZipEntry, ZipStreamWriter
+from sample_data import make_sample_contract
+
+FORMATS = (FORMAT_CONTRACT_DOCX, FORMAT_INVOICE_XLSX)
+
+
+async def sample_snapshots(count: int):
+    for i in range(count):
+        contract = make_sample_contract(services_count=1 + i % 5, number=f"{i + 1}/2026")
+        contract.id = i + 1
+        yield ContractSnapshot.from_model(contract)
+
+
+def read_parts(data: bytes) -> dict[str, bytes]:
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+async def write_export(path: Path, count: int, formats=FORMATS) -> tuple[float, int]:
+    """Пишет выгрузку в файл; возвращает время (с) и пик памяти (байт)"""
+    render_cache.clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(path, "wb") as f:
+        async for chunk in stream_export(sample_snapshots(count), formats, concurrency=4):
+            f.write(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def check_archive(path: Path, count: int) -> list[str]:
+    errors = []
+    with zipfile.ZipFile(path) as zf:
+        if zf.testzip() is not None:
+            errors.append("архив повреждён")
+        names = set(zf.namelist())
+        if len(names) != count * len(FORMATS):
+            errors.append(f"в архиве {len(names)} файлов вместо {count * len(FORMATS)}")
+        contract = make_sample_contract(services_count=3, number="3/2026")
+        contract.id = 3
+        snapshot = ContractSnapshot.from_model(contract)
+        name = export_filename(snapshot, FORMAT_CONTRACT_DOCX)
+        if name != "3_2026_3/contract_3_2026.docx":
+            errors.append(f"неожиданное имя файла {name}")
+        else:
+            # Время в метаданных и заголовках zip различается, сравниваем части пакета
+            exported = read_parts(zf.read(name))
+            single = read_parts(render_document(snapshot, FORMAT_CONTRACT_DOCX))
+            if any(exported[part] != single.get(part) for part in exported if not part.startswith("docProps/")):
+                errors.append(f"{name} отличается от отдельного скачивания")
+    return errors
+
+
+async def check_failures(path: Path) -> list[str]:
+    """Ошибка одного документа попадает в errors.txt и не прерывает выгрузку"""
+    original = export.render_document_queued
+
+    async def failing(snapshot, fmt, store=True):
+        if snapshot.id == 2 and fmt == FORMAT_INVOICE_XLSX:
+            raise RuntimeError("boom")
+        return await original(snapshot, fmt, store)
+
+    export.render_document_queued = failing
+    try:
+        await write_export(path, 3)
+    finally:
+        export.render_document_queued = original
+    with zipfile.ZipFile(path) as zf:
+        names = zf.namelist()
+        report = zf.read("errors.txt").decode("utf-8") if "errors.txt" in names else ""
+    if len(names) != 3 * len(FORMATS) or "2_2026_2/invoice_2_2026.xlsx" not in report:
+        return ["ошибка документа не попала в errors.txt"]
+    return []
+
+
+async def check_cache_untouched(path: Path) -> list[str]:
+    """Выгрузка читает кэш документов, но не кладёт в него новые файлы"""
+    before = render_cache.stats()
+    await write_export(path, 5)
+    after = render_cache.stats()
+    errors = []
+    if after["entries"]:
+        errors.append(f"выгрузка положила в кэш документов {after['entries']} файлов")
+    if "disk" in after and after["disk"]["bytes"] > before["disk"]["bytes"]:
+        errors.append("выгрузка записала файлы в дисковый кэш документов")
+    return errors
+
+
+async def check_colliding_numbers() -> list[str]:
+    """Номера, совпадающие после замены символов (А/1 и А_1), дают разные пути в архиве"""
+    async def snapshots():
+        for contract_id, number in ((1, "А/1"), (2, "А_1")):
+            contract = make_sample_contract(services_count=1, number=number)
+            contract.id = contract_id
+            yield ContractSnapshot.from_model(contract)
+
+    buffer = BytesIO()
+    async for chunk in stream_export(snapshots(), (FORMAT_CONTRACT_DOCX,), concurrency=2):
+        buffer.write(chunk)
+    with zipfile.ZipFile(buffer) as zf:
+        names = zf.namelist()
+    if len(names) != 2 or len(set(names)) != 2:
+        return [f"совпадающие пути в архиве: {names}"]
+    return []
+
+
+def check_zip64(tmpdir: Path) -> list[str]:
+    """Архив больше 65535 частей и со смещениями за 4 ГиБ читается как ZIP64.
+
+    Смещения за 4 ГиБ проверяются без записи 4 ГиБ данных: архив пишется
+    в разреженный файл после пустого промежутка.
+    """
+    errors = []
+    writer = ZipStreamWriter()
+    path = tmpdir / "many.zip"
+    with open(path, "wb") as f:
+        for i in range(70_000):
+            f.write(writer.add(ZipEntry.store(f"{i}/contract_{i}.docx", str(i).encode())))
+        f.write(writer.finish())
+    with zipfile.ZipFile(path) as zf:
+        names = zf.namelist()
+        if len(names) != 70_000 or zf.testzip() is not None or zf.read(names[-1]) != b"69999":
+            errors.append(f"70000 частей: прочитано {len(names)}")
+
+    start = 5 * 1024 ** 3
+    writer = ZipStreamWriter()
+    writer.offset = start
+    path = tmpdir / "large.zip"
+    with open(path, "wb") as f:
+        f.seek(start)
+        for i in range(3):
+            f.write(writer.add(ZipEntry.deflate(f"{i}_2026_{i}/договор.docx", b"x" * 1000)))
+        f.write(writer.finish())
+    with zipfile.ZipFile(path) as zf:
+        offsets = [info.header_offset for info in zf.infolist()]
+        if zf.testzip() is not None or offsets[0] != start:
+            errors.append(f"смещения за 4 ГиБ прочитаны неверно: {offsets}")
+    path.unlink()
+    return errors
+
+
+async def main_async() -> int:
+    print("=" * 60)
+    print("Проверка массовой выгрузки договоров")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "export.zip"
+        results = {}
+        for count in (10, 100):
+            results[count] = await write_export(path, count)
+            errors = check_archive(path, count)
+            if errors:
+                for error in errors:
+                    print(f"  ✗ {count} договоров: {error}")
+                return 1
+            size = path.stat().st_size
+            elapsed, peak = results[count]
+            print(f"  ✓ {count:>4} договоров: {size / 1024 / 1024:6.1f} МБ за {elapsed:5.2f} с, "
+                  f"пик памяти {peak / 1024 / 1024:5.1f} МБ")
+
+        errors = await check_failures(path)
+        if errors:
+            print(f"  ✗ {errors[0]}")
+            return 1
+        print("  ✓ Ошибка документа записана в errors.txt, выгрузка продолжена")
+
+        errors = await check_cache_untouched(path)
+        if errors:
+            for error in errors:
+                print(f"  ✗ {error}")
+            return 1
+        print("  ✓ Выгрузка не пишет в кэш документов")
+
+        errors = check_zip64(Path(tmpdir))
+        if errors:
+            for error in errors:
+                print(f"  ✗ ZIP64: {error}")
+            return 1
+        print("  ✓ ZIP64: больше 65535 файлов и смещения за 4 ГиБ")
+
+    errors = await check_colliding_numbers()
+    if errors:
+        print(f"  ✗ {errors[0]}")
+        return 1
+    print("  ✓ Договоры с совпадающими после замены символов номерами не затирают друг друга")
+
+    if results[100][1] > results[10][1] * 2:
+        print("  ✗ Пик памяти растёт с размером выгрузки")
+        return 1
+    print("  ✓ Пик памяти не зависит от размера выгрузки")
+
+    print("\n" + "=" * 60)
+    return 0
+
+
+def main():
+    """Главная функция проверки"""
+    return asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Проверка условной загрузки справочника БИК.
+Поднимает локальный HTTP-сервер вместо cbr.ru (ETag, Last-Modified, 304)
+и проверяет: условные заголовки из сохранённого состояния, пропуск
+неизменившегося архива по 304 и по SHA-256 (сервер без валидаторов),
+загрузку изменившегося архива, ошибку HTTP, разбор загруженного ED807 и
+срок планового обновления. Запись в БД и advisory-блокировка требуют
+Postgres и здесь не проверяются.
+"""
+import asyncio
+import hashlib
+import io
+import sys
+import threading
+import zipfile
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx
+
+from app.models import CBRImportState
+from app.services.cbr_import import ED807_NS, CBRImportService
+from app.services.cbr_sync import is_due
+
+LAST_MODIFIED = "Fri, 16 Oct 2026 06:00:00 GMT"
+
+
+def make_archive(version: int) -> bytes:
+    """ED807 на три записи: обычная, без корсчёта и с неверным БИК"""
+    xml = (
+        f'<?xml version="1.0" encoding="UTF-8"?><ED807 xmlns="{ED807_NS["cbr"]}" EDNo="{version}">'
+        '<BICDirectoryEntry BIC="044525225"><ParticipantInfo NameP="ПАО Сбербанк"/>'
+        '<Accounts Account="40102810045370000002" RegulationAccountType="CBRA"/>'
+        '<Accounts Account="30101810400000000225" RegulationAccountType="CRSA"/></BICDirectoryEntry>'
+        f'<BICDirectoryEntry BIC="044525000"><ParticipantInfo NameP="ГУ Банка России v{version}"/>'
+        '</BICDirectoryEntry>'
+        '<BICDirectoryEntry BIC="123"><ParticipantInfo NameP="Неверный БИК"/></BICDirectoryEntry>'
+        '</ED807>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("20261016_ED807_full.xml", xml.encode())
+    return buffer.getvalue()
+
+
+class CBRStandIn(BaseHTTPRequestHandler):
+    """Архив newbik; с validators — ETag и Last-Modified и ответ 304 на совпадение"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if server.status != 200:
+            self.send_error(server.status)
+            return
+        etag = f'"{hashlib.sha256(server.archive).hexdigest()[:16]}"'
+        if server.validators and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(server.archive)))
+        if server.validators:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(server.archive)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CBRStandIn)
+    server.archive, server.validators, server.status, server.requests = make_archive(1), True, 200, []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def remember(state: CBRImportState, fetched) -> None:
+    """Как import_banks после успешной записи"""
+    state.etag, state.last_modified, state.sha256 = fetched.etag, fetched.last_modified, fetched.sha256
+
+
+async def check_fetch() -> list[str]:
+    server = start_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}/s/newbik"
+    service = CBRImportService(timeout=5, url=url)
+    state = CBRImportState(source=url)
+    errors = []
+    try:
+        fetched = await service.fetch_newbik_archive(state)
+        if fetched.content != server.archive or fetched.sha256 != hashlib.sha256(server.archive).hexdigest():
+            errors.append("первая загрузка: не тот архив или отпечаток")
+        if fetched.matches(state):
+            errors.append("первая загрузка считается неизменившейся")
+        if fetched.last_modified != LAST_MODIFIED or not fetched.etag:
+            errors.append(f"не сохранены валидаторы: {fetched.etag!r}, {fetched.last_modified!r}")
+        records = service.parse_ed807_from_zip(fetched.content)
+        if [r["bik"] for r in records] != ["044525225", "044525000"] or records[1]["correspondent_account"]:
+            errors.append(f"разбор загруженного архива: {records}")
+        remember(state, fetched)
+
+        fetched = await service.fetch_newbik_archive(state)
+        sent = server.requests[-1]
+        if sent.get("If-None-Match") != state.etag or sent.get("If-Modified-Since") != LAST_MODIFIED:
+            errors.append(f"нет условных заголовков: {sent}")
+        if fetched.content is not None or not fetched.matches(state):
+            errors.append("тот же архив: нет ответа 304 или он не пропущен")
+
+        # Сервер без валидаторов: архив скачивается, но совпадает по SHA-256
+        server.validators = False
+        fetched = await service.fetch_newbik_archive(state)
+        if fetched.content is None or not fetched.matches(state):
+            errors.append("тот же архив без ETag не распознан по SHA-256")
+
+        server.validators, server.archive = True, make_archive(2)
+        fetched = await service.fetch_newbik_archive(state)
+        if fetched.content != server.archive or fetched.matches(state):
+            errors.append("изменившийся архив пропущен")
+
+        # Принудительная загрузка: без условных заголовков
+        await service.fetch_newbik_archive(None)
+        if "If-None-Match" in server.requests[-1]:
+            errors.append("force отправил условный запрос")
+
+        server.status = 503
+        try:
+            await service.fetch_newbik_archive(state)
+            errors.append("ответ 503 не дал ошибки")
+        except httpx.HTTPStatusError:
+            pass
+    finally:
+        server.shutdown()
+    return errors
+
+
+def check_due() -> list[str]:
+    now = datetime(2026, 10, 17, 12, 0)
+    day = 24 * 3600
+    errors = []
+    for title, state, expected in (
+        ("нет состояния", None, True),
+        ("ни разу не проверяли", CBRImportState(source="x"), True),
+        ("проверяли час назад", CBRImportState(source="x", checked_at=now - timedelta(hours=1)), False),
+        ("проверяли сутки назад", CBRImportState(source="x", checked_at=now - timedelta(days=1)), True),
+    ):
+        if is_due(state, day, now) != expected:
+            errors.append(f"{title}: {not expected} вместо {expected}")
+    return errors
+
+
+def main():
+    """Главная функция проверки"""
+    print("=" * 60)
+    print("Проверка условной загрузки справочника БИК")
+    print("=" * 60)
+
+    failed = False
+    for title, errors in (
+        ("Условные запросы, 304 и отпечаток SHA-256", asyncio.run(check_fetch())),
+        ("Срок планового обновления", check_due()),
+    ):
+        if errors:
+            failed = True
+            for error in errors:
+                print(f"  ✗ {title}: {error}")
+        else:
+            print(f"  ✓ {title}")
+
+    print("\n" + "=" * 60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Проверка генерации счёта через скомпилированный xlsx-архив.
+Открывает результат zip-режима и эталонного openpyxl-режима через openpyxl,
+сравнивает значения и стили ячеек, объединения, картинки и замеряет время.
+"""
+import sys
+import time
+import zipfile
+from copy import copy
+from io import BytesIO
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from openpyxl import load_workbook
+
+from app.document.invoice_generator import (
+    INVOICE_MODE_OPENPYXL,
+    INVOICE_MODE_ZIP,
+    generate_invoice,
+    get_invoice_package,
+    service_row_values,
+    totals_values,
+)
+from sample_data import make_sample_contract
+
+SERVICE_COUNTS = (0, 1, 3, 10)
+ITERATIONS = 50
+STYLE_ATTRS = ("font", "border", "fill", "number_format", "alignment", "protection")
+
+
+def cell_style(cell) -> tuple:
+    # StyleProxy сравнивается только с самим объектом стиля, поэтому копируем
+    return tuple(copy(getattr(cell, attr)) for attr in STYLE_ATTRS)
+
+
+def compare_sheets(reference: bytes, rendered: bytes) -> list[str]:
+    """Расхождения между листами эталонного и собранного счёта"""
+    ref_ws = load_workbook(BytesIO(reference)).active
+    new_ws = load_workbook(BytesIO(rendered)).active
+    errors = []
+
+    rows = max(ref_ws.max_row, new_ws.max_row)
+    columns = max(ref_ws.max_column, new_ws.max_column)
+    for row in range(1, rows + 1):
+        for column in range(1, columns + 1):
+            ref_cell = ref_ws.cell(row=row, column=column)
+            new_cell = new_ws.cell(row=row, column=column)
+            if ref_cell.value != new_cell.value:
+                errors.append(f"{ref_cell.coordinate}: {ref_cell.value!r} != {new_cell.value!r}")
+            if cell_style(ref_cell) != cell_style(new_cell):
+                errors.append(f"{ref_cell.coordinate}: различается стиль")
+
+    ref_merges = {str(r) for r in ref_ws.merged_cells.ranges}
+    new_merges = {str(r) for r in new_ws.merged_cells.ranges}
+    if ref_merges != new_merges:
+        errors.append(f"объединения: {sorted(ref_merges ^ new_merges)}")
+    for row in range(1, rows + 1):
+        if ref_ws.row_dimensions[row].height != new_ws.row_dimensions[row].height:
+            errors.append(f"высота строки {row}")
+
+    ref_images = sorted(image.anchor._from.col for image in ref_ws._images)
+    new_images = sorted(image.anchor._from.col for image in new_ws._images)
+    if ref_images != new_images:
+        errors.append(f"картинки: {ref_images} != {new_images}")
+    return errors
+
+
+def check_package(data: bytes) -> list[str]:
+    """Архив цел, все части из [Content_Types].xml присутствуют"""
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        bad = zf.testzip()
+        names = set(zf.namelist())
+        content_types = zf.read("[Content_Types].xml").decode("utf-8")
+    errors = [f"повреждена часть {bad}"] if bad else []
+    for part in ("xl/comments1.xml",):
+        if part in content_types and part not in names:
+            errors.append(f"Override для отсутствующей части {part}")
+    return errors
+
+
+def measure(func) -> float:
+    """Среднее время вызова в миллисекундах"""
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def main():
+    """Главная функция проверки"""
+    print("=" * 60)
+    print("Проверка генерации счёта через xlsx-архив")
+    print("=" * 60)
+
+    failed = False
+    single = generate_invoice(make_sample_contract(services_count=1), mode=INVOICE_MODE_ZIP)
+    for count in SERVICE_COUNTS:
+        contract = make_sample_contract(services_count=count)
+        rendered = generate_invoice(contract, mode=INVOICE_MODE_ZIP)
+        reference = generate_invoice(contract, mode=INVOICE_MODE_OPENPYXL)
+        errors = check_package(rendered) + compare_sheets(reference, rendered)
+        if errors:
+            failed = True
+            print(f"  ✗ {count} услуг: {len(errors)} расхождений")
+            for error in errors[:10]:
+                print(f"      {error}")
+        else:
+            print(f"  ✓ {count} услуг: значения, стили и разметка листа верны")
+
+    get_invoice_package.cache_clear()
+    started = time.perf_counter()
+    package = get_invoice_package()
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    contract = make_sample_contract(services_count=5)
+    openpyxl_ms = measure(lambda: generate_invoice(contract, mode=INVOICE_MODE_OPENPYXL))
+    zip_ms = measure(lambda: generate_invoice(contract, mode=INVOICE_MODE_ZIP))
+
+    # Сборка пакета без построения QR-кода
+    cells = {ref: text for ref, text in package.cell_texts.items()}
+    cells.update(totals_values(sum(s.price for s in contract.services), len(contract.services)))
+    rows = [service_row_values(i, service) for i, service in enumerate(contract.services)]
+    qr = zipfile.ZipFile(BytesIO(single)).read(package._image_parts["qr"])
+    package_ms = measure(lambda: package.render(cells, rows, images={"qr": qr}))
+
+    print(f"\n  Компиляция шаблона : {compile_ms:8.3f} мс ({package.size} байт)")
+    print(f"  openpyxl           : {openpyxl_ms:8.3f} мс")
+    print(f"  xlsx-архив         : {zip_ms:8.3f} мс")
+    print(f"  Сборка без QR      : {package_ms:8.3f} мс")
+    print(f"  Ускорение          : {openpyxl_ms / zip_ms:8.1f}x")
+
+    print("\n" + "=" * 60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Проверка фоновых задач.
+Проверяет предел параллельности по видам задач, события хода выполнения,
+обработку ошибок, периодическое удаление устаревших задач и HTTP API
+(постановка, SSE, скачивание результата) на тестовом договоре без БД, а
+также запрос захвата и повторы общей очереди в Postgres (записи в БД
+перехватываются).
+"""
+import asyncio
+import logging
+import os
+import sys
+import zipfile
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Без пулов процессов, LibreOffice и БД: проверяется только механика задач
+os.environ.setdefault("RENDER_WORKERS", "0")
+os.environ.setdefault("OFFICE_POOL_SIZE", "0")
+os.environ.setdefault("BANK_INDEX_ENABLED", "false")
+
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from sqlalchemy.dialects import postgresql
+
+from app.auth import get_current_user
+from app.document.snapshot import ContractSnapshot
+from app.main import app
+from app.services import job_handlers, job_queue, jobs
+from app.services.job_queue import PostgresJobQueue
+from app.services.jobs import JOB_FAILED, JOB_QUEUED, JOB_SUCCEEDED, Job, JobError, JobManager
+from sample_data import make_sample_contract
+
+
+class SleepParams(BaseModel):
+    seconds: float = 0.05
+    fail: bool = False
+
+
+async def check_manager() -> list[str]:
+    manager = JobManager(queue_size=10, ttl=3600)
+    running = {"now": 0, "max": 0}
+
+    async def sleep_job(job, params: SleepParams):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        try:
+            for step in range(1, 4):
+                await asyncio.sleep(params.seconds / 3)
+                job.report(step / 3, f"шаг {step}")
+            if params.fail:
+                raise JobError("ожидаемая ошибка")
+        finally:
+            running["now"] -= 1
+
+    manager.register("sleep", sleep_job, SleepParams, concurrency=2)
+    manager.start()
+    errors = []
+    try:
+        jobs = [await manager.submit("sleep", {}) for _ in range(6)]
+        failing = await manager.submit("sleep", {"fail": True})
+        events = [event async for event in manager.events(jobs[-1])]
+        while not failing.finished:
+            await asyncio.sleep(0.01)
+
+        if running["max"] != 2:
+            errors.append(f"одновременно выполнялось {running['max']} задач вместо 2")
+        if [e["status"] for e in events][-1] != JOB_SUCCEEDED or events[-1]["progress"] != 1.0:
+            errors.append("последнее событие не сообщает о завершении")
+        progress = [e["progress"] for e in events]
+        if progress != sorted(progress) or len(events) < 4:
+            errors.append(f"неверная последовательность событий: {progress}")
+        if failing.status != JOB_FAILED or failing.error != "ожидаемая ошибка":
+            errors.append("ошибка задачи не записана")
+        try:
+            await manager.submit("sleep", {"seconds": "долго"})
+            errors.append("неверные параметры приняты")
+        except Exception:
+            pass
+    finally:
+        await manager.stop()
+    return errors
+
+
+async def check_prune() -> list[str]:
+    """Устаревшие задачи и их файлы удаляются периодически, без новых постановок"""
+    manager = JobManager(queue_size=10, ttl=0)
+
+    async def file_job(job, params: SleepParams):
+        job.result_file("result.txt", "text/plain").write_text("готово")
+
+    manager.register("file", file_job, SleepParams)
+    interval, jobs.PRUNE_INTERVAL = jobs.PRUNE_INTERVAL, 0.02
+    manager.start()
+    try:
+        job = await manager.submit("file", {})
+        while not job.finished:
+            await asyncio.sleep(0.01)
+        directory = job.result_path.parent
+        for _ in range(100):
+            if await manager.get(job.id) is None and not directory.exists():
+                return []
+            await asyncio.sleep(0.01)
+        return ["завершённая задача и её файл не удалены по истечении jobs_ttl"]
+    finally:
+        jobs.PRUNE_INTERVAL = interval
+        await manager.stop()
+
+
+async def check_postgres_queue() -> list[str]:
+    errors = []
+    queue = PostgresJobQueue(
+        queue_size=10, ttl=3600, poll_interval=0.01, visibility_timeout=30, max_attempts=3, retry_backoff=10
+    )
+
+    # Захват по SKIP LOCKED: занятые другим обработчиком строки пропускаются без ожидания
+    statements = []
+
+    class _Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            return False
+
+        async def scalar(self, statement):
+            statements.append(str(statement.compile(dialect=postgresql.asyncpg.dialect())))
+            return None
+
+    job_queue.async_session = _Session
+    if await queue.claim("sleep") is not None or "FOR UPDATE SKIP LOCKED" not in statements[0]:
+        errors.append(f"неверный запрос захвата: {statements}")
+
+    # Ожидаемые ошибки обработчиков пишутся в лог с трассировкой
+    logging.getLogger("app.services.job_queue").setLevel(logging.CRITICAL)
+
+    # Повторы: непредвиденная ошибка — в очередь с удвоенной паузой, JobError и
+    # последняя попытка — отказ, успех сохраняет файл-результат
+    updates = []
+
+    async def record_update(job, **values):
+        updates.append(values)
+        return True
+
+    queue._update = record_update
+
+    async def flaky_job(job, params: SleepParams):
+        if params.fail:
+            raise JobError("ожидаемая ошибка")
+        if job.attempts < job.max_attempts:
+            raise RuntimeError("сбой")
+        job.result_file("result.txt", "text/plain").write_text("ok")
+
+    queue.register("flaky", flaky_job, SleepParams)
+    kind = queue.kinds["flaky"]
+    job = Job(id="retryjob", kind="flaky", params={}, max_attempts=3)
+    for attempt in (1, 2, 3):
+        job.attempts = attempt
+        await queue._run(kind, job)
+    statuses = [u["status"] for u in updates]
+    delays = [(u["run_after"] - datetime.utcnow()).total_seconds() for u in updates[:2]]
+    if statuses != [JOB_QUEUED, JOB_QUEUED, JOB_SUCCEEDED]:
+        errors.append(f"неверная последовательность попыток: {statuses}")
+    elif not (9 < delays[0] <= 10 and 19 < delays[1] <= 20):
+        errors.append(f"неверные паузы перед повтором: {delays}")
+    elif updates[2]["result_filename"] != "result.txt":
+        errors.append(f"файл-результат не записан: {updates[2]}")
+
+    updates.clear()
+    await queue._run(kind, Job(id="failjob", kind="flaky", params={"fail": True}, attempts=1, max_attempts=3))
+    job.attempts = 3
+    queue.register("broken", lambda job, params: _raise(RuntimeError("сбой")), SleepParams)
+    await queue._run(queue.kinds["broken"], job)
+    if [(u["status"], u["error"]) for u in updates] != [(JOB_FAILED, "ожидаемая ошибка"), (JOB_FAILED, "RuntimeError: сбой")]:
+        errors.append(f"отказ задачи не записан: {updates}")
+    return errors
+
+
+async def _raise(error: Exception):
+    raise error
+
+
+def check_api() -> list[str]:
+    contract = make_sample_contract(services_count=3)
+    snapshot = ContractSnapshot.from_model(contract)
+
+    async def find_contract_snapshot(db, contract_id):
+        return snapshot if contract_id == snapshot.id else None
+
+    job_handlers.find_contract_snapshot = find_contract_snapshot
+    job_handlers.async_session = lambda: _NoSession()
+    app.dependency_overrides[get_current_user] = lambda: "user"
+
+    errors = []
+    with TestClient(app) as client:
+        response = client.post("/api/jobs", json={"kind": "invoice-xlsx", "params": {"contract_id": snapshot.id}})
+        if response.status_code != 202:
+            return [f"POST /api/jobs: {response.status_code} {response.text}"]
+        job_id = response.json()["id"]
+
+        with client.stream("GET", f"/api/jobs/{job_id}/events") as events:
+            body = "".join(events.iter_text())
+        if '"status":"succeeded"' not in body or not body.startswith("event: job\ndata: "):
+            errors.append(f"SSE без события завершения: {body[:200]}")
+
+        job = client.get(f"/api/jobs/{job_id}").json()
+        result = client.get(job["result"]["url"])
+        if result.status_code != 200 or job["result"]["filename"] != "invoice_1_2026.xlsx":
+            errors.append(f"результат недоступен: {result.status_code} {job['result']}")
+        else:
+            zipfile.ZipFile(BytesIO(result.content)).testzip()
+
+        missing = client.post("/api/jobs", json={"kind": "contract-docx", "params": {"contract_id": 999}})
+        with client.stream("GET", f"/api/jobs/{missing.json()['id']}/events") as events:
+            "".join(events.iter_text())
+        failed = client.get(f"/api/jobs/{missing.json()['id']}").json()
+        if failed["status"] != JOB_FAILED or failed["error"] != "Contract not found":
+            errors.append(f"задача по несуществующему договору: {failed}")
+
+        if client.post("/api/jobs", json={"kind": "unknown"}).status_code != 400:
+            errors.append("неизвестный вид задачи не отклонён")
+        if client.post("/api/jobs", json={"kind": "bulk-export", "params": {"formats": ["doc"]}}).status_code != 422:
+            errors.append("неверные параметры выгрузки не отклонены")
+    app.dependency_overrides.clear()
+    return errors
+
+
+class _NoSession:
+    """Сессия-заглушка: поиск договора подменён, БД не нужна"""
+
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *args):
+        return False
+
+
+def main():
+    """Главная функция проверки"""
+    print("=" * 60)
+    print("Проверка фоновых задач")
+    print("=" * 60)
+
+    failed = False
+    for title, errors in (
+        ("Очереди, параллельность и события", asyncio.run(check_manager())),
+        ("Удаление устаревших задач по расписанию", asyncio.run(check_prune())),
+        ("Общая очередь в Postgres: захват и повторы", asyncio.run(check_postgres_queue())),
+        ("HTTP API и SSE", check_api()),
+    ):
+        if errors:
+            failed = True
+            for error in errors:
+                print(f"  ✗ {title}: {error}")
+        else:
+            print(f"  ✓ {title}")
+
+    print("\n" + "=" * 60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Проверка курсорной пагинации.
+Проходит таблицу услуг в SQLite страницами по курсору и по номеру страницы
+и сравнивает с полной сортировкой (с повторами в ключе и смешанными
+направлениями), проверяет подсчёт строк в режимах exact и none, SQL для
+Postgres и отказ на чужой курсор, курсор другой строки поиска или курсор
+со значениями не того типа, что ключ. Режим estimated требует статистики Postgres: здесь проверяется
+только запрос EXPLAIN, который он отправляет (поиск пользователя —
+параметром, а не в тексте SQL).
+"""
+import asyncio
+import random
+import sys
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models import Bank, Service
+from app.pagination import (
+    COUNT_EXACT, COUNT_NONE, KeysetOrder, decode_cursor, encode_cursor, estimate_rows, fetch_page,
+)
+from app.search import search_filter, search_rank_order
+from app.routers.contracts import CONTRACTS_ORDER
+from app.routers.services import SERVICES_ORDER
+
+# Цена по убыванию, затем название: направления смешаны, условие через OR
+PRICE_ORDER = KeysetOrder(
+    "services-by-price", ((Service.price, True), (Service.name, False), (Service.id, False))
+)
+RANK_ORDER = search_rank_order("services", Service.search_text, "услуга", Service.id)
+
+
+class SyncSession:
+    """Асинхронный интерфейс сессии поверх синхронной SQLite"""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        return self.session.execute(query)
+
+
+def make_session() -> SyncSession:
+    engine = create_engine("sqlite://")
+    Service.__table__.create(engine)
+    session = Session(engine)
+    rng = random.Random(7)
+    for i in range(257):
+        session.add(Service(
+            id=i + 1,
+            # Немного названий и цен: много строк с одинаковым ключом
+            name=f"Услуга {rng.randint(1, 20):02d}",
+            price=Decimal(rng.choice(["100.00", "250.50", "1000.00"])),
+            payment_terms="",
+        ))
+    session.commit()
+    return SyncSession(session)
+
+
+async def walk(db, order: KeysetOrder, per_page: int, by_cursor: bool) -> list[int]:
+    ids, page, cursor = [], 1, None
+    while True:
+        result = await fetch_page(db, select(Service), order, per_page, page, cursor, COUNT_NONE)
+        ids.extend(item.id for item in result.items)
+        if not result.has_more:
+            return ids
+        if by_cursor:
+            cursor = result.next_cursor
+        else:
+            page += 1
+
+
+async def check_walks() -> list[str]:
+    db = make_session()
+    errors = []
+    for order in (SERVICES_ORDER, PRICE_ORDER):
+        expected = [item.id for item in (await fetch_page(db, select(Service), order, 1000)).items]
+        for per_page in (1, 7, 20, 256, 257, 300):
+            for by_cursor in (False, True):
+                ids = await walk(db, order, per_page, by_cursor)
+                if ids != expected:
+                    mode = "курсор" if by_cursor else "страницы"
+                    errors.append(f"{order.name}, {per_page} на странице ({mode}): порядок не совпал")
+    return errors
+
+
+async def check_counts() -> list[str]:
+    db = make_session()
+    errors = []
+    query = select(Service).where(Service.price > 200)
+    expected = len((await fetch_page(db, query, SERVICES_ORDER, 1000, count=COUNT_NONE)).items)
+
+    db.queries = 0
+    first = await fetch_page(db, query, SERVICES_ORDER, 10, count=COUNT_EXACT)
+    if first.total != expected or db.queries != 1:
+        errors.append(f"exact: {first.total} из {expected} за {db.queries} запросов вместо одного")
+    if first.response(1, 10)["pages"] != (expected + 9) // 10:
+        errors.append("неверное число страниц")
+
+    for title, kwargs in (
+        ("страница за концом", {"page": 100}),
+        ("по курсору", {"cursor": first.next_cursor}),
+    ):
+        result = await fetch_page(db, query, SERVICES_ORDER, 10, count=COUNT_EXACT, **kwargs)
+        if result.total != expected:
+            errors.append(f"exact, {title}: {result.total} из {expected}")
+
+    db.queries = 0
+    result = await fetch_page(db, query, SERVICES_ORDER, 10, count=COUNT_NONE)
+    if result.total is not None or result.response(1, 10)["pages"] is not None or db.queries != 1:
+        errors.append("none: выполнен подсчёт строк")
+    if not result.has_more or [i.id for i in result.items] != [i.id for i in first.items]:
+        errors.append("none: другая страница или нет has_more")
+    return errors
+
+
+def check_sql() -> list[str]:
+    errors = []
+    dialect = postgresql.asyncpg.dialect()
+    values = [Decimal("1"), "a", 1]
+    sql = str(CONTRACTS_ORDER.after([None, 1]).compile(dialect=dialect))
+    if not sql.startswith("(contracts.created_at, contracts.id) < ("):
+        errors.append(f"условие договоров без сравнения кортежей: {sql}")
+    sql = str(PRICE_ORDER.after(values).compile(dialect=dialect))
+    if " OR " not in sql:
+        errors.append(f"условие со смешанными направлениями: {sql}")
+    return errors
+
+
+class ExplainRecorder:
+    """Сессия Postgres без сервера: запоминает запрос драйверу и отвечает готовым планом"""
+
+    bind = SimpleNamespace(dialect=postgresql.asyncpg.dialect())
+
+    def __init__(self):
+        self.calls = []
+
+    async def connection(self):
+        return self
+
+    async def exec_driver_sql(self, sql, parameters):
+        self.calls.append((sql, parameters))
+        return SimpleNamespace(scalar=lambda: [{"Plan": {"Plan Rows": 42}}])
+
+
+async def check_estimate() -> list[str]:
+    errors = []
+    # Двоеточие в поиске — не параметр SQL
+    search = "ооо :альфа"
+    db = ExplainRecorder()
+    query = select(Bank).where(search_filter(Bank.search_text, search))
+    total = await estimate_rows(db, query, Bank.__table__)
+    if total != 42 or len(db.calls) != 1:
+        return [f"оценка {total} за {len(db.calls)} запросов"]
+    sql, parameters = db.calls[0]
+    if not sql.startswith("EXPLAIN (FORMAT JSON) SELECT") or ":альфа" in sql:
+        errors.append(f"поиск попал в текст SQL: {sql}")
+    if "%ооо :альфа%" not in parameters:
+        errors.append(f"поиск не передан параметром: {parameters}")
+    return errors
+
+
+async def check_bad_cursors() -> list[str]:
+    db = make_session()
+    errors = []
+    foreign = encode_cursor(CONTRACTS_ORDER, [None, 1])
+    for cursor in ("не-base64", "e30", foreign):
+        try:
+            await fetch_page(db, select(Service), SERVICES_ORDER, 10, cursor=cursor)
+            errors.append(f"курсор {cursor!r} принят")
+        except HTTPException as e:
+            if e.status_code != 400:
+                errors.append(f"курсор {cursor!r}: {e.status_code}")
+
+    # Имя и длина верные, но значения не того типа, что ключ
+    for order, values in (
+        (SERVICES_ORDER, ["Услуга 01", "1"]),
+        (SERVICES_ORDER, [1, 1]),
+        (SERVICES_ORDER, ["Услуга 01", True]),
+        (SERVICES_ORDER, ["Услуга 01", 1.5]),
+        (SERVICES_ORDER, [{"x": 1}, 1]),
+        (PRICE_ORDER, [100.5, "Услуга 01", 1]),
+        (CONTRACTS_ORDER, ["2026-10-17T00:00:00", 1]),
+        (RANK_ORDER, ["0.5", 1]),
+    ):
+        try:
+            decode_cursor(order, encode_cursor(order, values))
+            errors.append(f"{order.name}: курсор {values!r} принят")
+        except HTTPException as e:
+            if e.status_code != 400:
+                errors.append(f"{order.name}: курсор {values!r}: {e.status_code}")
+
+    # Курсор порядка по релевантности действует только для той же строки поиска
+    for search, accepted in (("услуга", True), ("  УСЛУГА ", True), ("услуги", False)):
+        order = search_rank_order("services", Service.search_text, search, Service.id)
+        try:
+            decode_cursor(order, encode_cursor(RANK_ORDER, [0.5, 1]))
+            if not accepted:
+                errors.append(f"курсор поиска «услуга» принят для «{search}»")
+        except HTTPException:
+            if accepted:
+                errors.append(f"курсор поиска «услуга» отклонён для «{search}»")
+
+    for order, values in (
+        (CONTRACTS_ORDER, [datetime(2026, 10, 17, 12, 0), 1]),
+        (CONTRACTS_ORDER, [None, 1]),
+        (PRICE_ORDER, [Decimal("100.00"), "Услуга 01", 1]),
+        (RANK_ORDER, [0.5, 1]),
+    ):
+        try:
+            if decode_cursor(order, encode_cursor(order, values)) != values:
+                errors.append(f"{order.name}: курсор {values!r} изменился")
+        except HTTPException:
+            errors.append(f"{order.name}: верный курсор {values!r} отклонён")
+    return errors
+
+
+def main():
+    """Главная функция проверки"""
+    print("=" * 60)
+    print("Проверка курсорной пагинации")
+    print("=" * 60)
+
+    failed = False
+    for title, errors in (
+        ("Обход по курсору и по страницам", asyncio.run(check_walks())),
+        ("Подсчёт строк: exact в том же запросе и none", asyncio.run(check_counts())),
+        ("SQL условия «после ключа»", check_sql()),
+        ("Оценка estimated: поиск с двоеточием передаётся параметром", asyncio.run(check_estimate())),
+        ("Неверные курсоры отклоняются", asyncio.run(check_bad_cursors())),
+    ):
+        if errors:
+            failed = True
+            for error in errors:
+                print(f"  ✗ {title}: {error}")
+        else:
+            print(f"  ✓ {title}")
+
+    print("\n" + "=" * 60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
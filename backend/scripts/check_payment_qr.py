@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Проверка QR-кода оплаты.
+Сравнивает 1-битный PNG с изображением, которое строит qrcode через PIL,
+пиксель в пиксель, и замеряет время первого и повторного построения.
+"""
+import sys
+import time
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import qrcode
+from PIL import Image
+from qrcode.constants import ERROR_CORRECT_M
+
+from app.document.qr_generator import (
+    build_payment_qr_data,
+    generate_payment_qr_image,
+    payment_qr_png,
+    qr_cache_stats,
+    qr_matrix,
+)
+
+PAYMENTS = (
+    ("1/2026", "21.03.2026", Decimal("45000.50")),
+    ("1234/2026-ИП", "01.12.2026", Decimal("0.01")),
+    ("7", "05.01.2027", Decimal("9999999.99")),
+)
+SIZES = ((4, 2), (1, 0), (3, 4))
+
+
+def reference_image(data: str, box_size: int, border: int) -> Image.Image:
+    """Прежний способ: qrcode + PIL"""
+    qr = qrcode.QRCode(version=None, error_correction=ERROR_CORRECT_M, box_size=box_size, border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.make_image(fill_color="black", back_color="white").get_image().convert("L")
+
+
+def main():
+    """Главная функция проверки"""
+    print("=" * 60)
+    print("Проверка QR-кода оплаты")
+    print("=" * 60)
+
+    failed = False
+    for number, invoice_date, amount in PAYMENTS:
+        data = build_payment_qr_data(number, invoice_date, amount)
+        if not data.startswith("ST00012|") or not data.endswith(f"|Sum={int(amount * 100)}"):
+            print(f"  ✗ {number}: неверная строка данных {data!r}")
+            failed = True
+            continue
+        for box_size, border in SIZES:
+            image = Image.open(BytesIO(payment_qr_png(data, box_size, border)))
+            reference = reference_image(data, box_size, border)
+            if image.mode != "1" or image.size != reference.size \
+                    or list(image.convert("L").getdata()) != list(reference.getdata()):
+                print(f"  ✗ {number}, модуль {box_size}, рамка {border}: изображение отличается")
+                failed = True
+    if not failed:
+        print(f"  ✓ PNG совпадает с qrcode + PIL ({len(PAYMENTS) * len(SIZES)} вариантов)")
+
+    data = build_payment_qr_data("99/2026", "21.03.2026", Decimal("150000.00"))
+    start = time.perf_counter()
+    reference_image(data, 4, 2).save(BytesIO(), format="PNG")
+    pil_ms = (time.perf_counter() - start) * 1000
+
+    qr_matrix.cache_clear()
+    payment_qr_png.cache_clear()
+    start = time.perf_counter()
+    generate_payment_qr_image("99/2026", "21.03.2026", Decimal("150000.00"))
+    cold_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    generate_payment_qr_image("99/2026", "21.03.2026", Decimal("150000.00"))
+    hot_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\n  qrcode + PIL       : {pil_ms:8.3f} мс")
+    print(f"  Первое построение  : {cold_ms:8.3f} мс")
+    print(f"  Повторное          : {hot_ms:8.3f} мс")
+    print(f"  Статистика         : {qr_cache_stats()}")
+
+    print("\n" + "=" * 60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Проверка кэша готовых документов.
+Сравнивает документы, собранные из снимка договора и из исходного объекта,
+проверяет, что ключ меняется при изменении любых входных данных, и замеряет
+время выдачи повторного скачивания.
+"""
+import dataclasses
+import sys
+import time
+import zipfile
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.config import settings
+from app.document.generator import RENDER_MODE_DOCX, RENDER_MODE_SLOTS, generate_contract_document
+from app.document.invoice_generator import generate_invoice
+from app.document.render_cache import RenderCache, render_cache, render_cache_key
+from app.document.rendering import FORMAT_CONTRACT_DOCX, FORMAT_INVOICE_XLSX, render_document
+from app.document.snapshot import ContractSnapshot
+from sample_data import make_sample_contract, make_sample_template
+
+ITERATIONS = 200
+
+
+def read_parts(data: bytes) -> dict[str, bytes]:
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def check_snapshot_output(contract) -> list[str]:
+    """Снимок должен давать те же части пакета, что и исходный объект"""
+    snapshot = ContractSnapshot.from_model(contract)
+    errors = []
+    for name, generate in (("docx", generate_contract_document), ("xlsx", generate_invoice)):
+        # Метаданные xlsx содержат время создания, сравниваем содержимое листов
+        reference = read_parts(generate(contract))
+        rendered = read_parts(generate(snapshot))
+        diff = [part for part in reference if reference[part] != rendered.get(part)
+                and not part.startswith("docProps/")]
+        if diff:
+            errors.append(f"{name}: различаются {', '.join(diff)}")
+    return errors
+
+
+def check_key_sensitivity(snapshot: ContractSnapshot) -> list[str]:
+    """Любое изменение входных данных должно менять ключ"""
+    base = render_cache_key(snapshot, FORMAT_CONTRACT_DOCX)
+    client = snapshot.client
+    services = list(snapshot.services)
+    variants = {
+        "номер договора": dataclasses.replace(snapshot, number="2/2026"),
+        "поле клиента": dataclasses.replace(snapshot, client=dataclasses.replace(client, inn="7700000000")),
+        "банк": dataclasses.replace(snapshot, client=dataclasses.replace(
+            client, bank=dataclasses.replace(client.bank, bik="044525974"))),
+        "цена услуги": dataclasses.replace(snapshot, services=(
+            dataclasses.replace(services[0], price=Decimal("1.00")), *services[1:])),
+        "порядок услуг": dataclasses.replace(snapshot, services=tuple(reversed(services))),
+        "шаблон": ContractSnapshot.from_model(
+            make_sample_contract(services_count=len(services), template=make_sample_template())),
+    }
+    errors = [name for name, variant in variants.items()
+              if render_cache_key(variant, FORMAT_CONTRACT_DOCX) == base]
+    if render_cache_key(snapshot, FORMAT_INVOICE_XLSX) == base:
+        errors.append("формат")
+    contract_mode = settings.contract_render_mode
+    settings.contract_render_mode = RENDER_MODE_SLOTS if contract_mode == RENDER_MODE_DOCX else RENDER_MODE_DOCX
+    try:
+        if render_cache_key(snapshot, FORMAT_CONTRACT_DOCX) == base:
+            errors.append("режим рендеринга")
+    finally:
+        settings.contract_render_mode = contract_mode
+    return [f"ключ не зависит от: {name}" for name in errors]
+
+
+def check_lru() -> list[str]:
+    cache = RenderCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.get("a")
+    cache.put("c", b"12345")
+    errors = []
+    if cache.get("b") is not None or cache.get("a") is None:
+        errors.append("LRU вытесняет не самую старую запись")
+    if cache.stats()["evictions"] != 1:
+        errors.append("неверный счётчик вытеснений")
+    return errors
+
+
+def measure(func) -> float:
+    """Среднее время вызова в миллисекундах"""
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def main():
+    """Главная функция проверки"""
+    print("=" * 60)
+    print("Проверка кэша готовых документов")
+    print("=" * 60)
+
+    contract = make_sample_contract(services_count=5)
+    snapshot = ContractSnapshot.from_model(contract)
+    errors = check_snapshot_output(contract) + check_key_sensitivity(snapshot) + check_lru()
+    if errors:
+        for error in errors:
+            print(f"  ✗ {error}")
+        return 1
+    print("  ✓ Снимок даёт те же документы, ключ учитывает все входные данные, LRU верен")
+
+    render_cache.clear()
+    render_document(snapshot, FORMAT_INVOICE_XLSX)
+    cold_ms = measure(lambda: generate_invoice(snapshot))
+    hot_ms = measure(lambda: render_document(snapshot, FORMAT_INVOICE_XLSX))
+    print(f"\n  Счёт без кэша      : {cold_ms:8.3f} мс")
+    print(f"  Повторная выдача   : {hot_ms:8.3f} мс (digest + LRU)")
+    print(f"  Статистика         : {render_cache.stats()}")
+
+    print("\n" + "=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Проверка побайтной эквивалентности режимов рендеринга договора.
+Сравнивает все части .docx, полученные через slot-шаблон и через python-docx,
+проверяет, что управляющие символы, недопустимые в XML, отклоняются в обоих
+режимах, а неизвестные метки сообщаются одинаково.
+"""
+import sys
+import time
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.document.generator import (
+    RENDER_MODE_DOCX,
+    RENDER_MODE_SLOTS,
+    generate_contract_document,
+    render_docx,
+)
+from app.document.template_cache import template_cache
+from sample_data import make_sample_contract, make_sample_template
+
+ITERATIONS = 50
+
+
+def read_parts(docx_bytes: bytes) -> dict[str, bytes]:
+    with zipfile.ZipFile(BytesIO(docx_bytes)) as zf:
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def measure(contract, mode: str) -> float:
+    """Среднее время рендеринга в миллисекундах"""
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        generate_contract_document(contract, mode=mode)
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def main():
+    """Главная функция проверки"""
+    print("=" * 60)
+    print("Проверка slot-рендеринга договора")
+    print("=" * 60)
+
+    cases = {
+        "без услуг": make_sample_contract(services_count=0),
+        "ИП, 1 услуга": make_sample_contract(services_count=1, client_type="ip"),
+        "ООО, 5 услуг": make_sample_contract(services_count=5),
+        "физлицо, свой шаблон": make_sample_contract(
+            services_count=2, client_type="fl", template=make_sample_template(),
+        ),
+    }
+
+    failed = False
+    for name, contract in cases.items():
+        reference = read_parts(generate_contract_document(contract, mode=RENDER_MODE_DOCX))
+        rendered = read_parts(generate_contract_document(contract, mode=RENDER_MODE_SLOTS))
+
+        if list(reference) != list(rendered):
+            print(f"  ✗ {name}: разный состав частей пакета")
+            failed = True
+            continue
+
+        diff = [part for part in reference if reference[part] != rendered[part]]
+        if diff:
+            print(f"  ✗ {name}: различаются {', '.join(diff)}")
+            failed = True
+        else:
+            print(f"  ✓ {name}: {len(reference)} частей совпадают побайтно")
+
+    # Управляющий символ (\x0b — разрыв строки при копировании из Word) недопустим в XML:
+    # оба режима должны отказать, а не отдать .docx, который Word не откроет
+    for mode in (RENDER_MODE_DOCX, RENDER_MODE_SLOTS):
+        contract = make_sample_contract(services_count=2)
+        contract.services[1].name = "ООО \x0bРога"
+        try:
+            generate_contract_document(contract, mode=mode)
+            print(f"  ✗ {mode}: управляющий символ попал в документ")
+            failed = True
+        except ValueError:
+            print(f"  ✓ {mode}: управляющий символ отклонён")
+
+    # Неизвестные метки в тексте услуг оба режима сообщают одинаково
+    contract = make_sample_contract(services_count=2)
+    contract.services[0].name = "Услуга {{нет_такой_метки}}"
+    compiled = template_cache.get(contract.template)
+    _, docx_unknown = render_docx(compiled.instantiate(), contract)
+    _, slots_unknown = compiled.slot_template.render(contract)
+    if docx_unknown != slots_unknown or "{{нет_такой_метки}}" not in slots_unknown:
+        print(f"  ✗ неизвестные метки: docx {sorted(docx_unknown)}, slots {sorted(slots_unknown)}")
+        failed = True
+    else:
+        print("  ✓ Неизвестные метки в строках услуг совпадают в обоих режимах")
+
+    if failed:
+        return 1
+
+    contract = cases["ООО, 5 услуг"]
+    docx_ms = measure(contract, RENDER_MODE_DOCX)
+    slots_ms = measure(contract, RENDER_MODE_SLOTS)
+    print(f"\n  python-docx : {docx_ms:8.2f} мс")
+    print(f"  slots       : {slots_ms:8.2f} мс")
+    print(f"  Ускорение   : {docx_ms / slots_ms:8.1f}x")
+
+    print("\n" + "=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Пересчёт счётчиков клиентов банков (banks.usage_count).
+Счётчики ведёт триггер на clients; скрипт исправляет расхождения, если
+данные менялись в обход триггера. На время пересчёта (один запрос по
+clients) таблица клиентов заблокирована для записи: добавление, правка и
+удаление клиентов ждут его окончания.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Добавляем backend в путь
+SCRIPT_DIR = Path(__file__).parent
+BACKEND_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.database import async_session, engine
+from app.services.bank_usage import reconcile_bank_usage
+
+
+async def run() -> int:
+    try:
+        async with async_session() as db:
+            return await reconcile_bank_usage(db)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    """Главная функция пересчёта"""
+    print("=" * 60)
+    print("Пересчёт счётчиков клиентов банков")
+    print("=" * 60)
+
+    try:
+        fixed = asyncio.run(run())
+    except Exception as e:
+        print(f"\n✗ Ошибка пересчёта: {e}")
+        return 1
+
+    if fixed:
+        print(f"\n✓ Исправлено банков: {fixed}")
+    else:
+        print("\n✓ Расхождений нет")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
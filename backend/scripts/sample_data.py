@@ -0,0 +1,60 @@
+"""
+Тестовые данные договора без обращения к БД (для скриптов проверки и бенчмарков).
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+
+def make_sample_contract(
+    services_count: int = 3,
+    client_type: str = "ooo",
+    template=None,
+    number: str = "1/2026",
+):
+    """Создаёт договор с клиентом, банком и услугами"""
+    bank = SimpleNamespace(
+        id=1, name='ПАО "СБЕРБАНК"', bik="044525225", correspondent_account="30101810400000000225",
+    )
+    client = SimpleNamespace(
+        id=1, client_type=client_type, name="ООО «Ромашка & Партнёры»", short_name="ООО «Ромашка»",
+        company_name="Ромашка & Партнёры", ogrn="1027700132195", inn="7707083893", kpp="773601001",
+        address="г. Москва, ул. Тверская, д. 1", email="info@example.ru", phone="+7 999 000-00-00",
+        settlement_account="40702810900000000001", bank_id=bank.id, bank=bank,
+        last_name="Иванов", first_name="Пётр", patronymic="Сергеевич",
+        position="Генерального директора", acting_basis="Устава",
+        passport_series="4510", passport_number="123456", passport_issued_by="ОВД района Арбат",
+        passport_issued_date=date(2010, 5, 20), created_at=datetime(2026, 1, 1),
+    )
+    services = [
+        SimpleNamespace(
+            id=i,
+            name=f"Услуга {i} «консультация» <онлайн>",
+            price=Decimal(15000 * i) + Decimal("0.50") * (i % 2),
+            payment_terms="100% предоплата\n  в течение 5 рабочих дней" if i % 2 else "Оплата по факту",
+        )
+        for i in range(1, services_count + 1)
+    ]
+    return SimpleNamespace(
+        id=1, number=number, client_id=client.id, template_id=template.id if template else None,
+        template=template, date=date(2026, 3, 21), created_at=datetime(2026, 3, 21),
+        client=client, services=services,
+    )
+
+
+def make_sample_template(template_id: int = 1):
+    """Создаёт пользовательский шаблон с метками в тексте разделов"""
+    return SimpleNamespace(
+        id=template_id,
+        updated_at=datetime(2026, 1, 1),
+        sections=[
+            {
+                "number": 1,
+                "title": "Предмет договора с {{client_name}}",
+                "paragraphs": [
+                    "1.1. Заказчик (ИНН {{client_inn}}) поручает, Исполнитель принимает.",
+                    "1.2. Итоговая стоимость: {{total_price}}.",
+                ],
+            },
+        ],
+    )
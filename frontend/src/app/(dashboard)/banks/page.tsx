@@ -64,6 +64,8 @@ export default function BanksPage() {
         total_processed: 0,
         created: 0,
         updated: 0,
+        unchanged: 0,
+        skipped: false,
         errors: 1,
         error_messages: [(error as Error).message || "Ошибка импорта"],
         import_date: new Date().toISOString(),
@@ -126,8 +128,10 @@ export default function BanksPage() {
       {importResult && (
         <div className={`mb-4 p-4 rounded-lg ${importResult.success ? 'bg-green-50 text-green-800' : 'bg-red-50 text-red-800'}`}>
           <p>
-            {importResult.success
-              ? `Импорт завершён: ${importResult.total_processed} банков обработано, ${importResult.created} добавлено, ${importResult.updated} обновлено`
+            {importResult.success && importResult.skipped
+              ? "Справочник ЦБ не изменился с прошлого импорта"
+              : importResult.success
+              ? `Импорт завершён: ${importResult.total_processed} банков обработано, ${importResult.created} добавлено, ${importResult.updated} обновлено, ${importResult.unchanged} без изменений`
               : `Ошибка: ${importResult.error_messages.join(', ')}`
             }
           </p>
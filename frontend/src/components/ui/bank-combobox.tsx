@@ -7,7 +7,7 @@ import { Button } from "@/components/ui/button"
 import { $api } from "@/lib/api-client"
 import type { components } from "@/lib/api-types"
 
-type Bank = components["schemas"]["BankResponse"]
+type Bank = components["schemas"]["BankLookupItem"]
 
 interface BankComboboxProps {
   value: string
@@ -19,7 +19,8 @@ export function BankCombobox({ value, onChange, placeholder = "Выберите
   const [open, setOpen] = useState(false)
   const [search, setSearch] = useState("")
   const [debouncedSearch, setDebouncedSearch] = useState("")
-  const [page, setPage] = useState(1)
+  // Cursor of the next page from the previous response; null for the first page
+  const [cursor, setCursor] = useState<string | null>(null)
   const [allItems, setAllItems] = useState<Bank[]>([])
   const containerRef = useRef<HTMLDivElement>(null)
 
@@ -27,29 +28,46 @@ export function BankCombobox({ value, onChange, placeholder = "Выберите
   useEffect(() => {
     const timer = setTimeout(() => {
       setDebouncedSearch(search)
-      setPage(1)
+      setCursor(null)
       setAllItems([])
     }, 300)
     return () => clearTimeout(timer)
   }, [search])
 
-  const { data, isLoading } = $api.useQuery(
+  const searching = debouncedSearch.trim() !== ""
+
+  // Without search: list for browsing, next pages by cursor (no OFFSET scan over the directory)
+  const { data, isLoading: isListLoading } = $api.useQuery(
     "get",
     "/api/banks",
-    { params: { query: { page, search: debouncedSearch, per_page: 20 } } },
-    { enabled: open }
+    { params: { query: { cursor: cursor ?? undefined, per_page: 20, count: "none" } } },
+    { enabled: open && !searching }
+  )
+
+  // With search: typeahead from the in-memory BIK index
+  const { data: lookupData, isLoading: isLookupLoading } = $api.useQuery(
+    "get",
+    "/api/banks/lookup",
+    { params: { query: { q: debouncedSearch, limit: 20 } } },
+    { enabled: open && searching }
   )
 
+  const isLoading = searching ? isLookupLoading : isListLoading
+
   // Accumulate items for infinite scroll
   useEffect(() => {
-    if (data?.items) {
-      if (page === 1) {
+    if (searching) {
+      if (lookupData) {
+        setAllItems(lookupData)
+      }
+    } else if (data?.items) {
+      if (cursor === null) {
         setAllItems(data.items)
       } else {
         setAllItems(prev => [...prev, ...data.items])
       }
     }
-  }, [data?.items, page])
+  }, [searching, lookupData, data?.items, cursor])
 
   // Fetch selected bank name
   const { data: selectedBankData } = $api.useQuery(
@@ -79,12 +97,12 @@ export function BankCombobox({ value, onChange, placeholder = "Выберите
   }, [onChange])
 
   const handleLoadMore = () => {
-    if (data && page < data.pages) {
-      setPage(prev => prev + 1)
+    if (!searching && data?.next_cursor) {
+      setCursor(data.next_cursor)
     }
   }
 
-  const hasMore = data ? page < data.pages : false
+  const hasMore = !searching && (data?.has_more ?? false)
 
   return (
     <div ref={containerRef} className="relative">
@@ -28,7 +28,8 @@ export function ClientCombobox({ value, onChange, placeholder = "Выберит
   const [open, setOpen] = useState(false)
   const [search, setSearch] = useState("")
   const [debouncedSearch, setDebouncedSearch] = useState("")
-  const [page, setPage] = useState(1)
+  // Cursor of the next page from the previous response; null for the first page
+  const [cursor, setCursor] = useState<string | null>(null)
   const [allItems, setAllItems] = useState<Client[]>([])
   const containerRef = useRef<HTMLDivElement>(null)
 
@@ -36,29 +37,30 @@ export function ClientCombobox({ value, onChange, placeholder = "Выберит
   useEffect(() => {
     const timer = setTimeout(() => {
       setDebouncedSearch(search)
-      setPage(1)
+      setCursor(null)
       setAllItems([])
     }, 300)
     return () => clearTimeout(timer)
   }, [search])
 
+  // Next pages by cursor: no OFFSET scan over the skipped clients
   const { data, isLoading } = $api.useQuery(
     "get",
     "/api/clients",
-    { params: { query: { page, search: debouncedSearch, per_page: 20 } } },
+    { params: { query: { cursor: cursor ?? undefined, search: debouncedSearch, per_page: 20, count: "none" } } },
     { enabled: open }
   )
 
   // Accumulate items for infinite scroll
   useEffect(() => {
     if (data?.items) {
-      if (page === 1) {
+      if (cursor === null) {
         setAllItems(data.items)
       } else {
         setAllItems(prev => [...prev, ...data.items])
       }
     }
-  }, [data?.items, page])
+  }, [data?.items, cursor])
 
   // Fetch selected client name
   const { data: selectedClientData } = $api.useQuery(
@@ -88,12 +90,12 @@ export function ClientCombobox({ value, onChange, placeholder = "Выберит
   }, [onChange])
 
   const handleLoadMore = () => {
-    if (data && page < data.pages) {
-      setPage(prev => prev + 1)
+    if (data?.next_cursor) {
+      setCursor(data.next_cursor)
     }
   }
 
-  const hasMore = data ? page < data.pages : false
+  const hasMore = data?.has_more ?? false
 
   return (
     <div ref={containerRef} className="relative">
@@ -39,6 +39,26 @@ export interface paths {
         patch?: never;
         trace?: never;
     };
+    "/api/banks/lookup": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        /**
+         * Lookup Banks
+         * @description Typeahead by BIK prefix and name word prefixes, served from the in-memory index.
+         */
+        get: operations["lookup_banks_api_banks_lookup_get"];
+        put?: never;
+        post?: never;
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
     "/api/banks/{bank_id}": {
         parameters: {
             query?: never;
@@ -70,6 +90,8 @@ export interface paths {
         /**
          * Import From Cbr
          * @description Import bank directory from Central Bank of Russia.
+         *
+         *     Skipped when the archive matches the last import, unless force is set.
          */
         post: operations["import_from_cbr_api_banks_import_cbr_post"];
         delete?: never;
@@ -429,11 +451,27 @@ export interface components {
             /** Items */
             items: components["schemas"]["BankResponse"][];
             /** Total */
-            total: number;
+            total: number | null;
             /** Page */
             page: number;
             /** Pages */
-            pages: number;
+            pages: number | null;
+            /** Next Cursor */
+            next_cursor?: string | null;
+            /**
+             * Has More
+             * @default false
+             */
+            has_more: boolean;
+        };
+        /** BankLookupItem */
+        BankLookupItem: {
+            /** Id */
+            id: number;
+            /** Bik */
+            bik: string;
+            /** Name */
+            name: string;
         };
         /** BankResponse */
         BankResponse: {
@@ -465,6 +503,16 @@ export interface components {
             created: number;
             /** Updated */
             updated: number;
+            /**
+             * Unchanged
+             * @default 0
+             */
+            unchanged: number;
+            /**
+             * Skipped
+             * @default false
+             */
+            skipped: boolean;
             /** Errors */
             errors: number;
             /**
@@ -532,11 +580,18 @@ export interface components {
             /** Items */
             items: components["schemas"]["ClientResponse"][];
             /** Total */
-            total: number;
+            total: number | null;
             /** Page */
             page: number;
             /** Pages */
-            pages: number;
+            pages: number | null;
+            /** Next Cursor */
+            next_cursor?: string | null;
+            /**
+             * Has More
+             * @default false
+             */
+            has_more: boolean;
         };
         /** ClientResponse */
         ClientResponse: {
@@ -657,11 +712,18 @@ export interface components {
             /** Items */
             items: components["schemas"]["ContractResponse"][];
             /** Total */
-            total: number;
+            total: number | null;
             /** Page */
             page: number;
             /** Pages */
-            pages: number;
+            pages: number | null;
+            /** Next Cursor */
+            next_cursor?: string | null;
+            /**
+             * Has More
+             * @default false
+             */
+            has_more: boolean;
         };
         /** ContractResponse */
         ContractResponse: {
@@ -727,11 +789,18 @@ export interface components {
             /** Items */
             items: components["schemas"]["ServiceResponse"][];
             /** Total */
-            total: number;
+            total: number | null;
             /** Page */
             page: number;
             /** Pages */
-            pages: number;
+            pages: number | null;
+            /** Next Cursor */
+            next_cursor?: string | null;
+            /**
+             * Has More
+             * @default false
+             */
+            has_more: boolean;
         };
         /** ServiceResponse */
         ServiceResponse: {
@@ -772,11 +841,18 @@ export interface components {
             /** Items */
             items: components["schemas"]["TemplateResponse"][];
             /** Total */
-            total: number;
+            total: number | null;
             /** Page */
             page: number;
             /** Pages */
-            pages: number;
+            pages: number | null;
+            /** Next Cursor */
+            next_cursor?: string | null;
+            /**
+             * Has More
+             * @default false
+             */
+            has_more: boolean;
         };
         /** TemplateResponse */
         TemplateResponse: {
@@ -888,6 +964,9 @@ export interface operations {
                 page?: number;
                 per_page?: number;
                 search?: string;
+                cursor?: string | null;
+                count?: "exact" | "estimated" | "none";
+                rank?: boolean;
             };
             header?: never;
             path?: never;
@@ -915,6 +994,38 @@ export interface operations {
             };
         };
     };
+    lookup_banks_api_banks_lookup_get: {
+        parameters: {
+            query?: {
+                q?: string;
+                limit?: number;
+            };
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["BankLookupItem"][];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
     create_bank_api_banks_post: {
         parameters: {
             query?: never;
@@ -1045,7 +1156,9 @@ export interface operations {
     };
     import_from_cbr_api_banks_import_cbr_post: {
         parameters: {
-            query?: never;
+            query?: {
+                force?: boolean;
+            };
             header?: never;
             path?: never;
             cookie?: never;
@@ -1061,6 +1174,15 @@ export interface operations {
                     "application/json": components["schemas"]["CBRImportResult"];
                 };
             };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
         };
     };
     get_services_api_services_get: {
@@ -1069,6 +1191,9 @@ export interface operations {
                 page?: number;
                 per_page?: number;
                 search?: string;
+                cursor?: string | null;
+                count?: "exact" | "estimated" | "none";
+                rank?: boolean;
             };
             header?: never;
             path?: never;
@@ -1230,6 +1355,9 @@ export interface operations {
                 page?: number;
                 per_page?: number;
                 search?: string;
+                cursor?: string | null;
+                count?: "exact" | "estimated" | "none";
+                rank?: boolean;
             };
             header?: never;
             path?: never;
@@ -1422,6 +1550,10 @@ export interface operations {
                 page?: number;
                 per_page?: number;
                 search?: string;
+                date_from?: string | null;
+                date_to?: string | null;
+                cursor?: string | null;
+                count?: "exact" | "estimated" | "none";
             };
             header?: never;
             path?: never;
@@ -1677,6 +1809,8 @@ export interface operations {
             query?: {
                 page?: number;
                 per_page?: number;
+                cursor?: string | null;
+                count?: "exact" | "estimated" | "none";
             };
             header?: never;
             path?: never;